@@ -3,7 +3,14 @@ from django.urls import reverse
 from django.utils.http import urlencode
 from django.utils.html import format_html
 
-from .models import Task, CW, Requirements
+from .models import (
+    Task,
+    CW,
+    Requirements,
+    TaskDueState,
+    RecomputeMark,
+    RequirementsRevision
+)
 
 
 @admin.register(Task)
@@ -104,3 +111,32 @@ class RequirementsAdmin(admin.ModelAdmin):
         return obj
 
     related_task.short_description = 'requirements'
+
+
+@admin.register(TaskDueState)
+class TaskDueStateAdmin(admin.ModelAdmin):
+    list_display = (
+        "task",
+        "next_due_date",
+        "mos_neg",
+        "mos_pos",
+        "next_due_hrs",
+        "next_due_cycles",
+        "status",
+        "status_date"
+    )
+    list_filter = ("status",)
+    search_fields = ("task__code", )
+    ordering = ["next_due_date"]
+
+
+@admin.register(RecomputeMark)
+class RecomputeMarkAdmin(admin.ModelAdmin):
+    list_display = ("name", "changed_until", "swept_at")
+
+
+@admin.register(RequirementsRevision)
+class RequirementsRevisionAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "created_at", "activated_at")
+    list_filter = ("status",)
+    ordering = ["-created_at"]
@@ -1,46 +1,182 @@
+from datetime import date
+from typing import Literal
+
+from ninja import File
+from ninja.decorators import decorate_view
+from ninja.errors import HttpError
+from ninja.files import UploadedFile
 from ninja.router import Router
 from ninja.pagination import paginate
 
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
 
+from .models import TaskDueState
+from .pagination import KeysetPagination
+from .response_cache import cached_response
 from .schemas import (
     TaskIn,
     TaskOut,
     ComplianceIn,
     ComplianceOut,
+    BulkComplianceIn,
+    BulkComplianceOut,
     ReqIn,
     ReqOut,
+    TaskDueStateOut,
+    FleetDueOut,
+    ForecastOut,
+    ImportOut,
+    RevisionOut,
+    DispatchStatsOut,
+    CacheStatsOut,
+    QueryStatsOut,
     Error
 )
 from .services import (
     get_tasks,
-    get_task,
+    aget_task,
     create_tasks,
     update_tasks,
     delete_task,
     create_cw,
-    get_cws,
+    create_cws_bulk,
+    aget_cws,
     delete_cw,
     update_cw,
-    get_task_reqs,
+    aget_task_reqs,
     create_requirements,
     update_requirements,
-    delete_requirements
+    delete_requirements,
+    get_due_states,
+    get_fleet_due,
+    get_windows,
+    get_forecast,
+    import_program_file,
+    stage_revision_file,
+    activate_revision,
+    get_dispatch_stats,
+    get_cache_stats,
+    get_query_stats,
+    render_metrics,
+    export_rows,
+    EXPORT_CONTENT_TYPES
 )
 
 
 router = Router()
+cws_router = Router()
+export_router = Router()
+metrics_router = Router()
+
+
+def require_local(request) -> None:
+    if request.META.get("REMOTE_ADDR") not in settings.TASKS_METRICS_IPS:
+        raise HttpError(403, "Metrics are only served locally")
 
 
 @router.get("", response=list[TaskOut])
-@paginate
-def api_get_tasks(request):
+@decorate_view(cached_response)
+@paginate(KeysetPagination, ordering=("code", "pk"))
+async def api_get_tasks(request):
     return get_tasks()
 
 
+@router.get("due-states/", response=list[TaskDueStateOut])
+@paginate
+def api_get_due_states(request, status: str | None = None):
+    return get_due_states(status)
+
+
+@router.get("due/", response=list[FleetDueOut])
+@paginate
+def api_get_fleet_due(
+        request,
+        status: TaskDueState.Status | None = None,
+        before: date | None = None
+        ):
+    return get_fleet_due(status, before)
+
+
+@router.get("windows/{dimension}/", response=list[FleetDueOut])
+@paginate
+def api_get_windows(
+        request,
+        dimension: Literal["mos", "hrs", "afl"],
+        at: str | None = None,
+        start: str | None = None,
+        end: str | None = None
+        ):
+    try:
+        return get_windows(dimension, at, start, end)
+    except ValidationError as err:
+        raise HttpError(400, err.message)
+
+
+@router.get("forecast/", response=list[ForecastOut])
+@paginate
+def api_get_forecast(
+        request,
+        horizon: int = 90,
+        hours_per_day: float | None = None,
+        cycles_per_day: float | None = None
+        ):
+    return get_forecast(horizon, hours_per_day, cycles_per_day)
+
+
+@router.get("dispatch-stats/", response=DispatchStatsOut)
+def api_get_dispatch_stats(request):
+    return get_dispatch_stats()
+
+
+@router.get("cache-stats/", response=CacheStatsOut)
+def api_get_cache_stats(request):
+    return get_cache_stats()
+
+
+@router.post("import/", response={200: ImportOut, 400: Error})
+def api_import_program(
+        request,
+        file: UploadedFile = File(...),
+        format: str | None = None
+        ):
+    try:
+        stats = import_program_file(file.file, file.name, format)
+    except ValidationError as err:
+        return 400, {"message": err.message}
+    return stats
+
+
+@router.post("revisions/", response={200: RevisionOut, 400: Error})
+def api_stage_revision(
+        request,
+        name: str,
+        file: UploadedFile = File(...),
+        format: str | None = None
+        ):
+    try:
+        return stage_revision_file(file.file, file.name, name, format)
+    except ValidationError as err:
+        return 400, {"message": err.message}
+
+
+@router.post(
+    "revisions/{revision_id}/activate/",
+    response={200: RevisionOut, 400: Error}
+)
+def api_activate_revision(request, revision_id: int):
+    try:
+        return activate_revision(revision_id)
+    except ValidationError as err:
+        return 400, {"message": err.message}
+
+
 @router.get("{task_id}/", response=TaskOut)
-def api_get_task(request, task_id: int):
-    return get_task(task_id)
+@decorate_view(cached_response)
+async def api_get_task(request, task_id: int):
+    return await aget_task(task_id)
 
 
 @router.post("", response=list[TaskOut])
@@ -76,9 +212,10 @@ def api_create_cws(request, task_id: int, payload: ComplianceIn):
 
 
 @router.get("{task_id}/cws/", response=list[ComplianceOut])
-@paginate
-def api_get_cws(request, task_id: int):
-    return get_cws(task_id)
+@decorate_view(cached_response)
+@paginate(KeysetPagination, ordering=("perform_date", "pk"))
+async def api_get_cws(request, task_id: int):
+    return await aget_cws(task_id)
 
 
 @router.delete("{task_id}/cws/{cw_id}/")
@@ -102,8 +239,9 @@ def api_update_cw(request, cw_id, payload: ComplianceIn):
 
 
 @router.get("{task_id}/requirements/", response=list[ReqOut])
-def api_get_requirements(request, task_id: int):
-    return get_task_reqs(task_id)
+@decorate_view(cached_response)
+async def api_get_requirements(request, task_id: int):
+    return await aget_task_reqs(task_id)
 
 
 @router.post("{task_id}/requirements/", response={200: ReqOut, 400: Error})
@@ -130,3 +268,44 @@ def api_update_requirements(request, task_id, req_id, payload: ReqIn):
 @router.delete("{task_id}/requirements/{req_id}/")
 def api_delete_requirements(request, req_id):
     return delete_requirements(req_id)
+
+
+@cws_router.post("bulk/", response=list[BulkComplianceOut])
+def api_create_cws_bulk(request, payload: list[BulkComplianceIn]):
+    return create_cws_bulk([item.dict() for item in payload])
+
+
+@export_router.get("{kind}/", response={400: Error})
+def api_export(request, kind: str, format: str = "ndjson"):
+    try:
+        rows = export_rows(
+            kind,
+            format,
+            asynchronous=isinstance(request, ASGIRequest)
+        )
+    except ValidationError as err:
+        return 400, {"message": err.message}
+
+    response = StreamingHttpResponse(
+        rows,
+        content_type=EXPORT_CONTENT_TYPES[format]
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="{kind}.{format}"'
+    )
+    return response
+
+
+@metrics_router.get("queries/", response=list[QueryStatsOut])
+def api_get_query_stats(request):
+    require_local(request)
+    return get_query_stats()
+
+
+@metrics_router.get("celery/")
+def api_get_celery_metrics(request):
+    require_local(request)
+    return HttpResponse(
+        render_metrics(),
+        content_type="text/plain; version=0.0.4"
+    )
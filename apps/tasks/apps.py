@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class TasksConfig(AppConfig):
+    name = "apps.tasks"
+
+    def ready(self) -> None:
+        from .response_cache import check_shared_cache
+
+        check_shared_cache("TASKS_RESPONSE_CACHE")
+        check_shared_cache("TASKS_METRICS_CACHE")
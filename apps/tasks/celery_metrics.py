@@ -0,0 +1,239 @@
+"""Celery task metrics collected from signals, rendered for Prometheus.
+
+Counters live in the ``TASKS_METRICS_CACHE`` cache alias, which must be a
+backend shared by the workers and the web process. Every write is an atomic
+add or incr, so concurrent workers never overwrite each other's series.
+"""
+import time
+from math import inf
+
+from celery.signals import (
+    before_task_publish,
+    task_prerun,
+    task_postrun,
+    task_failure,
+)
+from django.conf import settings
+from django.core.cache import caches, BaseCache
+
+
+BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, inf)
+HISTOGRAMS = {
+    "celery_task_queue_latency_seconds": "Time from enqueue to task start",
+    "celery_task_duration_seconds": "Task execution time",
+}
+COUNTERS = {
+    "celery_tasks_total": "Finished tasks by state",
+    "celery_task_failures_total": "Failed tasks",
+    "recompute_tasks_processed_total": "Maintenance tasks recomputed",
+    "recompute_tasks_updated_total": "Maintenance tasks with changed due dates",
+}
+GAUGES = {
+    "recompute_last_run_processed": "Maintenance tasks in the last run",
+    "recompute_last_run_timestamp_seconds": "End of the last run",
+}
+# Series are registered once each: a "seen" marker taken with add, then a
+# slot numbered by incr that render_metrics reads back.
+SERIES_COUNT_KEY = "celery_metrics:series"
+SERIES_SLOT_KEY = "celery_metrics:series:{}"
+SEEN_KEY = "celery_metrics:seen:{}"
+KEY = "celery_metrics:{}"
+# Sums are kept as integer microseconds so backends can incr them.
+MICROS = 1_000_000
+
+
+def get_cache() -> BaseCache:
+    return caches[settings.TASKS_METRICS_CACHE]
+
+
+def bucket_label(bucket: float) -> str:
+    return "+Inf" if bucket == inf else f"{bucket:g}"
+
+
+def series_name(metric: str, labels: dict) -> str:
+    if not labels:
+        return metric
+    pairs = ",".join(f'{name}="{value}"' for name, value in labels.items())
+    return f"{metric}{{{pairs}}}"
+
+
+def add_series(cache: BaseCache, series: list[str]) -> None:
+    seen = cache.get_many([SEEN_KEY.format(name) for name in series])
+    for name in series:
+        key = SEEN_KEY.format(name)
+        # Only the worker whose add wins registers the series.
+        if key in seen or not cache.add(key, True, timeout=None):
+            continue
+        cache.add(SERIES_COUNT_KEY, 0, timeout=None)
+        slot = cache.incr(SERIES_COUNT_KEY)
+        cache.set(SERIES_SLOT_KEY.format(slot), name, timeout=None)
+
+
+def registered_series(cache: BaseCache) -> list[str]:
+    keys = [
+        SERIES_SLOT_KEY.format(slot)
+        for slot in range(1, cache.get(SERIES_COUNT_KEY, 0) + 1)
+    ]
+    # A slot is missing for a moment between its incr and its set.
+    slots = cache.get_many(keys)
+    return [slots[key] for key in keys if key in slots]
+
+
+def incr(cache: BaseCache, series: str, value: int = 1) -> None:
+    key = KEY.format(series)
+    cache.add(key, 0, timeout=None)
+    cache.incr(key, value)
+
+
+def inc_counter(metric: str, labels: dict, value: int = 1) -> None:
+    cache = get_cache()
+    series = series_name(metric, labels)
+    add_series(cache, [series])
+    incr(cache, series, value)
+
+
+def set_gauge(metric: str, labels: dict, value: float) -> None:
+    cache = get_cache()
+    series = series_name(metric, labels)
+    add_series(cache, [series])
+    cache.set(KEY.format(series), value, timeout=None)
+
+
+def observe(metric: str, labels: dict, seconds: float) -> None:
+    cache = get_cache()
+    seconds = max(seconds, 0.0)
+    buckets = {
+        bucket: series_name(
+            f"{metric}_bucket",
+            {**labels, "le": bucket_label(bucket)}
+        )
+        for bucket in BUCKETS
+    }
+    count = series_name(f"{metric}_count", labels)
+    total = series_name(f"{metric}_sum", labels)
+    add_series(cache, [*buckets.values(), count, total])
+
+    for bucket, name in buckets.items():
+        if seconds <= bucket:
+            incr(cache, name)
+    incr(cache, count)
+    incr(cache, total, round(seconds * MICROS))
+
+
+def task_labels(task) -> dict:
+    return {"task": task.name}
+
+
+def enqueued_at(task) -> float | None:
+    request = task.request
+    value = getattr(request, "enqueued_at", None)
+    if value is None and request.headers:
+        value = request.headers.get("enqueued_at")
+    return value
+
+
+@before_task_publish.connect
+def stamp_enqueued_at(headers=None, **kwargs) -> None:
+    if headers is not None:
+        headers.setdefault("enqueued_at", time.time())
+
+
+@task_prerun.connect
+def record_task_start(task=None, **kwargs) -> None:
+    task.request.metrics_started = time.perf_counter()
+    queued = enqueued_at(task)
+    if queued is not None:
+        observe(
+            "celery_task_queue_latency_seconds",
+            task_labels(task),
+            time.time() - queued
+        )
+
+
+@task_postrun.connect
+def record_task_end(task=None, retval=None, state=None, **kwargs) -> None:
+    labels = task_labels(task)
+    started = getattr(task.request, "metrics_started", None)
+    if started is not None:
+        observe(
+            "celery_task_duration_seconds",
+            labels,
+            time.perf_counter() - started
+        )
+    inc_counter("celery_tasks_total", {**labels, "state": state or "UNKNOWN"})
+
+    if isinstance(retval, dict) and "processed" in retval:
+        inc_counter(
+            "recompute_tasks_processed_total",
+            labels,
+            retval["processed"]
+        )
+        if "updated" in retval:
+            inc_counter(
+                "recompute_tasks_updated_total",
+                labels,
+                retval["updated"]
+            )
+        set_gauge("recompute_last_run_processed", labels, retval["processed"])
+        set_gauge("recompute_last_run_timestamp_seconds", labels, time.time())
+
+
+@task_failure.connect
+def record_task_failure(sender=None, **kwargs) -> None:
+    inc_counter("celery_task_failures_total", task_labels(sender))
+
+
+def metric_name(series: str) -> tuple[str, str]:
+    name = series.split("{", 1)[0]
+    for suffix in ("_bucket", "_count", "_sum"):
+        if name.endswith(suffix) and name[:-len(suffix)] in HISTOGRAMS:
+            return name[:-len(suffix)], suffix
+    return name, ""
+
+
+def format_value(value: float, suffix: str) -> str:
+    if suffix == "_sum":
+        value = value / MICROS
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+def render_metrics() -> str:
+    cache = get_cache()
+    series = registered_series(cache)
+    values = cache.get_many([KEY.format(name) for name in series])
+    helps = {**HISTOGRAMS, **COUNTERS, **GAUGES}
+    types = {
+        **dict.fromkeys(HISTOGRAMS, "histogram"),
+        **dict.fromkeys(COUNTERS, "counter"),
+        **dict.fromkeys(GAUGES, "gauge"),
+    }
+
+    lines = []
+    for metric in helps:
+        rows = [
+            (name, suffix) for name in series
+            for base, suffix in [metric_name(name)]
+            if base == metric
+        ]
+        if not rows:
+            continue
+        lines.append(f"# HELP {metric} {helps[metric]}")
+        lines.append(f"# TYPE {metric} {types[metric]}")
+        for name, suffix in rows:
+            value = values.get(KEY.format(name), 0)
+            lines.append(f"{name} {format_value(value, suffix)}")
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    cache = get_cache()
+    series = registered_series(cache)
+    cache.delete_many([
+        *(KEY.format(name) for name in series),
+        *(SEEN_KEY.format(name) for name in series),
+        *(
+            SERIES_SLOT_KEY.format(slot)
+            for slot in range(1, cache.get(SERIES_COUNT_KEY, 0) + 1)
+        ),
+        SERIES_COUNT_KEY,
+    ])
@@ -0,0 +1,58 @@
+from .models import BaseModel, Task, CW, Requirements
+from .loaders import load_requirements, load_last_cws
+
+
+class TaskContext:
+    """Task with its current requirements and last two CWs, loaded once.
+
+    Exposes ``compliance`` and ``curr_requirements`` like ``Task`` does, so
+    every interval_maths helper accepts either of them.
+    """
+
+    def __init__(
+            self,
+            task: Task,
+            curr_requirements: Requirements | None,
+            compliances: list[CW]
+            ):
+        self.task = task
+        self.curr_requirements = curr_requirements
+        self.compliances = compliances
+
+    @classmethod
+    def load(cls, task_pk: int) -> "TaskContext":
+        task = BaseModel.get_object_or_404(Task, pk=task_pk)
+        return cls.for_task(task)
+
+    @classmethod
+    def for_task(cls, task: Task) -> "TaskContext":
+        return cls(
+            task,
+            task.curr_requirements,
+            list(task.compliances.order_by("-perform_date")[:2])
+        )
+
+    @classmethod
+    def load_many(cls, task_pks: list[int]) -> dict[int, "TaskContext"]:
+        tasks = Task.objects.active().in_bulk(task_pks)
+        requirements = load_requirements(list(tasks))
+        last_cws = load_last_cws(list(tasks))
+        return {
+            pk: cls(task, requirements.get(pk), last_cws.get(pk, []))
+            for pk, task in tasks.items()
+        }
+
+    @property
+    def pk(self) -> int:
+        return self.task.pk
+
+    @property
+    def compliance(self) -> CW | None:
+        return self.compliances[0] if self.compliances else None
+
+    @property
+    def prev_compliance(self) -> CW | None:
+        return self.compliances[1] if len(self.compliances) > 1 else None
+
+    def push(self, cw: CW) -> None:
+        self.compliances = [cw, *self.compliances][:2]
@@ -0,0 +1,103 @@
+import atexit
+import threading
+from collections import Counter
+from collections.abc import Callable, Iterable
+
+from django.conf import settings
+
+from .tasks import update_next_due_dates, update_daily_due_dates
+
+
+def send_recompute(task_ids: list[int]) -> None:
+    update_next_due_dates.delay(task_ids)
+
+
+class RecomputeDispatcher:
+    """Collects dirty task ids and sends them as one recompute message.
+
+    The first write after a flush starts a timer; every write until it
+    fires joins the same batch, so repeated writes to a task within the
+    window cost a single recompute. An interval of 0 sends right away.
+    """
+
+    def __init__(
+            self,
+            interval: float | None = None,
+            send: Callable[[list[int]], None] = send_recompute
+            ):
+        self._interval = interval
+        self.send = send
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.timer = None
+        self.counters = Counter()
+
+    @property
+    def interval(self) -> float:
+        if self._interval is not None:
+            return self._interval
+        return settings.TASKS_RECOMPUTE_DEBOUNCE
+
+    def mark_dirty(self, task_ids: Iterable[int]) -> None:
+        task_ids = set(task_ids)
+        if not task_ids:
+            return
+
+        with self.lock:
+            self.counters["requested"] += 1
+            self.counters["duplicates"] += len(task_ids & self.pending)
+            self.pending |= task_ids
+            flush_now = self.interval <= 0
+            if not flush_now and self.timer is None:
+                self.timer = threading.Timer(self.interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+        if flush_now:
+            self.flush()
+
+    def flush(self) -> list[int]:
+        with self.lock:
+            task_ids, self.pending = sorted(self.pending), set()
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if task_ids:
+                self.counters["sent"] += 1
+                self.counters["tasks_sent"] += len(task_ids)
+
+        if task_ids:
+            self.send(task_ids)
+        return task_ids
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "requested": self.counters["requested"],
+                "sent": self.counters["sent"],
+                "saved": self.counters["requested"] - self.counters["sent"],
+                "duplicates": self.counters["duplicates"],
+                "tasks_sent": self.counters["tasks_sent"],
+                "pending": len(self.pending),
+            }
+
+
+dispatcher = RecomputeDispatcher()
+atexit.register(dispatcher.flush)
+
+
+def mark_dirty(task_ids: Iterable[int]) -> None:
+    dispatcher.mark_dirty(task_ids)
+
+
+def enqueue_recompute(task_ids: Iterable[int]) -> None:
+    """Recompute tasks whose requirements changed.
+
+    Large revisions skip the per-task batches: their requirement rows are
+    newer than the recompute mark, so one incremental pass finds them.
+    """
+    task_ids = set(task_ids)
+    if len(task_ids) > settings.TASKS_RECOMPUTE_BULK_THRESHOLD:
+        update_daily_due_dates.delay()
+    else:
+        mark_dirty(task_ids)
@@ -0,0 +1,154 @@
+from copy import copy
+from datetime import date
+from collections.abc import Iterable
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Task, CW, Requirements, TaskDueState, DueStateChange
+from .context import TaskContext
+from .interval_maths import (
+    has_due_limits,
+    needs_prev_cw,
+    set_next_due,
+    cnt_spans
+)
+from .loaders import load_requirements, load_latest_cws, load_prev_cws
+
+
+STATE_FIELDS = (
+    "compliance",
+    "next_due_date",
+    "next_due_hrs",
+    "next_due_cycles",
+    "mos_neg",
+    "mos_pos",
+    "hrs_neg",
+    "hrs_pos",
+    "afl_neg",
+    "afl_pos",
+    "status",
+    "status_date",
+    "updated_at",
+)
+
+
+def cnt_status(state: TaskDueState, today: date) -> str:
+    if not state.next_due_date:
+        return TaskDueState.Status.OK
+
+    window_start = state.mos_neg or state.next_due_date
+    window_end = state.mos_pos or state.next_due_date
+
+    if today > window_end:
+        return TaskDueState.Status.OVERDUE
+    if today >= window_start:
+        return TaskDueState.Status.IN_WINDOW
+    return TaskDueState.Status.OK
+
+
+def build_due_state(
+        task_id: int,
+        requirements: Requirements | None,
+        cw: CW | None,
+        prev_cw: CW | None,
+        today: date
+        ) -> TaskDueState:
+    state = TaskDueState(task_id=task_id, status_date=today)
+
+    if cw:
+        state.compliance_id = cw.pk
+        effective = copy(cw)
+        if has_due_limits(requirements):
+            set_next_due(requirements, effective, prev_cw)
+
+        state.next_due_date = effective.next_due_date
+        state.next_due_hrs = effective.next_due_hrs
+        state.next_due_cycles = effective.next_due_cycles
+
+        if requirements:
+            for field, value in cnt_spans(requirements, effective).items():
+                setattr(state, field, value)
+
+    state.status = cnt_status(state, today)
+    state.updated_at = timezone.now()
+    return state
+
+
+def build_due_states(
+        task_ids: Iterable[int],
+        requirements: dict[int, Requirements],
+        latest_cws: dict[int, CW],
+        prev_cws: dict[int, CW],
+        today: date | None = None
+        ) -> list[TaskDueState]:
+    today = today or timezone.now().date()
+    return [
+        build_due_state(
+            task_id,
+            requirements.get(task_id),
+            latest_cws.get(task_id),
+            prev_cws.get(task_id),
+            today
+        )
+        for task_id in task_ids
+    ]
+
+
+def save_due_states(states: list[TaskDueState]) -> None:
+    if not states:
+        return
+    # The change log tells the fleet snapshot which rows to pull; the
+    # updated_at set while building them is not in commit order.
+    with transaction.atomic(savepoint=False):
+        TaskDueState.objects.bulk_create(
+            states,
+            update_conflicts=True,
+            unique_fields=["task"],
+            update_fields=STATE_FIELDS
+        )
+        DueStateChange.log(state.task_id for state in states)
+
+
+def refresh_due_states(task_ids: Iterable[int]) -> None:
+    task_ids = list(task_ids)
+    active_ids = list(
+        Task.objects.active().filter(pk__in=task_ids).values_list(
+            "pk",
+            flat=True
+        )
+    )
+    removed = set(task_ids).difference(active_ids)
+    if removed:
+        with transaction.atomic(savepoint=False):
+            TaskDueState.objects.filter(task_id__in=removed).delete()
+            DueStateChange.log(removed)
+
+    requirements = load_requirements(active_ids)
+    latest_cws = load_latest_cws(active_ids)
+    prev_cws = load_prev_cws([
+        task_id
+        for task_id, cw in latest_cws.items()
+        if has_due_limits(requirements.get(task_id))
+        and needs_prev_cw(requirements[task_id], cw)
+    ])
+
+    save_due_states(
+        build_due_states(active_ids, requirements, latest_cws, prev_cws)
+    )
+
+
+def refresh_task_due_state(ctx: TaskContext) -> None:
+    prev_cw = ctx.prev_compliance
+    if prev_cw and prev_cw.is_deleted:
+        prev_cw = None
+
+    save_due_states([
+        build_due_state(
+            ctx.pk,
+            ctx.curr_requirements,
+            ctx.compliance,
+            prev_cw,
+            timezone.now().date()
+        )
+    ])
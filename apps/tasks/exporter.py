@@ -0,0 +1,164 @@
+import csv
+from itertools import islice
+from collections.abc import AsyncIterator, Iterator
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+
+from .models import Task, CW, Requirements, TaskDueState
+
+
+CHUNK_SIZE = 2000
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+TASK_FIELDS = ("pk", "code", "description", "created_at", "updated_at")
+CW_FIELDS = (
+    "pk",
+    "task_id",
+    "task__code",
+    "perform_date",
+    "perform_hours",
+    "perform_cycles",
+    "next_due_date",
+    "next_due_hrs",
+    "next_due_cycles",
+    "adjusted_days",
+    "adjusted_hrs",
+    "adjusted_cycles",
+    "updated_at",
+)
+REQUIREMENTS_FIELDS = (
+    "pk",
+    "task_id",
+    "task__code",
+    "is_active",
+    "due_months",
+    "due_hrs",
+    "due_cycles",
+    "mos_unit",
+    "pos_tol_mos",
+    "neg_tol_mos",
+    "hrs_unit",
+    "pos_tol_hrs",
+    "neg_tol_hrs",
+    "afl_unit",
+    "pos_tol_afl",
+    "neg_tol_afl",
+    "updated_at",
+)
+DUE_STATE_FIELDS = (
+    "task_id",
+    "task__code",
+    "compliance_id",
+    "next_due_date",
+    "next_due_hrs",
+    "next_due_cycles",
+    "mos_neg",
+    "mos_pos",
+    "hrs_neg",
+    "hrs_pos",
+    "afl_neg",
+    "afl_pos",
+    "status",
+    "status_date",
+)
+
+
+def export_tasks() -> QuerySet:
+    return Task.objects.active().order_by("pk")
+
+
+def export_cws() -> QuerySet:
+    return CW.objects.active().filter(
+        task__is_deleted=False
+    ).order_by("task_id", "perform_date")
+
+
+def export_requirements() -> QuerySet:
+    return Requirements.objects.active().filter(
+        task__is_deleted=False,
+        is_staged=False
+    ).order_by("task_id", "pk")
+
+
+def export_due_states() -> QuerySet:
+    return TaskDueState.objects.filter(
+        task__is_deleted=False
+    ).order_by("task_id")
+
+
+EXPORTS = {
+    "tasks": (export_tasks, TASK_FIELDS),
+    "cws": (export_cws, CW_FIELDS),
+    "requirements": (export_requirements, REQUIREMENTS_FIELDS),
+    "due-states": (export_due_states, DUE_STATE_FIELDS),
+}
+
+
+class Echo:
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_ndjson(rows: QuerySet, names: list[str]) -> Iterator[str]:
+    encoder = DjangoJSONEncoder()
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield encoder.encode(dict(zip(names, row))) + "\n"
+
+
+def iter_csv(rows: QuerySet, names: list[str]) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(names)
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield writer.writerow(row)
+
+
+async def aiter_values(rows: QuerySet) -> AsyncIterator[tuple]:
+    # QuerySet.aiterator() runs a values_list query on the event loop
+    # thread, so chunks of the sync iterator are pulled in a worker instead.
+    iterator = rows.iterator(chunk_size=CHUNK_SIZE)
+    next_chunk = sync_to_async(lambda: list(islice(iterator, CHUNK_SIZE)))
+    while chunk := await next_chunk():
+        for row in chunk:
+            yield row
+
+
+async def aiter_ndjson(
+        rows: QuerySet,
+        names: list[str]
+        ) -> AsyncIterator[str]:
+    encoder = DjangoJSONEncoder()
+    async for row in aiter_values(rows):
+        yield encoder.encode(dict(zip(names, row))) + "\n"
+
+
+async def aiter_csv(rows: QuerySet, names: list[str]) -> AsyncIterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(names)
+    async for row in aiter_values(rows):
+        yield writer.writerow(row)
+
+
+def export_rows(
+        kind: str,
+        fmt: str,
+        asynchronous: bool = False
+        ) -> Iterator[str] | AsyncIterator[str]:
+    if kind not in EXPORTS:
+        raise ValidationError(f"Unknown export {kind}")
+    if fmt not in CONTENT_TYPES:
+        raise ValidationError(f"Unknown format {fmt}")
+
+    queryset, fields = EXPORTS[kind]
+    rows = queryset().values_list(*fields)
+    names = [field.replace("__", "_") for field in fields]
+    # Django buffers a sync iterator whole under ASGI before sending it.
+    if asynchronous:
+        return (aiter_csv if fmt == "csv" else aiter_ndjson)(rows, names)
+    return (iter_csv if fmt == "csv" else iter_ndjson)(rows, names)
@@ -0,0 +1,214 @@
+import csv
+import io
+import json
+from time import perf_counter
+from collections.abc import Iterable, Iterator
+from typing import IO
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Task, CW, Requirements
+from .loaders import chunked
+from .dispatch import enqueue_recompute
+from .response_cache import bump_versions
+
+
+CHUNK_SIZE = 2000
+FORMATS = ("csv", "ndjson")
+INT_FIELDS = ("due_months",)
+FLOAT_FIELDS = (
+    "due_hrs",
+    "due_cycles",
+    "pos_tol_mos",
+    "neg_tol_mos",
+    "pos_tol_hrs",
+    "neg_tol_hrs",
+    "pos_tol_afl",
+    "neg_tol_afl",
+)
+UNIT_FIELDS = ("mos_unit", "hrs_unit", "afl_unit")
+REQUIREMENTS_FIELDS = (*INT_FIELDS, *FLOAT_FIELDS, *UNIT_FIELDS)
+
+
+def guess_format(name: str) -> str:
+    if name.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+def iter_rows(stream: IO[bytes], fmt: str) -> Iterator[dict]:
+    if fmt not in FORMATS:
+        raise ValidationError(f"Unknown format {fmt}")
+
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        yield from csv.DictReader(text)
+        return
+
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as err:
+            raise ValidationError(f"Line {line_no}: {err.msg}")
+
+
+def clean_value(field: str, value):
+    if value is None or value == "":
+        return None
+    if field in INT_FIELDS:
+        return int(float(value))
+    if field in FLOAT_FIELDS:
+        return round(float(value), 2)
+    return value
+
+
+def clean_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y")
+    return bool(value)
+
+
+def clean_row(row: dict, line_no: int) -> dict:
+    code = (row.get("code") or "").strip()
+    if not code:
+        raise ValidationError(f"Row {line_no}: code is required")
+
+    try:
+        requirements = {
+            field: clean_value(field, row.get(field))
+            for field in REQUIREMENTS_FIELDS
+        }
+    except (TypeError, ValueError) as err:
+        raise ValidationError(f"Row {line_no}: {err}")
+
+    return {
+        "code": code,
+        "description": row.get("description") or "",
+        "requirements": requirements,
+        "is_active": clean_bool(row.get("is_active", True)),
+    }
+
+
+def upsert_tasks(rows: list[dict], stats: dict) -> dict[str, int]:
+    tasks, existing = {}, {}
+    for pk, code, description in Task.objects.active().filter(
+            code__in={row["code"] for row in rows}
+            ).order_by("-pk").values_list("pk", "code", "description"):
+        tasks[code] = pk
+        existing[code] = description
+
+    descriptions = {row["code"]: row["description"] for row in rows}
+    changed = [
+        Task(pk=tasks[code], description=descriptions[code])
+        for code, description in existing.items()
+        if descriptions[code] and description != descriptions[code]
+    ]
+    now = timezone.now()
+    for task in changed:
+        task.updated_at = now
+    Task.objects.bulk_update(changed, ["description", "updated_at"])
+
+    created = Task.objects.bulk_create(
+        [
+            Task(code=code, description=description)
+            for code, description in descriptions.items()
+            if code not in tasks
+        ],
+        batch_size=CHUNK_SIZE
+    )
+    tasks.update((task.code, task.pk) for task in created)
+
+    stats["tasks_created"] += len(created)
+    stats["tasks_updated"] += len(changed)
+    return tasks
+
+
+def create_chunk_requirements(
+        rows: list[dict],
+        tasks: dict[str, int],
+        stats: dict
+        ) -> set[int]:
+    rows = [
+        row for row in rows
+        if any(value is not None for value in row["requirements"].values())
+    ]
+    # The last active row of a task in the chunk wins.
+    active = {
+        tasks[row["code"]]: index
+        for index, row in enumerate(rows)
+        if row["is_active"]
+    }
+
+    Requirements.objects.filter(
+        task_id__in=active,
+        is_active=True
+    ).update(is_active=False, updated_at=timezone.now())
+
+    created = Requirements.objects.bulk_create(
+        [
+            Requirements(
+                task_id=tasks[row["code"]],
+                is_active=active.get(tasks[row["code"]]) == index,
+                **{
+                    field: value
+                    for field, value in row["requirements"].items()
+                    if value is not None
+                }
+            )
+            for index, row in enumerate(rows)
+        ],
+        batch_size=CHUNK_SIZE
+    )
+
+    stats["requirements_created"] += len(created)
+    return set(active)
+
+
+def import_program(
+        rows: Iterable[dict],
+        chunk_size: int = CHUNK_SIZE
+        ) -> dict:
+    started = perf_counter()
+    stats = {
+        "rows": 0,
+        "tasks_created": 0,
+        "tasks_updated": 0,
+        "requirements_created": 0,
+        "tasks_recomputed": 0,
+    }
+
+    recompute = set()
+    numbered = (
+        clean_row(row, line_no)
+        for line_no, row in enumerate(rows, start=1)
+    )
+    try:
+        for chunk in chunked(numbered, chunk_size):
+            with transaction.atomic():
+                tasks = upsert_tasks(chunk, stats)
+                changed = create_chunk_requirements(chunk, tasks, stats)
+            bump_versions(tasks.values())
+            # Freshly created tasks have no CWs and nothing to recompute yet.
+            recompute.update(CW.objects.filter(
+                task_id__in=changed
+            ).values_list("task_id", flat=True).distinct())
+            stats["rows"] += len(chunk)
+    except ValidationError as err:
+        raise ValidationError(
+            f"{err.message}; {stats['rows']} rows imported before it"
+        )
+    finally:
+        # Once for the whole file, so a large revision is one recompute
+        # pass, and also when a bad row stops it after some chunks committed.
+        enqueue_recompute(recompute)
+    stats["tasks_recomputed"] = len(recompute)
+
+    stats["elapsed"] = round(perf_counter() - started, 3)
+    stats["rows_per_sec"] = round(
+        stats["rows"] / stats["elapsed"] if stats["elapsed"] else 0
+    )
+    return stats
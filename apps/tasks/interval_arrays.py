@@ -0,0 +1,413 @@
+"""Columnar counterparts of interval_maths for whole fleets at once.
+
+Columns are dicts of equally long NumPy arrays: dates are ``datetime64[D]``
+with NaT for missing values, numbers are ``float64`` with NaN for missing
+values, units are one-character strings. Results match ``set_next_due`` and
+``cnt_spans`` value for value.
+"""
+import numpy as np
+from django.db.models import F
+
+from .models import CW, Requirements
+from .loaders import nth_per_task
+
+
+NAT = np.datetime64("NaT", "D")
+
+DATE_COLUMNS = ("perform_date", "next_due_date", "prev_next_due_date")
+UNIT_COLUMNS = ("mos_unit", "hrs_unit", "afl_unit")
+CW_COLUMNS = (
+    "perform_date",
+    "perform_hours",
+    "perform_cycles",
+    "next_due_date",
+    "next_due_hrs",
+    "next_due_cycles",
+    "adjusted_days",
+    "adjusted_hrs",
+    "adjusted_cycles",
+)
+PREV_CW_COLUMNS = {
+    "prev_perform_hours": "perform_hours",
+    "prev_perform_cycles": "perform_cycles",
+    "prev_next_due_date": "next_due_date",
+}
+REQUIREMENTS_COLUMNS = (
+    "due_months",
+    "due_hrs",
+    "due_cycles",
+    "pos_tol_mos",
+    "neg_tol_mos",
+    "mos_unit",
+    "pos_tol_hrs",
+    "neg_tol_hrs",
+    "hrs_unit",
+    "pos_tol_afl",
+    "neg_tol_afl",
+    "afl_unit",
+)
+COLUMNS = (*CW_COLUMNS, *PREV_CW_COLUMNS, *REQUIREMENTS_COLUMNS)
+
+
+def empty_column(name: str, size: int) -> np.ndarray:
+    if name in DATE_COLUMNS:
+        return np.full(size, NAT)
+    if name in UNIT_COLUMNS:
+        return np.full(size, "", dtype="<U1")
+    return np.full(size, np.nan)
+
+
+def to_column(name: str, values: list) -> np.ndarray:
+    if name in DATE_COLUMNS:
+        return np.array(
+            [NAT if value is None else value for value in values],
+            dtype="datetime64[D]"
+        )
+    if name in UNIT_COLUMNS:
+        return np.array(
+            ["" if value is None else value for value in values],
+            dtype="<U1"
+        )
+    return np.array(
+        [np.nan if value is None else value for value in values],
+        dtype=np.float64
+    )
+
+
+def columns_from_objects(
+        rows: list[tuple[Requirements | None, CW, CW | None]]
+        ) -> dict[str, np.ndarray]:
+    def value(obj, field):
+        return getattr(obj, field) if obj is not None else None
+
+    columns = {}
+    for name in CW_COLUMNS:
+        columns[name] = to_column(name, [value(cw, name) for _, cw, _ in rows])
+    for name, field in PREV_CW_COLUMNS.items():
+        columns[name] = to_column(
+            name,
+            [value(prev_cw, field) for _, _, prev_cw in rows]
+        )
+    for name in REQUIREMENTS_COLUMNS:
+        columns[name] = to_column(
+            name,
+            [value(req, name) for req, _, _ in rows]
+        )
+    return columns
+
+
+def align(
+        task_ids: np.ndarray,
+        rows: list[tuple],
+        names: tuple,
+        columns: dict[str, np.ndarray]
+        ) -> None:
+    for name in names:
+        columns[name] = empty_column(name, len(task_ids))
+    if not rows:
+        return
+
+    row_ids, *values = zip(*rows)
+    positions = np.searchsorted(task_ids, np.array(row_ids, dtype=np.int64))
+    for name, column in zip(names, values):
+        columns[name][positions] = to_column(name, column)
+
+
+def load_fleet_columns(
+        task_ids: list[int] | None = None
+        ) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    cws = CW.objects.filter(task__is_deleted=False)
+    reqs = Requirements.objects.filter(
+        task__is_deleted=False,
+        is_staged=False
+    )
+    if task_ids is not None:
+        cws = cws.filter(task_id__in=task_ids)
+        reqs = reqs.filter(task_id__in=task_ids)
+
+    latest = list(
+        nth_per_task(cws, [F("perform_date").desc()])
+        .order_by("task_id")
+        .values_list("task_id", *CW_COLUMNS)
+    )
+    ids = np.array([row[0] for row in latest], dtype=np.int64)
+    columns = {}
+    align(ids, latest, CW_COLUMNS, columns)
+
+    prev = nth_per_task(
+        cws.filter(is_deleted=False),
+        [F("perform_date").desc()],
+        n=2
+    ).values_list("task_id", *PREV_CW_COLUMNS.values())
+    align(ids, list(prev), tuple(PREV_CW_COLUMNS), columns)
+
+    # Tasks without any CW have nothing to count from.
+    known = set(ids.tolist())
+    current_reqs = nth_per_task(
+        reqs,
+        [F("is_active").desc(), F("pk").desc()]
+    ).values_list("task_id", *REQUIREMENTS_COLUMNS)
+    align(
+        ids,
+        [row for row in current_reqs if row[0] in known],
+        REQUIREMENTS_COLUMNS,
+        columns
+    )
+
+    return ids, columns
+
+
+def truthy(values: np.ndarray) -> np.ndarray:
+    return ~np.isnan(values) & (values != 0)
+
+
+def round2(values: np.ndarray) -> np.ndarray:
+    # np.round scales by 100 first, which can land on the wrong side of a
+    # tie; redo the near-tie cases with Python's correctly rounded round().
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    near_tie = np.abs(np.abs(scaled - np.floor(scaled)) - 0.5) < 1e-6
+    for index in np.flatnonzero(near_tie):
+        rounded[index] = round(float(values[index]), 2)
+    return rounded
+
+
+def add_months(dates: np.ndarray, months: np.ndarray) -> np.ndarray:
+    valid = ~np.isnat(dates) & ~np.isnan(months)
+    safe_dates = np.where(valid, dates, np.datetime64("2000-01-01", "D"))
+    safe_months = np.where(valid, months, 0).astype(np.int64)
+
+    month_start = safe_dates.astype("datetime64[M]")
+    day = (safe_dates - month_start.astype("datetime64[D]")).astype(np.int64)
+    target = month_start + safe_months.astype("timedelta64[M]")
+    month_days = (
+        (target + 1).astype("datetime64[D]") - target.astype("datetime64[D]")
+    ).astype(np.int64)
+    shifted = target.astype("datetime64[D]") + np.minimum(day, month_days - 1)
+
+    return np.where(valid, shifted, NAT)
+
+
+def add_days(dates: np.ndarray, days: np.ndarray) -> np.ndarray:
+    valid = ~np.isnat(dates) & ~np.isnan(days)
+    safe_days = np.where(valid, days, 0).astype(np.int64)
+    return np.where(valid, dates + safe_days.astype("timedelta64[D]"), NAT)
+
+
+def cnt_next_due_arrays(columns: dict) -> dict[str, np.ndarray]:
+    due_hrs = columns["due_hrs"]
+    base_hrs = np.where(
+        truthy(columns["adjusted_hrs"]),
+        columns["prev_perform_hours"],
+        columns["perform_hours"]
+    )
+    update_hrs = truthy(due_hrs) & ~np.isnan(base_hrs)
+    next_due_hrs = np.where(
+        update_hrs,
+        round2(np.where(update_hrs, base_hrs + due_hrs, 0)),
+        columns["next_due_hrs"]
+    )
+
+    due_cycles = columns["due_cycles"]
+    base_cycles = np.where(
+        truthy(columns["adjusted_cycles"]),
+        columns["prev_perform_cycles"],
+        columns["perform_cycles"]
+    )
+    update_cycles = truthy(due_cycles) & ~np.isnan(base_cycles)
+    next_due_cycles = np.where(
+        update_cycles,
+        round2(np.where(update_cycles, base_cycles + due_cycles, 0)),
+        columns["next_due_cycles"]
+    )
+
+    due_months = columns["due_months"]
+    base_date = np.where(
+        truthy(columns["adjusted_days"]),
+        columns["prev_next_due_date"],
+        columns["perform_date"]
+    )
+    update_date = truthy(due_months) & ~np.isnat(base_date)
+    next_due_date = np.where(
+        update_date,
+        add_months(base_date, np.where(update_date, due_months, np.nan)),
+        columns["next_due_date"]
+    )
+
+    return {
+        "next_due_date": next_due_date,
+        "next_due_hrs": next_due_hrs,
+        "next_due_cycles": next_due_cycles,
+    }
+
+
+def cnt_mos_span_months_arrays(tol: np.ndarray, next_due: np.ndarray):
+    has_tol = truthy(tol)
+    months = np.where(has_tol, np.trunc(tol), 0)
+    failed = has_tol & (months == 0)
+    safe_months = np.where(failed | ~has_tol, 1, months)
+    fraction = np.where(has_tol, np.mod(tol, safe_months), 0)
+    extra_days = np.where(
+        fraction != 0,
+        np.ceil(30.5 / np.where(fraction != 0, fraction, 1)),
+        0
+    )
+    span = add_days(add_months(next_due, months), extra_days)
+    return np.where(has_tol, span, next_due), failed
+
+
+def cnt_mos_span_days_arrays(tol: np.ndarray, next_due: np.ndarray):
+    has_tol = truthy(tol)
+    span = add_days(next_due, np.floor(np.where(has_tol, tol, 0)))
+    return np.where(has_tol, span, next_due)
+
+
+def cnt_mos_span_percents_arrays(
+        tol: np.ndarray,
+        due_months: np.ndarray,
+        next_due: np.ndarray,
+        rounding
+        ):
+    has_tol = truthy(tol)
+    due_days = due_months * 30.5
+    days = rounding(np.where(has_tol, due_days * (tol / 100), 0))
+    return np.where(has_tol, add_days(next_due, days), next_due)
+
+
+def cnt_mos_spans_arrays(columns: dict, next_due: np.ndarray):
+    unit = columns["mos_unit"]
+    pos_tol = columns["pos_tol_mos"]
+    neg_tol = columns["neg_tol_mos"]
+    neg = np.full(len(next_due), NAT)
+    pos = np.full(len(next_due), NAT)
+
+    months = unit == "M"
+    neg_span, neg_failed = cnt_mos_span_months_arrays(neg_tol, next_due)
+    pos_span, pos_failed = cnt_mos_span_months_arrays(pos_tol, next_due)
+    months_ok = months & ~neg_failed & ~pos_failed
+    neg = np.where(months_ok, neg_span, neg)
+    pos = np.where(months_ok, pos_span, pos)
+
+    days = unit == "D"
+    neg = np.where(days, cnt_mos_span_days_arrays(neg_tol, next_due), neg)
+    pos = np.where(days, cnt_mos_span_days_arrays(pos_tol, next_due), pos)
+
+    percents = (unit == "P") & ~np.isnan(columns["due_months"])
+    neg = np.where(percents, cnt_mos_span_percents_arrays(
+        neg_tol, columns["due_months"], next_due, np.floor
+    ), neg)
+    pos = np.where(percents, cnt_mos_span_percents_arrays(
+        pos_tol, columns["due_months"], next_due, np.ceil
+    ), pos)
+
+    has_span = ~np.isnat(next_due)
+    return np.where(has_span, neg, NAT), np.where(has_span, pos, NAT)
+
+
+def cnt_add_span_arrays(tol: np.ndarray, next_due: np.ndarray) -> np.ndarray:
+    return np.where(truthy(tol), next_due + np.nan_to_num(tol), next_due)
+
+
+def cnt_percent_span_arrays(
+        tol: np.ndarray,
+        due: np.ndarray,
+        next_due: np.ndarray
+        ) -> np.ndarray:
+    return np.where(truthy(tol), next_due + due * (tol / 100), next_due)
+
+
+def cnt_hrs_spans_arrays(columns: dict, next_due: np.ndarray):
+    unit = columns["hrs_unit"]
+    pos_tol = columns["pos_tol_hrs"]
+    neg_tol = columns["neg_tol_hrs"]
+    neg = np.full(len(next_due), np.nan)
+    pos = np.full(len(next_due), np.nan)
+
+    hours = unit == "H"
+    neg = np.where(hours, cnt_add_span_arrays(neg_tol, next_due), neg)
+    pos = np.where(hours, cnt_add_span_arrays(pos_tol, next_due), pos)
+
+    due_hrs = columns["due_hrs"]
+    missing_due = np.isnan(due_hrs) & (truthy(pos_tol) | truthy(neg_tol))
+    percents = (unit == "P") & ~missing_due
+    neg = np.where(
+        percents,
+        cnt_percent_span_arrays(neg_tol, due_hrs, next_due),
+        neg
+    )
+    pos = np.where(
+        percents,
+        cnt_percent_span_arrays(pos_tol, due_hrs, next_due),
+        pos
+    )
+    return neg, pos
+
+
+def cnt_afl_spans_arrays(columns: dict, next_due: np.ndarray):
+    cycles = columns["afl_unit"] == "C"
+    neg = cnt_add_span_arrays(columns["neg_tol_afl"], next_due)
+    pos = cnt_add_span_arrays(columns["pos_tol_afl"], next_due)
+    return np.where(cycles, neg, np.nan), np.where(cycles, pos, np.nan)
+
+
+def cnt_fleet(columns: dict) -> dict[str, np.ndarray]:
+    result = cnt_next_due_arrays(columns)
+    result["mos_neg"], result["mos_pos"] = cnt_mos_spans_arrays(
+        columns,
+        result["next_due_date"]
+    )
+    result["hrs_neg"], result["hrs_pos"] = cnt_hrs_spans_arrays(
+        columns,
+        result["next_due_hrs"]
+    )
+    result["afl_neg"], result["afl_pos"] = cnt_afl_spans_arrays(
+        columns,
+        result["next_due_cycles"]
+    )
+    return result
+
+
+def project_limit(
+        perform_date: np.ndarray,
+        performed: np.ndarray,
+        next_due: np.ndarray,
+        per_day: float
+        ) -> np.ndarray:
+    if not per_day or per_day <= 0:
+        return np.full(len(perform_date), NAT)
+
+    remaining = next_due - performed
+    days = np.ceil(np.where(np.isnan(remaining), np.nan, remaining / per_day))
+    return add_days(perform_date, days)
+
+
+def project_due_dates(
+        columns: dict,
+        next_due: dict,
+        hours_per_day: float,
+        cycles_per_day: float
+        ) -> tuple[np.ndarray, np.ndarray]:
+    """Calendar date each limit is reached at the given daily utilization.
+
+    Returns the earliest of the three dates per task and the index of the
+    limit that drives it (0 - date, 1 - hours, 2 - cycles).
+    """
+    limits = np.stack([
+        next_due["next_due_date"],
+        project_limit(
+            columns["perform_date"],
+            columns["perform_hours"],
+            next_due["next_due_hrs"],
+            hours_per_day
+        ),
+        project_limit(
+            columns["perform_date"],
+            columns["perform_cycles"],
+            next_due["next_due_cycles"],
+            cycles_per_day
+        ),
+    ])
+    comparable = np.where(np.isnat(limits), np.datetime64("9999-12-31"), limits)
+    driver = np.argmin(comparable, axis=0)
+    projected = limits[driver, np.arange(limits.shape[1])]
+    return projected, driver
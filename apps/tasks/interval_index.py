@@ -0,0 +1,118 @@
+"""Sorted interval index over the tolerance windows of the fleet.
+
+Windows are grouped by length into powers of two, and each group is kept
+sorted by start. No window of a group is longer than the group's
+``max_length``, so every window containing a point x starts in
+``[x - max_length, x]``: two binary searches per group bound the candidates
+and only those are checked against their end. A group's windows are at
+least half as long as its longest, so the candidates that miss lie within
+half a window length of the answer, and a few long windows do not widen the
+search of the short ones. Queries cost O(g log n + k) for g groups.
+"""
+import numpy as np
+
+
+# Window bounds per dimension, falling back to the due value when a task
+# has no tolerance in that dimension.
+DIMENSIONS = {
+    "mos": ("mos_neg", "mos_pos", "next_due_date"),
+    "hrs": ("hrs_neg", "hrs_pos", "next_due_hrs"),
+    "afl": ("afl_neg", "afl_pos", "next_due_cycles"),
+}
+
+
+def as_number(column: np.ndarray) -> np.ndarray:
+    """Dates as float days since the epoch, NaT as NaN."""
+    if not np.issubdtype(column.dtype, np.datetime64):
+        return column
+    days = column.astype("datetime64[D]").astype(np.int64).astype(np.float64)
+    days[np.isnat(column)] = np.nan
+    return days
+
+
+class SortedWindows:
+    """Windows of one length group, sorted by start."""
+
+    def __init__(
+            self,
+            starts: np.ndarray,
+            ends: np.ndarray,
+            positions: np.ndarray
+            ):
+        order = np.argsort(starts, kind="stable")
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.positions = positions[order]
+        self.max_length = max(
+            float((ends - starts).max()) if len(order) else 0.0,
+            0.0
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def overlapping(
+            self,
+            low: float,
+            high: float
+            ) -> tuple[np.ndarray, np.ndarray]:
+        """Starts and positions of windows intersecting [low, high]."""
+        first = np.searchsorted(self.starts, low - self.max_length, "left")
+        last = np.searchsorted(self.starts, high, "right")
+        hits = self.ends[first:last] >= low
+        return (
+            self.starts[first:last][hits],
+            self.positions[first:last][hits]
+        )
+
+
+class IntervalIndex:
+    def __init__(
+            self,
+            starts: np.ndarray,
+            ends: np.ndarray,
+            positions: np.ndarray
+            ):
+        # Binary exponent of the length; zero-length windows share group 0
+        # with lengths in [0.5, 1), which only costs them a little slack.
+        groups = np.frexp(np.maximum(ends - starts, 0.0))[1]
+        self.groups = [
+            SortedWindows(
+                starts[groups == group],
+                ends[groups == group],
+                positions[groups == group]
+            )
+            for group in np.unique(groups)
+        ]
+        self.empty = positions[:0]
+
+    @classmethod
+    def from_columns(
+            cls,
+            columns: dict[str, np.ndarray],
+            dimension: str
+            ) -> "IntervalIndex":
+        neg, pos, due = (
+            as_number(columns[field]) for field in DIMENSIONS[dimension]
+        )
+        starts = np.where(np.isnan(neg), due, neg)
+        ends = np.where(np.isnan(pos), due, pos)
+        valid = ~np.isnan(starts) & ~np.isnan(ends)
+        return cls(starts[valid], ends[valid], np.flatnonzero(valid))
+
+    def __len__(self) -> int:
+        return sum(len(group) for group in self.groups)
+
+    def overlapping(self, low: float, high: float) -> np.ndarray:
+        """Positions of windows intersecting [low, high], by window start."""
+        if not self.groups:
+            return self.empty
+        starts, positions = zip(*(
+            group.overlapping(low, high) for group in self.groups
+        ))
+        starts = np.concatenate(starts)
+        return np.concatenate(positions)[np.argsort(starts, kind="stable")]
+
+    def stab(self, point: float) -> np.ndarray:
+        """Positions of windows containing ``point``, by window start."""
+        return self.overlapping(point, point)
@@ -1,72 +1,90 @@
 from math import ceil, floor
 from dateutil.relativedelta import relativedelta
-from datetime import date
+from datetime import date, datetime
 
 from .models import Task, CW, Requirements
+from .context import TaskContext
+
+
+def has_due_limits(requirements: Requirements | None) -> bool:
+    if not requirements:
+        return False
+    return bool(
+        requirements.due_months
+        or requirements.due_hrs
+        or requirements.due_cycles
+    )
+
+
+def needs_prev_cw(requirements: Requirements, cw: CW) -> bool:
+    return bool(
+        (requirements.due_hrs and cw.adjusted_hrs)
+        or (requirements.due_cycles and cw.adjusted_cycles)
+        or (requirements.due_months and cw.adjusted_days)
+    )
+
+
+def set_next_due(
+        requirements: Requirements,
+        cw: CW,
+        prev_cw: CW | None = None
+        ) -> CW:
+    if requirements.due_hrs:
+        if cw.adjusted_hrs:
+            base_hrs = prev_cw.perform_hours if prev_cw else None
+        else:
+            base_hrs = cw.perform_hours
 
+        if base_hrs is not None:
+            cw.next_due_hrs = round(base_hrs + requirements.due_hrs, 2)
 
-def cnt_next_due(task_id: int) -> None:
-    task = Task.objects.get(pk=task_id)
-    active_requirements = task.curr_requirements
+    if requirements.due_cycles:
+        if cw.adjusted_cycles:
+            base_cycles = prev_cw.perform_cycles if prev_cw else None
+        else:
+            base_cycles = cw.perform_cycles
 
-    if not active_requirements:
-        return
+        if base_cycles is not None:
+            cw.next_due_cycles = round(
+                base_cycles + requirements.due_cycles,
+                2
+            )
 
-    if not active_requirements.due_months and not active_requirements.due_hrs and not active_requirements.due_cycles:
-        return
+    if requirements.due_months:
+        if cw.adjusted_days:
+            base_date = prev_cw.next_due_date if prev_cw else None
+        else:
+            base_date = cw.perform_date
 
-    cw = task.compliance
-    if cw:
-        if active_requirements.due_hrs:
-            if cw.adjusted_hrs:
-                prev_cw = CW.objects.active().filter(
-                        task=task
-                    ).order_by('-perform_date')[1]
-                cw.next_due_hrs = round(
-                    prev_cw.perform_hours + active_requirements.due_hrs,
-                    2
+        if base_date is not None:
+            cw.next_due_date = base_date + relativedelta(
+                    months=requirements.due_months
                 )
 
-            else:
-                cw.next_due_hrs = round(
-                    cw.perform_hours + active_requirements.due_hrs,
-                    2
-                )
+    return cw
 
-        if active_requirements.due_cycles:
-            if cw.adjusted_cycles:
-                prev_cw = CW.objects.active().filter(
-                        task=task
-                    ).order_by('-perform_date')[1]
-                cw.next_due_cycles = round(
-                    prev_cw.perform_cycles + active_requirements.due_cycles,
-                    2
-                )
 
-            else:
-                cw.next_due_cycles = round(
-                    cw.perform_cycles + active_requirements.due_cycles,
-                    2
-                )
-
-        if active_requirements.due_months:
-            if cw.adjusted_days:
-                prev_cw = CW.objects.active().filter(
-                        task=task
-                    ).order_by('-perform_date')[1]
+def cnt_next_due(task_id: int) -> None:
+    task = Task.objects.get(pk=task_id)
+    active_requirements = task.curr_requirements
 
-                cw.next_due_date = prev_cw.next_due_date + relativedelta(
-                        months=active_requirements.due_months
-                    )
-            else:
-                cw.next_due_date = cw.perform_date + relativedelta(
-                        months=active_requirements.due_months
-                    )
+    if not has_due_limits(active_requirements):
+        return
 
+    cw = task.compliance
+    if cw:
+        prev_cw = None
+        if needs_prev_cw(active_requirements, cw):
+            prev_cw = CW.objects.active().filter(
+                    task=task
+                ).order_by('-perform_date')[1:2].first()
+
+        set_next_due(active_requirements, cw, prev_cw)
+        set_windows(active_requirements, cw)
         cw.save()
 
 
-def check_adjustment(task: Task, payload: dict) -> bool:
+def check_adjustment(task: Task | TaskContext, payload: dict) -> bool:
     latest_cw = task.compliance
 
     if latest_cw and latest_cw.next_due_date:
@@ -78,19 +96,19 @@ def check_adjustment(task: Task, payload: dict) -> bool:
     return False
 
 
-def count_mos_adjustment(task: Task, payload: dict):
+def count_mos_adjustment(task: Task | TaskContext, payload: dict):
     if payload.get("perform_date") and task.compliance.next_due_date:
         delta = payload["perform_date"] - task.compliance.next_due_date
         return delta.days
 
 
-def count_hrs_adjustment(task: Task, payload: dict):
+def count_hrs_adjustment(task: Task | TaskContext, payload: dict):
     if payload.get("perform_hours") and task.compliance.next_due_hrs:
         delta = payload["perform_hours"] - task.compliance.next_due_hrs
         return round(delta, 2)
 
 
-def count_afl_adjustment(task: Task, payload: dict):
+def count_afl_adjustment(task: Task | TaskContext, payload: dict):
     if payload.get("perform_cycles") and task.compliance.next_due_cycles:
         delta = payload["perform_cycles"] - task.compliance.next_due_cycles
         return round(delta, 2)
@@ -204,7 +222,7 @@ def cnt_afl_span_cycles(tol: Requirements, cw: CW) -> tuple:
     return neg_span, pos_span
 
 
-def get_mos_span(task: Task) -> date | None:
+def get_mos_span(task: Task | TaskContext) -> date | None:
     tolerance = task.curr_requirements
     latest_cw = task.compliance
 
@@ -217,7 +235,7 @@ def get_mos_span(task: Task) -> date | None:
             return cnt_mos_span_percents(tolerance, latest_cw)
 
 
-def get_hrs_span(task: Task) -> float | None:
+def get_hrs_span(task: Task | TaskContext) -> float | None:
     tolerance = task.curr_requirements
     latest_cw = task.compliance
 
@@ -228,10 +246,86 @@ def get_hrs_span(task: Task) -> float | None:
             return cnt_hrs_span_percents(tolerance, latest_cw)
 
 
-def get_afl_span(task: Task) -> float | None:
+def get_afl_span(task: Task | TaskContext) -> float | None:
     tolerance = task.curr_requirements
     latest_cw = task.compliance
 
     if latest_cw:
         if tolerance.afl_unit == 'C':
             return cnt_afl_span_cycles(tolerance, latest_cw)
+
+
+MOS_SPANS = {
+    'M': cnt_mos_span_months,
+    'D': cnt_mos_span_days,
+    'P': cnt_mos_span_percents,
+}
+HRS_SPANS = {
+    'H': cnt_hrs_span_hours,
+    'P': cnt_hrs_span_percents,
+}
+AFL_SPANS = {
+    'C': cnt_afl_span_cycles,
+}
+
+
+def cnt_span(span_func, tol: Requirements, cw: CW) -> tuple:
+    try:
+        return span_func(tol, cw)
+    except (TypeError, ZeroDivisionError):
+        return None, None
+
+
+def cnt_spans(tol: Requirements, cw: CW) -> dict:
+    spans = {}
+
+    if cw.next_due_date and tol.mos_unit in MOS_SPANS:
+        spans['mos_neg'], spans['mos_pos'] = (
+            span.date() if isinstance(span, datetime) else span
+            for span in cnt_span(MOS_SPANS[tol.mos_unit], tol, cw)
+        )
+    if cw.next_due_hrs is not None and tol.hrs_unit in HRS_SPANS:
+        spans['hrs_neg'], spans['hrs_pos'] = cnt_span(
+            HRS_SPANS[tol.hrs_unit], tol, cw
+        )
+    if cw.next_due_cycles is not None and tol.afl_unit in AFL_SPANS:
+        spans['afl_neg'], spans['afl_pos'] = cnt_span(
+            AFL_SPANS[tol.afl_unit], tol, cw
+        )
+
+    return spans
+
+
+# Persisted on CW so window checks and "inside window" filters are indexed
+# lookups instead of span computations.
+SPAN_WINDOWS = {
+    'mos_neg': 'mos_window_start',
+    'mos_pos': 'mos_window_end',
+    'hrs_neg': 'hrs_window_start',
+    'hrs_pos': 'hrs_window_end',
+    'afl_neg': 'afl_window_start',
+    'afl_pos': 'afl_window_end',
+}
+WINDOW_FIELDS = tuple(SPAN_WINDOWS.values())
+
+
+def set_windows(requirements: Requirements | None, cw: CW) -> CW:
+    spans = cnt_spans(requirements, cw) if requirements else {}
+    for span, field in SPAN_WINDOWS.items():
+        setattr(cw, field, spans.get(span))
+    return cw
+
+
+def get_spans(task: Task | TaskContext) -> dict:
+    latest_cw = task.compliance
+    if not latest_cw:
+        return {}
+
+    stored = {
+        span: getattr(latest_cw, field)
+        for span, field in SPAN_WINDOWS.items()
+    }
+    if any(value is not None for value in stored.values()):
+        return stored
+    # CWs written before windows were stored, or not recomputed yet.
+    return cnt_spans(task.curr_requirements, latest_cw)
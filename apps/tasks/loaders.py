@@ -0,0 +1,74 @@
+from itertools import islice
+from operator import attrgetter
+from collections.abc import Iterable, Iterator
+
+from django.db.models import F, QuerySet, Window
+from django.db.models.functions import RowNumber
+
+from .models import CW, Requirements
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def number_per_task(queryset: QuerySet, order_by: list) -> QuerySet:
+    return queryset.annotate(
+        row_number=Window(
+            RowNumber(),
+            partition_by=[F("task_id")],
+            order_by=order_by
+        )
+    )
+
+
+def nth_per_task(queryset: QuerySet, order_by: list, n: int = 1) -> QuerySet:
+    return number_per_task(queryset, order_by).filter(row_number=n)
+
+
+def first_per_task(queryset: QuerySet, order_by: list, n: int) -> QuerySet:
+    return number_per_task(queryset, order_by).filter(row_number__lte=n)
+
+
+def load_requirements(task_ids: list[int]) -> dict[int, Requirements]:
+    # Same pick as Task.curr_requirements: active first, newest row wins.
+    reqs = nth_per_task(
+        Requirements.objects.filter(task_id__in=task_ids, is_staged=False),
+        [F("is_active").desc(), F("pk").desc()]
+    )
+    return {req.task_id: req for req in reqs}
+
+
+def load_latest_cws(task_ids: list[int]) -> dict[int, CW]:
+    # Same pick as Task.compliance: deleted rows are not excluded there.
+    cws = nth_per_task(
+        CW.objects.filter(task_id__in=task_ids),
+        [F("perform_date").desc()]
+    )
+    return {cw.task_id: cw for cw in cws}
+
+
+def load_prev_cws(task_ids: list[int]) -> dict[int, CW]:
+    if not task_ids:
+        return {}
+    cws = nth_per_task(
+        CW.objects.active().filter(task_id__in=task_ids),
+        [F("perform_date").desc()],
+        n=2
+    )
+    return {cw.task_id: cw for cw in cws}
+
+
+def load_last_cws(task_ids: list[int], n: int = 2) -> dict[int, list[CW]]:
+    cws = first_per_task(
+        CW.objects.filter(task_id__in=task_ids),
+        [F("perform_date").desc()],
+        n
+    )
+
+    last_cws = {}
+    for cw in sorted(cws, key=attrgetter("row_number")):
+        last_cws.setdefault(cw.task_id, []).append(cw)
+    return last_cws
@@ -0,0 +1,49 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tasks.importer import (
+    CHUNK_SIZE,
+    FORMATS,
+    guess_format,
+    iter_rows,
+    import_program
+)
+
+
+class Command(BaseCommand):
+    help = "Import tasks and requirements from a CSV or NDJSON program file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="File format, guessed from the extension by default"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Rows written per transaction"
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or guess_format(path)
+
+        try:
+            with open(path, "rb") as stream:
+                stats = import_program(
+                    iter_rows(stream, fmt),
+                    chunk_size=options["chunk_size"]
+                )
+        except ValidationError as err:
+            raise CommandError(err.message)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['rows']} rows in {stats['elapsed']:.2f}s "
+            f"({stats['rows_per_sec']} rows/sec): "
+            f"{stats['tasks_created']} tasks created, "
+            f"{stats['tasks_updated']} updated, "
+            f"{stats['requirements_created']} requirements created"
+        ))
@@ -0,0 +1,103 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.tasks.loaders import chunked
+from apps.tasks.models import Task, CW, TaskDueState
+from apps.tasks.recompute import (
+    CHUNK_SIZE,
+    compute_chunk,
+    save_chunk,
+    recompute_next_due,
+    range_task_ids,
+    pk_ranges
+)
+
+
+def init_worker() -> None:
+    # No-op for forked workers, needed where workers are spawned.
+    django.setup()
+
+
+def compute_worker(
+        bounds: tuple[int, int],
+        chunk_size: int
+        ) -> list[tuple[int, list[CW], list[TaskDueState]]]:
+    # Workers only read; the parent saves every chunk, since sqlite takes
+    # one writer at a time and concurrent ones fail with "database is
+    # locked".
+    return [
+        (len(chunk), *compute_chunk(chunk))
+        for chunk in chunked(range_task_ids(*bounds), chunk_size)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Recompute next due date/hours/cycles for all active tasks"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Tasks loaded and written per batch"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes, 1 recomputes in this process"
+        )
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        if options["workers"] > 1:
+            processed, updated = self.recompute_parallel(
+                options["workers"],
+                options["chunk_size"],
+                started
+            )
+        else:
+            processed, updated = recompute_next_due(
+                chunk_size=options["chunk_size"]
+            )
+        elapsed = perf_counter() - started
+        rate = processed / elapsed if elapsed else 0
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Recomputed {processed} tasks ({updated} changed) "
+            f"in {elapsed:.2f}s, {rate:.0f} tasks/sec"
+        ))
+
+    def recompute_parallel(
+            self,
+            workers: int,
+            chunk_size: int,
+            started: float
+            ) -> tuple[int, int]:
+        ranges = pk_ranges(chunk_size)
+        total = Task.objects.active().count()
+        # Forked workers must not share the parent's connections; each one
+        # opens its own on first query.
+        connections.close_all()
+
+        processed = updated = 0
+        with ProcessPoolExecutor(workers, initializer=init_worker) as pool:
+            futures = [
+                pool.submit(compute_worker, bounds, chunk_size)
+                for bounds in ranges
+            ]
+            for future in as_completed(futures):
+                for count, changed, states in future.result():
+                    updated += save_chunk(changed, states)
+                    processed += count
+                elapsed = perf_counter() - started
+                self.stdout.write(
+                    f"{processed}/{total} tasks, "
+                    f"{processed / elapsed:.0f} tasks/sec"
+                )
+        return processed, updated
@@ -0,0 +1,155 @@
+import threading
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponse
+
+
+SLOW_SQL_LENGTH = 300
+
+current_recorder = ContextVar("current_recorder", default=None)
+lock = threading.Lock()
+endpoint_stats = {}
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = 0.0
+        self.slowest_sql = None
+
+    def record(self, sql: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        if duration >= self.slowest:
+            self.slowest = duration
+            self.slowest_sql = sql[:SLOW_SQL_LENGTH]
+
+
+def record_query(execute, sql, params, many, context):
+    # Installed on every connection; a no-op outside recorded requests.
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.record(sql, perf_counter() - started)
+
+
+def install_wrapper(connection, **kwargs) -> None:
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def endpoint_name(request: HttpRequest) -> str:
+    match = request.resolver_match
+    route = f"/{match.route}" if match else request.path
+    return f"{request.method} {route}"
+
+
+def collect(request: HttpRequest, recorder: QueryRecorder) -> None:
+    name = endpoint_name(request)
+    with lock:
+        stats = endpoint_stats.setdefault(name, {
+            "endpoint": name,
+            "requests": 0,
+            "queries": 0,
+            "max_queries": 0,
+            "db_ms": 0.0,
+            "max_db_ms": 0.0,
+            "slowest_ms": 0.0,
+            "slowest_sql": None,
+        })
+        stats["requests"] += 1
+        stats["queries"] += recorder.count
+        stats["max_queries"] = max(stats["max_queries"], recorder.count)
+        stats["db_ms"] += recorder.duration * 1000
+        stats["max_db_ms"] = max(stats["max_db_ms"], recorder.duration * 1000)
+        if recorder.slowest * 1000 >= stats["slowest_ms"] and recorder.count:
+            stats["slowest_ms"] = recorder.slowest * 1000
+            stats["slowest_sql"] = recorder.slowest_sql
+
+
+def get_query_stats() -> list[dict]:
+    with lock:
+        rows = [dict(stats) for stats in endpoint_stats.values()]
+    for row in rows:
+        row["avg_queries"] = round(row["queries"] / row["requests"], 2)
+        row["avg_db_ms"] = round(row["db_ms"] / row["requests"], 3)
+        for field in ("db_ms", "max_db_ms", "slowest_ms"):
+            row[field] = round(row[field], 3)
+    return sorted(rows, key=lambda row: row["queries"], reverse=True)
+
+
+def reset_query_stats() -> None:
+    with lock:
+        endpoint_stats.clear()
+
+
+class QueryStatsMiddleware:
+    """Reports SQL query count and DB time per request.
+
+    Opt-in through ``TASKS_QUERY_STATS``. Adds ``X-Query-Count`` and
+    ``Server-Timing`` headers and aggregates the numbers per endpoint.
+    Streamed bodies run their queries after the headers are sent, so only
+    the queries made before that are counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.TASKS_QUERY_STATS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+        connection_created.connect(install_wrapper)
+        for connection in connections.all(initialized_only=True):
+            install_wrapper(connection)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder)
+
+    def finish(
+            self,
+            request: HttpRequest,
+            response: HttpResponse,
+            recorder: QueryRecorder
+            ) -> HttpResponse:
+        collect(request, recorder)
+        response["X-Query-Count"] = str(recorder.count)
+        response["Server-Timing"] = (
+            f'db;dur={recorder.duration * 1000:.3f};'
+            f'desc="{recorder.count} queries", '
+            f"db-slowest;dur={recorder.slowest * 1000:.3f}"
+        )
+        return response
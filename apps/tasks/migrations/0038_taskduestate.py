@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0037_alter_requirements_afl_unit_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDueState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('next_due_date', models.DateField(blank=True, db_index=True, null=True, verbose_name='Next due date')),
+                ('next_due_hrs', models.FloatField(blank=True, null=True, verbose_name='Next due hours')),
+                ('next_due_cycles', models.FloatField(blank=True, null=True, verbose_name='Next due cycles')),
+                ('mos_neg', models.DateField(blank=True, null=True, verbose_name='MOS window start')),
+                ('mos_pos', models.DateField(blank=True, null=True, verbose_name='MOS window end')),
+                ('hrs_neg', models.FloatField(blank=True, null=True, verbose_name='HRS window start')),
+                ('hrs_pos', models.FloatField(blank=True, null=True, verbose_name='HRS window end')),
+                ('afl_neg', models.FloatField(blank=True, null=True, verbose_name='AFL/ENC window start')),
+                ('afl_pos', models.FloatField(blank=True, null=True, verbose_name='AFL/ENC window end')),
+                ('status', models.CharField(choices=[('ok', 'OK'), ('in_window', 'In window'), ('overdue', 'Overdue')], db_index=True, default='ok', max_length=10, verbose_name='Status')),
+                ('status_date', models.DateField(verbose_name='Status as of')),
+                ('updated_at', models.DateTimeField(db_index=True, verbose_name='Changed')),
+                ('compliance', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tasks.cw')),
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='due_state', to='tasks.task')),
+            ],
+        ),
+    ]
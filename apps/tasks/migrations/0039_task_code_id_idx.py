@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0038_taskduestate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['code', 'id'], name='task_code_id_idx'),
+        ),
+    ]
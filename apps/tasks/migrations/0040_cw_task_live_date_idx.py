@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0039_task_code_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cw',
+            index=models.Index(fields=['task', 'is_deleted', 'perform_date', 'id'], name='cw_task_live_date_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0040_cw_task_live_date_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='taskduestate',
+            name='next_due_date',
+            field=models.DateField(blank=True, null=True, verbose_name='Next due date'),
+        ),
+        migrations.AlterField(
+            model_name='taskduestate',
+            name='status',
+            field=models.CharField(choices=[('ok', 'OK'), ('in_window', 'In window'), ('overdue', 'Overdue')], default='ok', max_length=10, verbose_name='Status'),
+        ),
+        migrations.AddIndex(
+            model_name='cw',
+            index=models.Index(fields=['task', '-perform_date'], name='cw_task_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requirements',
+            index=models.Index(fields=['task', '-is_active', '-id'], name='req_task_current_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskduestate',
+            index=models.Index(fields=['next_due_date', 'task'], name='due_state_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskduestate',
+            index=models.Index(fields=['status', 'next_due_date', 'task'], name='due_state_status_date_idx'),
+        ),
+    ]
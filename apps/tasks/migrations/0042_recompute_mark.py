@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0041_hot_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecomputeMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Name')),
+                ('changed_until', models.DateTimeField(blank=True, null=True, verbose_name='Inputs recomputed up to')),
+                ('swept_at', models.DateTimeField(blank=True, null=True, verbose_name='Last full sweep')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='cw',
+            index=models.Index(fields=['updated_at', 'task'], name='cw_changed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='requirements',
+            index=models.Index(fields=['updated_at', 'task'], name='req_changed_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0042_recompute_mark'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['updated_at'], name='task_changed_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0043_task_changed_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cw',
+            name='afl_window_end',
+            field=models.FloatField(blank=True, null=True, verbose_name='Window end cycles'),
+        ),
+        migrations.AddField(
+            model_name='cw',
+            name='afl_window_start',
+            field=models.FloatField(blank=True, null=True, verbose_name='Window start cycles'),
+        ),
+        migrations.AddField(
+            model_name='cw',
+            name='hrs_window_end',
+            field=models.FloatField(blank=True, null=True, verbose_name='Window end hrs'),
+        ),
+        migrations.AddField(
+            model_name='cw',
+            name='hrs_window_start',
+            field=models.FloatField(blank=True, null=True, verbose_name='Window start hrs'),
+        ),
+        migrations.AddField(
+            model_name='cw',
+            name='mos_window_end',
+            field=models.DateField(blank=True, null=True, verbose_name='Window end mos'),
+        ),
+        migrations.AddField(
+            model_name='cw',
+            name='mos_window_start',
+            field=models.DateField(blank=True, null=True, verbose_name='Window start mos'),
+        ),
+        migrations.AddIndex(
+            model_name='cw',
+            index=models.Index(fields=['mos_window_start', 'mos_window_end'], name='cw_mos_window_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cw',
+            index=models.Index(fields=['hrs_window_start', 'hrs_window_end'], name='cw_hrs_window_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cw',
+            index=models.Index(fields=['afl_window_start', 'afl_window_end'], name='cw_afl_window_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0044_cw_windows'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequirementsRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=250, verbose_name='Name')),
+                ('status', models.CharField(choices=[('staged', 'Staged'), ('active', 'Active')], default='staged', max_length=10, verbose_name='Status')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created')),
+                ('activated_at', models.DateTimeField(blank=True, null=True, verbose_name='Activated')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='requirements',
+            name='is_staged',
+            field=models.BooleanField(default=False, verbose_name='Staged'),
+        ),
+        migrations.AddField(
+            model_name='requirements',
+            name='revision',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='requirements', to='tasks.requirementsrevision'),
+        ),
+    ]
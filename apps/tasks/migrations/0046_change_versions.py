@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:33
+
+from django.db import migrations, models
+
+
+def create_sequences(apps, schema_editor):
+    ChangeSequence = apps.get_model('tasks', 'ChangeSequence')
+    for name in ('tasks', 'due_states'):
+        ChangeSequence.objects.get_or_create(name=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0045_requirements_revision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Name')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Last version')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.BigIntegerField(db_index=True, default=0, verbose_name='Change version'),
+        ),
+        migrations.AddField(
+            model_name='taskduestate',
+            name='version',
+            field=models.BigIntegerField(db_index=True, default=0, verbose_name='Change version'),
+        ),
+        migrations.RunPython(create_sequences, migrations.RunPython.noop),
+    ]
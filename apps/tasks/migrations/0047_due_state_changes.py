@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0046_change_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DueStateChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created')),
+            ],
+        ),
+        migrations.DeleteModel(
+            name='ChangeSequence',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_changed_idx',
+        ),
+        migrations.RemoveField(
+            model_name='task',
+            name='version',
+        ),
+        migrations.RemoveField(
+            model_name='taskduestate',
+            name='version',
+        ),
+        migrations.AlterField(
+            model_name='taskduestate',
+            name='updated_at',
+            field=models.DateTimeField(verbose_name='Changed'),
+        ),
+        migrations.AddField(
+            model_name='duestatechange',
+            name='task',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tasks.task'),
+        ),
+    ]
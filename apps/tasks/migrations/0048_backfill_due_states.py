@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+CHUNK_SIZE = 2000
+
+
+def backfill_due_states(apps, schema_editor):
+    # TaskDueState started empty in 0038, so the due-states, due, forecast
+    # and windows endpoints had nothing to serve until a full recompute.
+    # The due state is built by the app code, which matches the schema as
+    # of this migration.
+    from apps.tasks.due_state import refresh_due_states
+
+    Task = apps.get_model('tasks', 'Task')
+    task_ids = list(
+        Task.objects.filter(is_deleted=False).order_by('pk').values_list(
+            'pk',
+            flat=True
+        )
+    )
+    for start in range(0, len(task_ids), CHUNK_SIZE):
+        refresh_due_states(task_ids[start:start + CHUNK_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0047_due_state_changes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_due_states, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,9 @@
+from collections.abc import Iterable
+
 from django.db import models
 from django.db.models import QuerySet, UniqueConstraint, Q
 from django.utils import timezone
-from django.shortcuts import get_object_or_404
+from django.shortcuts import get_object_or_404, aget_object_or_404
 
 
 class BaseQuerySet(QuerySet):
@@ -9,6 +11,14 @@ class BaseQuerySet(QuerySet):
         return self.filter(is_deleted=False)
 
 
+class CWQuerySet(BaseQuerySet):
+    def in_window(self: QuerySet, dimension: str, value) -> QuerySet:
+        return self.filter(**{
+            f"{dimension}_window_start__lte": value,
+            f"{dimension}_window_end__gte": value,
+        })
+
+
 class BaseModel(models.Model):
     is_deleted = models.BooleanField("Deleted", default=False)
 
@@ -39,11 +49,20 @@ class BaseModel(models.Model):
     def get_object_or_404(obj: object, **kwargs) -> object:
         return get_object_or_404(obj, is_deleted=False, **kwargs)
 
+    @staticmethod
+    async def aget_object_or_404(obj: object, **kwargs) -> object:
+        return await aget_object_or_404(obj, is_deleted=False, **kwargs)
+
 
 class Task(BaseModel):
     code = models.CharField("Task code", max_length=250)
     description = models.TextField("Description")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["code", "id"], name="task_code_id_idx")
+        ]
+
     def __str__(self):
         return self.code
 
@@ -57,7 +76,10 @@ class Task(BaseModel):
     @property
     def curr_requirements(self) -> object | None:
         try:
-            return self.requirements.latest("is_active")
+            return self.requirements.filter(is_staged=False).latest(
+                "is_active",
+                "pk"
+            )
         except Requirements.DoesNotExist:
             return None
 
@@ -93,9 +115,59 @@ class CW(BaseModel):
     adjusted_days = models.IntegerField("Adjustment mos", default=0)
     adjusted_hrs = models.FloatField("Adjustment hrs", default=0)
     adjusted_cycles = models.FloatField("Adjustment cycles", default=0)
+    mos_window_start = models.DateField(
+            "Window start mos",
+            blank=True,
+            null=True
+        )
+    mos_window_end = models.DateField("Window end mos", blank=True, null=True)
+    hrs_window_start = models.FloatField(
+            "Window start hrs",
+            blank=True,
+            null=True
+        )
+    hrs_window_end = models.FloatField("Window end hrs", blank=True, null=True)
+    afl_window_start = models.FloatField(
+            "Window start cycles",
+            blank=True,
+            null=True
+        )
+    afl_window_end = models.FloatField(
+            "Window end cycles",
+            blank=True,
+            null=True
+        )
+
+    objects = CWQuerySet.as_manager()
 
     class Meta:
         unique_together = ("task", "perform_date")
+        indexes = [
+            models.Index(
+                fields=["task", "is_deleted", "perform_date", "id"],
+                name="cw_task_live_date_idx"
+            ),
+            models.Index(
+                fields=["task", "-perform_date"],
+                name="cw_task_latest_idx"
+            ),
+            models.Index(
+                fields=["updated_at", "task"],
+                name="cw_changed_idx"
+            ),
+            models.Index(
+                fields=["mos_window_start", "mos_window_end"],
+                name="cw_mos_window_idx"
+            ),
+            models.Index(
+                fields=["hrs_window_start", "hrs_window_end"],
+                name="cw_hrs_window_idx"
+            ),
+            models.Index(
+                fields=["afl_window_start", "afl_window_end"],
+                name="cw_afl_window_idx"
+            )
+        ]
 
     def __str__(self):
         return f"CW for task: {self.task}"
@@ -179,8 +251,27 @@ class Requirements(BaseModel):
         )
 
     is_active = models.BooleanField("active_tolerance", default=False)
+    # Rows of a revision that is not active yet; hidden from every reader.
+    is_staged = models.BooleanField("Staged", default=False)
+    revision = models.ForeignKey(
+        "RequirementsRevision",
+        on_delete=models.SET_NULL,
+        related_name="requirements",
+        blank=True,
+        null=True
+    )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=["task", "-is_active", "-id"],
+                name="req_task_current_idx"
+            ),
+            models.Index(
+                fields=["updated_at", "task"],
+                name="req_changed_idx"
+            )
+        ]
         constraints = [
             UniqueConstraint(
                 fields=["task", "is_active"],
@@ -191,3 +282,116 @@ class Requirements(BaseModel):
 
     def __str__(self):
         return f"{self.task} requirements"
+
+
+class TaskDueState(models.Model):
+    class Status(models.TextChoices):
+        OK = "ok", "OK"
+        IN_WINDOW = "in_window", "In window"
+        OVERDUE = "overdue", "Overdue"
+
+    task = models.OneToOneField(
+        "Task",
+        on_delete=models.CASCADE,
+        related_name="due_state"
+    )
+    compliance = models.ForeignKey(
+        "CW",
+        on_delete=models.SET_NULL,
+        related_name="+",
+        blank=True,
+        null=True
+    )
+    next_due_date = models.DateField("Next due date", blank=True, null=True)
+    next_due_hrs = models.FloatField("Next due hours", blank=True, null=True)
+    next_due_cycles = models.FloatField(
+        "Next due cycles",
+        blank=True,
+        null=True
+    )
+    mos_neg = models.DateField("MOS window start", blank=True, null=True)
+    mos_pos = models.DateField("MOS window end", blank=True, null=True)
+    hrs_neg = models.FloatField("HRS window start", blank=True, null=True)
+    hrs_pos = models.FloatField("HRS window end", blank=True, null=True)
+    afl_neg = models.FloatField("AFL/ENC window start", blank=True, null=True)
+    afl_pos = models.FloatField("AFL/ENC window end", blank=True, null=True)
+    status = models.CharField(
+        "Status",
+        choices=Status.choices,
+        max_length=10,
+        default=Status.OK
+    )
+    status_date = models.DateField("Status as of")
+    updated_at = models.DateTimeField("Changed")
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_due_date", "task"],
+                name="due_state_date_idx"
+            ),
+            models.Index(
+                fields=["status", "next_due_date", "task"],
+                name="due_state_status_date_idx"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.task} due state"
+
+
+class RecomputeMark(models.Model):
+    name = models.CharField("Name", max_length=50, unique=True)
+    changed_until = models.DateTimeField(
+        "Inputs recomputed up to",
+        blank=True,
+        null=True
+    )
+    swept_at = models.DateTimeField("Last full sweep", blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.name} recompute mark"
+
+
+class DueStateChange(models.Model):
+    """Tasks whose due state was written, renamed or removed, in id order.
+
+    Each write appends a row per task in its own transaction, so writers do
+    not wait on each other the way a shared counter row makes them. Ids are
+    handed out at insert rather than commit, so a slow transaction can
+    commit an id below one a reader already pulled; readers re-check such
+    gaps, and old rows are pruned periodically.
+    """
+    task = models.ForeignKey(
+        "Task",
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False
+    )
+    created_at = models.DateTimeField("Created", default=timezone.now)
+
+    def __str__(self):
+        return f"{self.task_id} due state change"
+
+    @classmethod
+    def log(cls, task_ids: Iterable[int]) -> None:
+        cls.objects.bulk_create([cls(task_id=task_id) for task_id in task_ids])
+
+
+class RequirementsRevision(models.Model):
+    class Status(models.TextChoices):
+        STAGED = "staged", "Staged"
+        ACTIVE = "active", "Active"
+
+    name = models.CharField("Name", max_length=250)
+    status = models.CharField(
+        "Status",
+        choices=Status.choices,
+        max_length=10,
+        default=Status.STAGED
+    )
+    created_at = models.DateTimeField("Created", default=timezone.now)
+    activated_at = models.DateTimeField("Activated", blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.name} revision"
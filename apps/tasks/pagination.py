@@ -0,0 +1,157 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+from ninja import Field, Schema
+from ninja.errors import HttpError
+from ninja.pagination import AsyncPaginationBase
+
+
+class KeysetPagination(AsyncPaginationBase):
+    """LIMIT/OFFSET pagination with an opt-in keyset (cursor) mode.
+
+    Passing ``cursor`` (empty for the first page) switches to keyset mode:
+    rows are ordered by ``ordering`` (which must end with a unique field),
+    each page seeks past the previous one instead of skipping rows, and no
+    COUNT(*) is run. Pages carry opaque ``next``/``prev`` cursors.
+    """
+
+    class Input(Schema):
+        limit: int = Field(100, ge=1)
+        offset: int = Field(0, ge=0)
+        cursor: str | None = None
+
+    class Output(Schema):
+        items: list
+        count: int | None = None
+        next: str | None = None
+        prev: str | None = None
+
+    def __init__(
+            self,
+            ordering: tuple[str, ...] = ("pk",),
+            max_limit: int = 1000,
+            **kwargs
+            ):
+        self.ordering = ordering
+        self.max_limit = max_limit
+        super().__init__(**kwargs)
+
+    def paginate_queryset(
+            self,
+            queryset: QuerySet,
+            pagination: Input,
+            **params
+            ) -> dict:
+        limit = min(pagination.limit, self.max_limit)
+
+        if pagination.cursor is None:
+            offset = pagination.offset
+            return {
+                "items": queryset[offset:offset + limit],
+                "count": self._items_count(queryset),
+            }
+
+        values, backwards = self.parse_cursor(pagination.cursor)
+        page = self.keyset_queryset(queryset, values, backwards)[:limit + 1]
+        return self.keyset_page(list(page), limit, values, backwards)
+
+    async def apaginate_queryset(
+            self,
+            queryset: QuerySet,
+            pagination: Input,
+            **params
+            ) -> dict:
+        limit = min(pagination.limit, self.max_limit)
+
+        if pagination.cursor is None:
+            offset = pagination.offset
+            return {
+                "items": [
+                    item async for item in queryset[offset:offset + limit]
+                ],
+                "count": await self._aitems_count(queryset),
+            }
+
+        values, backwards = self.parse_cursor(pagination.cursor)
+        page = self.keyset_queryset(queryset, values, backwards)[:limit + 1]
+        return self.keyset_page(
+            [item async for item in page],
+            limit,
+            values,
+            backwards
+        )
+
+    def parse_cursor(self, cursor: str) -> tuple[list | None, bool]:
+        if not cursor:
+            return None, False
+        return self.decode_cursor(cursor)
+
+    def keyset_queryset(
+            self,
+            queryset: QuerySet,
+            values: list | None,
+            backwards: bool
+            ) -> QuerySet:
+        ordering = self.ordering
+        if backwards:
+            ordering = tuple(f"-{field}" for field in self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.seek(values, backwards))
+        return queryset
+
+    def keyset_page(
+            self,
+            items: list,
+            limit: int,
+            values: list | None,
+            backwards: bool
+            ) -> dict:
+        has_more = len(items) > limit
+        items = items[:limit]
+        if backwards:
+            items.reverse()
+
+        has_next = backwards or has_more
+        has_prev = has_more if backwards else values is not None
+
+        return {
+            "items": items,
+            "next": self.encode_cursor(items[-1], False)
+            if items and has_next else None,
+            "prev": self.encode_cursor(items[0], True)
+            if items and has_prev else None,
+        }
+
+    def seek(self, values: list, backwards: bool) -> Q:
+        lookup = "lt" if backwards else "gt"
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            equal = {
+                prev_field: values[prev_index]
+                for prev_index, prev_field in enumerate(self.ordering[:index])
+            }
+            condition |= Q(**equal, **{f"{field}__{lookup}": values[index]})
+        return condition
+
+    def encode_cursor(self, item, backwards: bool) -> str:
+        payload = {
+            "v": [getattr(item, field) for field in self.ordering],
+            "b": backwards,
+        }
+        data = json.dumps(payload, cls=DjangoJSONEncoder).encode()
+        return urlsafe_b64encode(data).decode()
+
+    def decode_cursor(self, cursor: str) -> tuple[list, bool]:
+        try:
+            payload = json.loads(urlsafe_b64decode(cursor.encode()))
+            values, backwards = payload["v"], bool(payload["b"])
+        except (DecodeError, ValueError, TypeError, KeyError):
+            raise HttpError(400, "Invalid cursor")
+
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise HttpError(400, "Invalid cursor")
+        return values, backwards
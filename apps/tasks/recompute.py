@@ -0,0 +1,213 @@
+import datetime
+from collections import defaultdict
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Task, CW, Requirements, TaskDueState
+from .interval_maths import (
+    WINDOW_FIELDS,
+    has_due_limits,
+    needs_prev_cw,
+    set_next_due,
+    set_windows
+)
+from .due_state import build_due_states, save_due_states
+from .response_cache import bump_versions
+from .loaders import (
+    chunked,
+    load_requirements,
+    load_latest_cws,
+    load_prev_cws
+)
+
+
+CHUNK_SIZE = 2000
+NEXT_DUE_FIELDS = ("next_due_date", "next_due_hrs", "next_due_cycles")
+CW_FIELDS = (*NEXT_DUE_FIELDS, *WINDOW_FIELDS)
+
+
+def save_cws(cws: list[CW], fields: tuple[str, ...]) -> None:
+    # One UPDATE per distinct set of values: CWs on the same schedule share
+    # them, and a CW deleted meanwhile is not written back the way an
+    # upsert would. bulk_update builds a CASE per field and row, which took
+    # most of a recompute with the window fields.
+    groups = defaultdict(list)
+    for cw in cws:
+        groups[tuple(getattr(cw, field) for field in fields)].append(cw.pk)
+
+    with transaction.atomic(savepoint=False):
+        for group, pks in groups.items():
+            for chunk in chunked(pks, CHUNK_SIZE):
+                CW.objects.filter(pk__in=chunk).update(
+                    **dict(zip(fields, group))
+                )
+
+
+def compute_chunk(
+        task_ids: list[int]
+        ) -> tuple[list[CW], list[TaskDueState]]:
+    """Changed latest CWs and fresh due states of a chunk, unsaved."""
+    requirements = load_requirements(task_ids)
+    latest_cws = load_latest_cws(task_ids)
+
+    pending = {
+        task_id: (requirements[task_id], cw)
+        for task_id, cw in latest_cws.items()
+        if has_due_limits(requirements.get(task_id))
+    }
+    prev_cws = load_prev_cws([
+        task_id
+        for task_id, (req, cw) in pending.items()
+        if needs_prev_cw(req, cw)
+    ])
+
+    changed = []
+    for task_id, cw in latest_cws.items():
+        req = requirements.get(task_id)
+        before = [getattr(cw, field) for field in CW_FIELDS]
+        if task_id in pending:
+            set_next_due(req, cw, prev_cws.get(task_id))
+        set_windows(req, cw)
+        if before != [getattr(cw, field) for field in CW_FIELDS]:
+            changed.append(cw)
+
+    return changed, build_due_states(
+        task_ids,
+        requirements,
+        latest_cws,
+        prev_cws
+    )
+
+
+def save_chunk(changed: list[CW], states: list[TaskDueState]) -> int:
+    save_cws(changed, CW_FIELDS)
+    if changed:
+        bump_versions({cw.task_id for cw in changed})
+    save_due_states(states)
+    return len(changed)
+
+
+def recompute_chunk(task_ids: list[int]) -> int:
+    return save_chunk(*compute_chunk(task_ids))
+
+
+def refresh_windows(task_ids: Iterable[int]) -> int:
+    """Recompute the windows stored on the latest CW of each task.
+
+    Next due values are left to the recompute that follows.
+    """
+    changed = []
+    for chunk in chunked(task_ids, CHUNK_SIZE):
+        requirements = load_requirements(chunk)
+        for task_id, cw in load_latest_cws(chunk).items():
+            before = [getattr(cw, field) for field in WINDOW_FIELDS]
+            set_windows(requirements.get(task_id), cw)
+            if before != [getattr(cw, field) for field in WINDOW_FIELDS]:
+                changed.append(cw)
+
+    save_cws(changed, WINDOW_FIELDS)
+    return len(changed)
+
+
+def recompute_next_due(
+        task_ids: Iterable[int] | None = None,
+        chunk_size: int = CHUNK_SIZE
+        ) -> tuple[int, int]:
+    if task_ids is None:
+        task_ids = list(
+            Task.objects.active().order_by("pk").values_list("pk", flat=True)
+        )
+
+    processed = updated = 0
+    for chunk in chunked(task_ids, chunk_size):
+        updated += recompute_chunk(chunk)
+        processed += len(chunk)
+
+    return processed, updated
+
+
+def pk_ranges(chunk_size: int = CHUNK_SIZE) -> list[tuple[int, int]]:
+    pks = list(
+        Task.objects.active().order_by("pk").values_list("pk", flat=True)
+    )
+    return [
+        (chunk[0], chunk[-1])
+        for chunk in chunked(pks, chunk_size)
+    ]
+
+
+def range_task_ids(first_pk: int, last_pk: int) -> list[int]:
+    return list(
+        Task.objects.active().filter(
+            pk__gte=first_pk,
+            pk__lte=last_pk
+        ).order_by("pk").values_list("pk", flat=True)
+    )
+
+
+def recompute_range(
+        first_pk: int,
+        last_pk: int,
+        chunk_size: int = CHUNK_SIZE
+        ) -> tuple[int, int]:
+    return recompute_next_due(range_task_ids(first_pk, last_pk), chunk_size)
+
+
+def settled(
+        latest: datetime.datetime | None,
+        since: datetime.datetime | None = None
+        ) -> datetime.datetime | None:
+    """``latest`` held back to rows old enough to be committed.
+
+    ``updated_at`` is stamped before commit, so a slow transaction can land
+    a row behind a mark another run already took. The mark stays
+    ``TASKS_RECOMPUTE_OVERLAP`` seconds behind now and those rows are read
+    again by the next run; it never moves back behind ``since``.
+    """
+    horizon = timezone.now() - datetime.timedelta(
+        seconds=settings.TASKS_RECOMPUTE_OVERLAP
+    )
+    if latest is not None and latest > horizon:
+        latest = horizon
+    if since is not None and (latest is None or latest < since):
+        return since
+    return latest
+
+
+def changed_tasks(
+        since: datetime.datetime | None
+        ) -> tuple[list[int], datetime.datetime | None]:
+    """Active tasks whose CWs or requirements changed after ``since``.
+
+    Also returns the next high-water mark, the newest ``updated_at`` seen
+    held back by ``settled``.
+    """
+    task_ids = set()
+    until = since
+    for model in (CW, Requirements):
+        rows = model.objects.all()
+        if since is not None:
+            rows = rows.filter(updated_at__gt=since)
+        for task_id, updated_at in rows.values_list("task_id", "updated_at"):
+            task_ids.add(task_id)
+            if until is None or updated_at > until:
+                until = updated_at
+
+    active = []
+    for chunk in chunked(sorted(task_ids), CHUNK_SIZE):
+        active.extend(Task.objects.active().filter(
+            pk__in=chunk
+        ).order_by("pk").values_list("pk", flat=True))
+    return active, settled(until, since)
+
+
+def latest_change() -> datetime.datetime | None:
+    changes = [
+        model.objects.aggregate(latest=Max("updated_at"))["latest"]
+        for model in (CW, Requirements)
+    ]
+    return settled(max(filter(None, changes), default=None))
@@ -0,0 +1,131 @@
+import threading
+import time
+from hashlib import md5
+from urllib.parse import urlencode
+from collections import Counter
+from collections.abc import Callable, Iterable
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpRequest, HttpResponse
+
+
+GLOBAL_VERSION_KEY = "tasks:version"
+TASK_VERSION_KEY = "tasks:version:{}"
+RESPONSE_KEY = "tasks:response:{}:{}"
+PER_PROCESS_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+lock = threading.Lock()
+counters = Counter()
+
+
+def count(name: str, value: int = 1) -> None:
+    with lock:
+        counters[name] += value
+
+
+def get_cache() -> BaseCache | None:
+    if not settings.TASKS_RESPONSE_CACHE:
+        return None
+    return caches[settings.TASKS_RESPONSE_CACHE]
+
+
+def check_shared_cache(setting: str = "TASKS_RESPONSE_CACHE") -> None:
+    # A per-process cache never sees what Celery workers or the other web
+    # processes write: version bumps for responses, counters for metrics.
+    alias = getattr(settings, setting)
+    if alias and settings.CACHES[alias]["BACKEND"] in PER_PROCESS_BACKENDS:
+        raise ImproperlyConfigured(
+            f"{setting} '{alias}' is not shared between processes; "
+            "use a redis or memcached backend"
+        )
+
+
+def new_version() -> int:
+    # Versions restart from the clock, so an evicted counter never comes
+    # back with a value an older cached response was stored under.
+    return time.time_ns()
+
+
+def bump_versions(task_ids: Iterable[int] = ()) -> None:
+    cache = get_cache()
+    if cache is None:
+        return
+
+    keys = [
+        GLOBAL_VERSION_KEY,
+        *(TASK_VERSION_KEY.format(pk) for pk in set(task_ids))
+    ]
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, new_version(), timeout=None)
+    count("bumps", len(keys))
+
+
+def version_key(task_id: str | None) -> str:
+    if task_id is None:
+        return GLOBAL_VERSION_KEY
+    return TASK_VERSION_KEY.format(task_id)
+
+
+def response_key(request: HttpRequest, version: int) -> str:
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    digest = md5(f"{request.path}?{query}".encode()).hexdigest()
+    return RESPONSE_KEY.format(version, digest)
+
+
+def cached_response(view: Callable) -> Callable:
+    """Caches successful GET responses of an async view by data version.
+
+    Views with a ``task_id`` path parameter follow that task's version,
+    the rest follow the global one; ``bump_versions`` moves both.
+    """
+
+    @wraps(view)
+    async def wrapper(request: HttpRequest, *args, **kwargs):
+        cache = get_cache()
+        if cache is None or request.method != "GET":
+            return await view(request, *args, **kwargs)
+
+        scope = version_key(kwargs.get("task_id"))
+        version = await cache.aget(scope)
+        if version is None:
+            version = new_version()
+            await cache.aset(scope, version, timeout=None)
+        key = response_key(request, version)
+
+        cached = await cache.aget(key)
+        if cached:
+            count("hits")
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        count("misses")
+        response = await view(request, *args, **kwargs)
+        if response.status_code == 200:
+            await cache.aset(
+                key,
+                (response.content, response["Content-Type"])
+            )
+        return response
+
+    return wrapper
+
+
+def get_cache_stats() -> dict:
+    with lock:
+        hits, misses = counters["hits"], counters["misses"]
+        bumps = counters["bumps"]
+    return {
+        "hits": hits,
+        "misses": misses,
+        "bumps": bumps,
+        "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+    }
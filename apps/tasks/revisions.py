@@ -0,0 +1,120 @@
+"""Maintenance program revisions loaded and activated as a whole.
+
+A revision is first staged as inactive Requirements rows that no reader
+sees. Activation then switches every task of the revision over in one
+transaction with two set-based UPDATEs, so readers see either the old
+active set or the new one and no task is left without active requirements.
+"""
+from time import perf_counter
+from collections.abc import Iterable
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+
+from .models import Task, CW, Requirements, RequirementsRevision
+from .loaders import chunked
+from .importer import clean_row
+from .dispatch import enqueue_recompute
+from .response_cache import bump_versions
+
+
+CHUNK_SIZE = 2000
+
+
+def load_task_pks(codes: list[str]) -> dict[str, int]:
+    # Same pick as the program importer when a code is duplicated.
+    tasks = {}
+    for chunk in chunked(codes, CHUNK_SIZE):
+        for pk, code in Task.objects.active().filter(
+                code__in=chunk
+                ).order_by("-pk").values_list("pk", "code"):
+            tasks[code] = pk
+    return tasks
+
+
+def revision_stats(revision: RequirementsRevision, started: float) -> dict:
+    return {
+        "pk": revision.pk,
+        "name": revision.name,
+        "status": revision.status,
+        "requirements": revision.requirements.count(),
+        "created_at": revision.created_at,
+        "activated_at": revision.activated_at,
+        "elapsed": round(perf_counter() - started, 3),
+    }
+
+
+def stage_revision(rows: Iterable[dict], name: str) -> dict:
+    started = perf_counter()
+    # A later row for the same code replaces the earlier one.
+    staged = {}
+    for line_no, row in enumerate(rows, start=1):
+        row = clean_row(row, line_no)
+        staged[row["code"]] = row["requirements"]
+    if not staged:
+        raise ValidationError("Revision has no rows")
+
+    tasks = load_task_pks(list(staged))
+    missing = [code for code in staged if code not in tasks]
+    if missing:
+        raise ValidationError(f"No such Task: {', '.join(missing[:10])}")
+
+    with transaction.atomic():
+        revision = RequirementsRevision.objects.create(name=name)
+        Requirements.objects.bulk_create(
+            [
+                Requirements(
+                    task_id=tasks[code],
+                    revision=revision,
+                    is_active=False,
+                    is_staged=True,
+                    **{
+                        field: value
+                        for field, value in requirements.items()
+                        if value is not None
+                    }
+                )
+                for code, requirements in staged.items()
+            ],
+            batch_size=CHUNK_SIZE
+        )
+
+    return revision_stats(revision, started)
+
+
+def activate_revision(revision_pk: int) -> dict:
+    started = perf_counter()
+    staged = Requirements.objects.filter(revision_id=revision_pk)
+
+    with transaction.atomic():
+        revision = get_object_or_404(
+            RequirementsRevision.objects.select_for_update(),
+            pk=revision_pk
+        )
+        if revision.status != RequirementsRevision.Status.STAGED:
+            raise ValidationError(f"Revision {revision.pk} is already active")
+
+        # Deactivate first: the partial unique constraint allows a single
+        # active row per task at any point of the transaction.
+        now = timezone.now()
+        Requirements.objects.filter(
+            is_active=True,
+            task_id__in=staged.values("task_id")
+        ).update(is_active=False, updated_at=now)
+        staged.update(is_active=True, is_staged=False, updated_at=now)
+
+        revision.status = RequirementsRevision.Status.ACTIVE
+        revision.activated_at = now
+        revision.save()
+
+    bump_versions(staged.values_list("task_id", flat=True))
+    # Tasks without CWs have nothing to recompute; one id per task however
+    # many CWs it has.
+    enqueue_recompute(Task.objects.filter(
+        Exists(CW.objects.filter(task=OuterRef("pk"))),
+        pk__in=staged.values("task_id")
+    ).values_list("pk", flat=True))
+    return revision_stats(revision, started)
@@ -1,21 +1,44 @@
-from datetime import date
+from datetime import date, datetime
 from ninja import Schema
 
 from .models import Task
 
 
+def latest_cw_value(obj: Task, field: str):
+    # services.with_next_due annotates list querysets; plain instances
+    # fall back to a single compliance lookup shared by all fields. Async
+    # views must pass annotated rows: the fallback query is sync-only.
+    if hasattr(obj, field):
+        return getattr(obj, field)
+
+    if not hasattr(obj, "_latest_cw"):
+        obj._latest_cw = obj.compliance
+
+    if obj._latest_cw:
+        return getattr(obj._latest_cw, field)
+    return
+
+
 class TaskOut(Schema):
     pk: int
     code: str
     description: str
     due_months: int | None = None
     next_due_date: date | None = None
+    next_due_hrs: float | None = None
+    next_due_cycles: float | None = None
 
     @staticmethod
     def resolve_next_due_date(obj: Task) -> date | None:
-        if obj.compliance:
-            return obj.compliance.next_due_date
-        return
+        return latest_cw_value(obj, "next_due_date")
+
+    @staticmethod
+    def resolve_next_due_hrs(obj: Task) -> float | None:
+        return latest_cw_value(obj, "next_due_hrs")
+
+    @staticmethod
+    def resolve_next_due_cycles(obj: Task) -> float | None:
+        return latest_cw_value(obj, "next_due_cycles")
 
 
 class TaskIn(Schema):
@@ -44,6 +67,20 @@ class ComplianceIn(Schema):
     next_due_cycles: float | None = None
 
 
+class BulkComplianceIn(Schema):
+    task_id: int
+    perform_date: date
+    perform_hours: float | None = None
+    perform_cycles: float | None = None
+
+
+class BulkComplianceOut(Schema):
+    index: int
+    task_id: int
+    pk: int | None = None
+    error: str | None = None
+
+
 class ReqIn(Schema):
     task: TaskOut | None = None
     mos_unit: str | None = None
@@ -79,5 +116,94 @@ class ReqOut(Schema):
     is_active: bool
 
 
+class TaskDueStateOut(Schema):
+    task: TaskOut
+    compliance_id: int | None = None
+    next_due_date: date | None = None
+    next_due_hrs: float | None = None
+    next_due_cycles: float | None = None
+    mos_neg: date | None = None
+    mos_pos: date | None = None
+    hrs_neg: float | None = None
+    hrs_pos: float | None = None
+    afl_neg: float | None = None
+    afl_pos: float | None = None
+    status: str
+    status_date: date
+
+
+class ForecastOut(Schema):
+    task_id: int
+    code: str
+    projected_due_date: date
+    due_by: str
+    next_due_date: date | None = None
+    next_due_hrs: float | None = None
+    next_due_cycles: float | None = None
+
+
+class FleetDueOut(Schema):
+    task_id: int
+    code: str
+    next_due_date: date | None = None
+    next_due_hrs: float | None = None
+    next_due_cycles: float | None = None
+    mos_neg: date | None = None
+    mos_pos: date | None = None
+    hrs_neg: float | None = None
+    hrs_pos: float | None = None
+    afl_neg: float | None = None
+    afl_pos: float | None = None
+
+
+class ImportOut(Schema):
+    rows: int
+    tasks_created: int
+    tasks_updated: int
+    requirements_created: int
+    tasks_recomputed: int
+    elapsed: float
+    rows_per_sec: int
+
+
+class RevisionOut(Schema):
+    pk: int
+    name: str
+    status: str
+    requirements: int
+    created_at: datetime
+    activated_at: datetime | None = None
+    elapsed: float
+
+
+class DispatchStatsOut(Schema):
+    requested: int
+    sent: int
+    saved: int
+    duplicates: int
+    tasks_sent: int
+    pending: int
+
+
+class CacheStatsOut(Schema):
+    hits: int
+    misses: int
+    bumps: int
+    hit_ratio: float
+
+
+class QueryStatsOut(Schema):
+    endpoint: str
+    requests: int
+    queries: int
+    avg_queries: float
+    max_queries: int
+    db_ms: float
+    avg_db_ms: float
+    max_db_ms: float
+    slowest_ms: float
+    slowest_sql: str | None = None
+
+
 class Error(Schema):
     message: str
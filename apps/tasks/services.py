@@ -1,25 +1,60 @@
-from datetime import date
+from datetime import date, timedelta
 
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.shortcuts import get_object_or_404, aget_object_or_404
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from django.db.models import QuerySet
+from django.db import transaction
+from django.db.models import (
+    QuerySet,
+    OuterRef,
+    Subquery,
+    Prefetch,
+    Exists
+)
 
-from .models import Task, CW, BaseModel, Requirements
+from .models import (
+    Task,
+    CW,
+    BaseModel,
+    Requirements,
+    TaskDueState,
+    DueStateChange
+)
 from .schemas import ReqIn
-from .tasks import update_next_due_date
+from .context import TaskContext
+from .dispatch import dispatcher, mark_dirty, enqueue_recompute
+from .response_cache import bump_versions, get_cache_stats
+from .middleware import get_query_stats
+from .celery_metrics import render_metrics
+from .snapshot import (
+    SnapshotRows,
+    ForecastRows,
+    query_fleet,
+    query_windows,
+    query_forecast
+)
+from .due_state import refresh_due_states, refresh_task_due_state
+from .recompute import refresh_windows
+from .importer import guess_format, iter_rows, import_program
+from .revisions import stage_revision, activate_revision
+from .exporter import export_rows, CONTENT_TYPES as EXPORT_CONTENT_TYPES
 from .interval_maths import (
     check_adjustment,
     count_mos_adjustment,
     count_hrs_adjustment,
     count_afl_adjustment,
-    get_mos_span,
-    get_hrs_span,
-    get_afl_span
+    get_spans,
+    has_due_limits,
+    set_next_due,
+    set_windows
 )
 
 
-def validate_cw_perf_date(task: Task, perform_date: date) -> None:
+def validate_cw_perf_date(
+        task: Task | TaskContext,
+        perform_date: date
+        ) -> None:
     if perform_date > timezone.now().date():
         raise ValidationError(
             f"{perform_date} is in the future"
@@ -37,14 +72,25 @@ def validate_task_exists(task_pk: int) -> bool:
         )
 
 
-def get_task_requirements(task_pk: int, payload: dict) -> dict:
-    task = BaseModel.get_object_or_404(Task, pk=task_pk)
+async def avalidate_task_exists(task_pk: int) -> None:
+    if not await Task.objects.active().filter(pk=task_pk).aexists():
+        raise ValidationError(
+            "No such Task"
+        )
+
+
+def get_task_requirements(
+        task: Task | TaskContext,
+        payload: dict
+        ) -> dict:
     active_req = task.curr_requirements
+    spans = get_spans(task)
 
     req = {}
 
     if active_req.mos_unit != "E":
-        tol_neg_mos, tol_pos_mos = get_mos_span(task)
+        tol_neg_mos = spans.get('mos_neg')
+        tol_pos_mos = spans.get('mos_pos')
         if not tol_neg_mos and tol_pos_mos:
             tol_neg_mos = payload['perform_date']
         if not tol_pos_mos and tol_neg_mos:
@@ -54,17 +100,19 @@ def get_task_requirements(task_pk: int, payload: dict) -> dict:
         req['mos_neg'] = tol_neg_mos
 
     if active_req.hrs_unit != "E":
-        tol_neg_hrs, tol_pos_hrs = get_hrs_span(task)
+        tol_neg_hrs = spans.get('hrs_neg')
+        tol_pos_hrs = spans.get('hrs_pos')
         if not tol_neg_hrs and tol_pos_hrs:
-            tol_neg_mos = payload['perform_hours']
+            tol_neg_hrs = payload['perform_hours']
         if not tol_pos_hrs and tol_neg_hrs:
-            tol_pos_mos = payload['perform_hours']
+            tol_pos_hrs = payload['perform_hours']
 
         req['hrs_pos'] = tol_pos_hrs
         req['hrs_neg'] = tol_neg_hrs
 
-    if active_req.afl_unit != "Empty":
-        tol_neg_afl, tol_pos_afl = get_afl_span(task)
+    if active_req.afl_unit != "E":
+        tol_neg_afl = spans.get('afl_neg')
+        tol_pos_afl = spans.get('afl_pos')
         if not tol_neg_afl and tol_pos_afl:
             tol_neg_afl = payload['perform_cycles']
         if not tol_pos_afl and tol_neg_afl:
@@ -73,15 +121,37 @@ def get_task_requirements(task_pk: int, payload: dict) -> dict:
         req['afl_pos'] = tol_pos_afl
         req['afl_neg'] = tol_neg_afl
 
-        return req
+    return req
+
+
+def with_next_due(tasks: QuerySet) -> QuerySet:
+    latest_cw = CW.objects.filter(
+        task=OuterRef("pk")
+    ).order_by("-perform_date")
+
+    return tasks.annotate(**{
+        field: Subquery(latest_cw.values(field)[:1])
+        for field in ("next_due_date", "next_due_hrs", "next_due_cycles")
+    })
 
 
 def get_tasks() -> QuerySet:
-    return Task.objects.active().order_by("code", "description")
+    return with_next_due(Task.objects.active()).order_by("code", "pk")
 
 
 def get_task(task_pk: int) -> Task | None:
-    return get_object_or_404(Task, pk=task_pk)
+    return get_object_or_404(with_next_due(Task.objects.all()), pk=task_pk)
+
+
+async def aget_task(task_pk: int) -> Task:
+    return await aget_object_or_404(
+        with_next_due(Task.objects.all()),
+        pk=task_pk
+    )
+
+
+def prefetch_task() -> Prefetch:
+    return Prefetch("task", queryset=with_next_due(Task.objects.all()))
 
 
 def create_tasks(payload: list[dict]) -> list[Task]:
@@ -91,6 +161,7 @@ def create_tasks(payload: list[dict]) -> list[Task]:
             for fields in payload
         ]
     )
+    bump_versions()
     return new_objs
 
 
@@ -100,9 +171,13 @@ def update_tasks(task_pk: int, payload: dict) -> Task:
     for key, value in payload.items():
         setattr(update_obj, key, value)
 
-    update_obj.save()
+    with transaction.atomic():
+        update_obj.save()
+        # Renames reach the fleet snapshot through the change log.
+        DueStateChange.log([task_pk])
 
-    update_next_due_date.delay(task_pk)
+    bump_versions([task_pk])
+    mark_dirty([task_pk])
 
     return update_obj
 
@@ -113,60 +188,160 @@ def delete_task(task_pk: int) -> dict:
         task_cws = CW.objects.filter(task=task)
     task.delete()
     task_cws.delete()
+    refresh_due_states([task.pk])
+    bump_versions([task.pk])
 
 
-def create_cw(task_pk: int, payload: dict) -> CW:
-    task = BaseModel.get_object_or_404(Task, pk=task_pk)
-    active_req = task.curr_requirements
+def in_window(low, value, high) -> bool:
+    # A missing counter or window bound is never inside the window.
+    if low is None or value is None or high is None:
+        return False
+    return low <= value <= high
+
+
+def count_adjustments(ctx: TaskContext, payload: dict) -> dict:
+    active_req = ctx.curr_requirements
+    adj = {}
+
+    if check_adjustment(ctx, payload):
+        req = get_task_requirements(ctx, payload)
+        if active_req.mos_unit != 'E' and in_window(
+                req['mos_neg'],
+                payload.get('perform_date'),
+                req['mos_pos']
+                ):
+            adj["adjusted_days"] = count_mos_adjustment(ctx, payload)
+
+        if active_req.hrs_unit != 'E' and in_window(
+                req['hrs_neg'],
+                payload.get('perform_hours'),
+                req['hrs_pos']
+                ):
+            adj["adjusted_hrs"] = count_hrs_adjustment(ctx, payload)
 
-    validate_cw_perf_date(task, payload['perform_date'])
+        if active_req.afl_unit != 'E' and in_window(
+                req['afl_neg'],
+                payload.get('perform_cycles'),
+                req['afl_pos']
+                ):
+            adj["adjusted_cycles"] = count_afl_adjustment(ctx, payload)
 
-    if check_adjustment(task, payload):
-        req = get_task_requirements(task_pk, payload)
-        adj = {}
-        if active_req.mos_unit != 'E' and (req['mos_neg'] <= payload['perform_date'] <= req['mos_pos']):
-            adj["adjusted_days"] = count_mos_adjustment(task, payload)
+    return adj
 
-        if active_req.hrs_unit != 'E' and (req['hrs_neg'] <= payload['perform_hours'] <= req['hrs_pos']):
-            adj["adjusted_hrs"] = count_hrs_adjustment(task, payload)
 
-        if active_req.afl_unit != 'E' and (req['afl_neg'] <= payload['perform_cycles'] <= req['afl_pos']):
-            adj["adjusted_cycles"] = count_afl_adjustment(task, payload)
+def create_cw(task_pk: int, payload: dict) -> CW:
+    ctx = TaskContext.load(task_pk)
 
-        payload.update(adj)
+    validate_cw_perf_date(ctx, payload['perform_date'])
 
-    payload.update(task=task)
+    payload.update(count_adjustments(ctx, payload))
+    payload.update(task=ctx.task)
     cw = CW.objects.create(**payload)
-    cw.save()
 
-    update_next_due_date.delay(task_pk)
+    ctx.push(cw)
+    refresh_task_due_state(ctx)
+    bump_versions([task_pk])
+    mark_dirty([task_pk])
 
     return cw
 
 
-def get_cws(task_pk: int) -> QuerySet:
-    task = BaseModel.get_object_or_404(Task, pk=task_pk)
+def create_cws_bulk(items: list[dict]) -> list[dict]:
+    contexts = TaskContext.load_many({item["task_id"] for item in items})
+    results = [
+        {"index": index, "task_id": item["task_id"], "pk": None, "error": None}
+        for index, item in enumerate(items)
+    ]
+    new_cws = []
+
+    # Same task items are checked in perform date order, each one against
+    # the CW accepted right before it.
+    order = sorted(range(len(items)), key=lambda index: (
+        items[index]["task_id"],
+        items[index]["perform_date"]
+    ))
+    for index in order:
+        payload = dict(items[index])
+        ctx = contexts.get(payload.pop("task_id"))
+        if not ctx:
+            results[index]["error"] = "No such Task"
+            continue
+
+        try:
+            validate_cw_perf_date(ctx, payload["perform_date"])
+            payload.update(count_adjustments(ctx, payload))
+        except ValidationError as err:
+            results[index]["error"] = err.message
+            continue
+
+        cw = CW(task=ctx.task, **payload)
+        if has_due_limits(ctx.curr_requirements):
+            prev_cw = ctx.compliance
+            if prev_cw and prev_cw.is_deleted:
+                prev_cw = None
+            set_next_due(ctx.curr_requirements, cw, prev_cw)
+            set_windows(ctx.curr_requirements, cw)
+
+        ctx.push(cw)
+        new_cws.append((index, cw))
+
+    with transaction.atomic():
+        CW.objects.bulk_create([cw for _, cw in new_cws])
+
+    for index, cw in new_cws:
+        results[index]["pk"] = cw.pk
+
+    affected = sorted({cw.task_id for _, cw in new_cws})
+    if affected:
+        refresh_due_states(affected)
+        bump_versions(affected)
+        mark_dirty(affected)
+
+    return results
+
+
+def task_cws(task_pk: int) -> QuerySet:
     return CW.objects.filter(
-            task=task.pk,
+            task=task_pk,
             is_deleted=False
-        ).order_by("perform_date")
+        ).prefetch_related(prefetch_task()).order_by("perform_date")
+
+
+def get_cws(task_pk: int) -> QuerySet:
+    task = BaseModel.get_object_or_404(Task, pk=task_pk)
+    return task_cws(task.pk)
+
+
+async def aget_cws(task_pk: int) -> QuerySet:
+    task = await BaseModel.aget_object_or_404(Task, pk=task_pk)
+    return task_cws(task.pk)
 
 
 def delete_cw(cw_pk: int) -> None:
     cw = BaseModel.get_object_or_404(CW, pk=cw_pk)
     cw.delete()
+    refresh_due_states([cw.task_id])
+    bump_versions([cw.task_id])
 
 
 def update_cw(cw_pk: int, payload: dict) -> CW:
-    cw = BaseModel.get_object_or_404(CW, pk=cw_pk)
+    cw = BaseModel.get_object_or_404(
+        CW.objects.select_related("task"),
+        pk=cw_pk
+    )
 
-    validate_cw_perf_date(cw.task, payload['perform_date'])
+    validate_cw_perf_date(
+        TaskContext.for_task(cw.task),
+        payload['perform_date']
+    )
 
     cw.perform_date = payload['perform_date']
 
     cw.save()
 
-    update_next_due_date.delay(cw.task.pk)
+    refresh_due_states([cw.task_id])
+    bump_versions([cw.task_id])
+    mark_dirty([cw.task_id])
 
     return cw
 
@@ -199,13 +374,28 @@ def create_requirements(task_id: int, payload: ReqIn) -> Requirements:
     )
 
     req.save()
+    refresh_windows([task.pk])
+    refresh_due_states([task.pk])
+    bump_versions([task.pk])
+    enqueue_recompute([task.pk])
     return req
 
 
+def task_reqs(task_id: int) -> QuerySet:
+    return Requirements.objects.active().filter(
+        task__pk=task_id,
+        is_staged=False
+    ).prefetch_related(prefetch_task())
+
+
 def get_task_reqs(task_id) -> list[Requirements]:
     validate_task_exists(task_id)
-    reqs = Requirements.objects.active().filter(task__pk=task_id)
-    return reqs
+    return task_reqs(task_id)
+
+
+async def aget_task_reqs(task_id: int) -> list[Requirements]:
+    await avalidate_task_exists(task_id)
+    return [req async for req in task_reqs(task_id)]
 
 
 def update_requirements(task_id, req_id, payload):
@@ -242,9 +432,104 @@ def update_requirements(task_id, req_id, payload):
         req.is_active = payload.is_active
 
     req.save()
+    refresh_windows({int(task_id), req.task_id})
+    refresh_due_states({int(task_id), req.task_id})
+    bump_versions({int(task_id), req.task_id})
+    enqueue_recompute({int(task_id), req.task_id})
     return req
 
 
 def delete_requirements(req_id):
     req = BaseModel.get_object_or_404(Requirements, pk=req_id)
     req.delete()
+    refresh_windows([req.task_id])
+    refresh_due_states([req.task_id])
+    bump_versions([req.task_id])
+    enqueue_recompute([req.task_id])
+
+
+def get_dispatch_stats() -> dict:
+    return dispatcher.stats()
+
+
+def get_cws_in_window(dimension: str, value: date | float) -> QuerySet:
+    """Latest live CW of every active task whose window contains value."""
+    later_cws = CW.objects.active().filter(
+        task=OuterRef("task"),
+        perform_date__gt=OuterRef("perform_date")
+    )
+    return CW.objects.active().in_window(dimension, value).filter(
+        ~Exists(later_cws),
+        task__is_deleted=False
+    ).select_related("task").order_by("task_id")
+
+
+def get_due_states(status: str | None = None) -> QuerySet:
+    states = TaskDueState.objects.prefetch_related(prefetch_task()).filter(
+        task__is_deleted=False
+    )
+    if status:
+        states = states.filter(status=status)
+    return states.order_by("next_due_date", "task_id")
+
+
+def get_fleet_due(
+        status: str | None = None,
+        before: date | None = None
+        ) -> SnapshotRows:
+    return query_fleet(status, before)
+
+
+def parse_window_value(dimension: str, value: str) -> date | float:
+    try:
+        if dimension == "mos":
+            return date.fromisoformat(value)
+        return float(value)
+    except ValueError:
+        raise ValidationError(f"Invalid {dimension} value {value}")
+
+
+def get_windows(
+        dimension: str,
+        at: str | None = None,
+        start: str | None = None,
+        end: str | None = None
+        ) -> SnapshotRows:
+    if at is not None:
+        return query_windows(dimension, parse_window_value(dimension, at))
+    if start is None or end is None:
+        raise ValidationError("Pass either at or both start and end")
+
+    low = parse_window_value(dimension, start)
+    high = parse_window_value(dimension, end)
+    if low > high:
+        raise ValidationError("start must not be after end")
+    return query_windows(dimension, low, high)
+
+
+def get_forecast(
+        horizon: int,
+        hours_per_day: float | None = None,
+        cycles_per_day: float | None = None
+        ) -> ForecastRows:
+    if hours_per_day is None:
+        hours_per_day = settings.TASKS_DAILY_HOURS
+    if cycles_per_day is None:
+        cycles_per_day = settings.TASKS_DAILY_CYCLES
+
+    until = timezone.now().date() + timedelta(days=horizon)
+    return query_forecast(until, hours_per_day, cycles_per_day)
+
+
+def import_program_file(stream, name: str, fmt: str | None = None) -> dict:
+    return import_program(iter_rows(stream, fmt or guess_format(name)))
+
+
+def stage_revision_file(
+        stream,
+        name: str,
+        revision_name: str,
+        fmt: str | None = None
+        ) -> dict:
+    rows = iter_rows(stream, fmt or guess_format(name))
+    return stage_revision(rows, revision_name)
@@ -0,0 +1,428 @@
+"""In-process snapshot of the due state of every active task.
+
+Built from ``TaskDueState``, which every CW/Requirements write refreshes.
+Like interval_arrays, the snapshot is a dict of equally long NumPy columns,
+here sorted by task pk: dates are ``datetime64[D]`` with NaT for missing
+values, numbers are ``float64`` with NaN, codes are Python strings. After
+the first load only tasks logged in ``DueStateChange`` since the highest
+change id seen are pulled, so status queries are vectorized filters instead
+of ORM lookups. A periodic full reload bounds anything written around the
+log (queryset updates, raw SQL).
+"""
+import datetime
+import sys
+import threading
+from collections.abc import Sequence
+from time import monotonic
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import TaskDueState, DueStateChange
+from .loaders import chunked
+from .interval_index import IntervalIndex, as_number
+from .interval_arrays import project_due_dates
+
+
+NAT = np.datetime64("NaT", "D")
+CHUNK_SIZE = 5000
+# Change ids this far below the newest one seen are still re-checked, in
+# case the transaction that took them commits late.
+GAP_WINDOW = 5000
+
+DATE_FIELDS = ("next_due_date", "mos_neg", "mos_pos", "perform_date")
+NEXT_DUE_FIELDS = ("next_due_date", "next_due_hrs", "next_due_cycles")
+STATE_FIELDS = (
+    "next_due_date",
+    "next_due_hrs",
+    "next_due_cycles",
+    "mos_neg",
+    "mos_pos",
+    "hrs_neg",
+    "hrs_pos",
+    "afl_neg",
+    "afl_pos",
+)
+# Latest CW counters the forecast projects hours and cycles limits from.
+PERFORMED_FIELDS = ("perform_date", "perform_hours", "perform_cycles")
+LOADED_FIELDS = (
+    *STATE_FIELDS,
+    *(f"compliance__{field}" for field in PERFORMED_FIELDS)
+)
+FORECAST_LIMITS = ("date", "hours", "cycles")
+# Status window as in due_state.cnt_status, precomputed per task so status
+# filters are a single comparison.
+WINDOW_COLUMNS = ("window_start", "window_end")
+COLUMNS = (
+    "task_id",
+    "code",
+    *STATE_FIELDS,
+    *PERFORMED_FIELDS,
+    *WINDOW_COLUMNS
+)
+
+
+def empty_column(name: str, size: int = 0) -> np.ndarray:
+    if name == "task_id":
+        return np.zeros(size, dtype=np.int64)
+    if name == "code":
+        return np.empty(size, dtype=object)
+    if name in DATE_FIELDS or name in WINDOW_COLUMNS:
+        return np.full(size, NAT)
+    return np.full(size, np.nan)
+
+
+def empty_columns() -> dict[str, np.ndarray]:
+    return {name: empty_column(name) for name in COLUMNS}
+
+
+def to_columns(rows: list[tuple]) -> dict[str, np.ndarray]:
+    """(task_id, code, *LOADED_FIELDS) rows sorted by task_id to columns."""
+    if not rows:
+        return empty_columns()
+
+    task_ids, codes, *values = zip(*rows)
+    columns = {
+        "task_id": np.array(task_ids, dtype=np.int64),
+        "code": empty_column("code", len(codes)),
+    }
+    columns["code"][:] = codes
+    # None converts to NaT and NaN respectively.
+    for field, column in zip((*STATE_FIELDS, *PERFORMED_FIELDS), values):
+        if field in DATE_FIELDS:
+            columns[field] = np.array(column, dtype="datetime64[D]")
+        else:
+            columns[field] = np.array(column, dtype=np.float64)
+
+    due = columns["next_due_date"]
+    no_due = np.isnat(due)
+    for name, bound in zip(WINDOW_COLUMNS, ("mos_neg", "mos_pos")):
+        window = np.where(np.isnat(columns[bound]), due, columns[bound])
+        window[no_due] = NAT
+        columns[name] = window
+    return columns
+
+
+def as_python(value):
+    if isinstance(value, np.datetime64):
+        return None if np.isnat(value) else value.astype(datetime.date)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def missing_ids(
+        change_ids: list[int],
+        latest: int | None,
+        since: int | None = None
+        ) -> set[int]:
+    """Ids in (since, latest] within the gap window not in change_ids."""
+    if latest is None:
+        return set()
+    low = latest - GAP_WINDOW
+    if since is not None:
+        low = max(low, since)
+    return set(range(max(low, 0) + 1, latest + 1)).difference(change_ids)
+
+
+class FleetSnapshot:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.columns = empty_columns()
+        self.indexes = {}
+        self.change_id = None
+        self.gaps = set()
+        self.loaded_at = None
+        self.refreshed_at = None
+
+    def __len__(self) -> int:
+        return len(self.columns["task_id"])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            column.nbytes for column in self.columns.values()
+        ) + sum(sys.getsizeof(code) for code in self.columns["code"])
+
+    def load(self) -> None:
+        # The mark is taken first: rows changed during the load are pulled
+        # again by the next refresh, which is harmless.
+        recent = list(DueStateChange.objects.order_by("-pk").values_list(
+            "pk",
+            flat=True
+        )[:GAP_WINDOW])
+        self.change_id = recent[0] if recent else None
+        self.gaps = missing_ids(recent, self.change_id)
+        rows = TaskDueState.objects.filter(
+            task__is_deleted=False
+        ).order_by("task_id").values_list(
+            "task_id",
+            "task__code",
+            *LOADED_FIELDS
+        )
+        self.columns = to_columns(list(rows.iterator(chunk_size=CHUNK_SIZE)))
+        self.indexes = {}
+        self.loaded_at = self.refreshed_at = monotonic()
+
+    def refresh(self) -> int:
+        """Apply due states of tasks changed since the last refresh."""
+        if self.refreshed_at is None:
+            self.load()
+            return len(self)
+
+        changes = DueStateChange.objects.all()
+        if self.change_id is not None:
+            changes = changes.filter(
+                Q(pk__gt=self.change_id) | Q(pk__in=self.gaps)
+            )
+        changes = list(changes.values_list("pk", "task_id"))
+        change_ids = [pk for pk, _ in changes]
+
+        if changes:
+            latest = max(self.change_id or 0, *change_ids)
+            low = latest - GAP_WINDOW
+            self.gaps = {
+                pk for pk in self.gaps.difference(change_ids) if pk > low
+            } | missing_ids(change_ids, latest, self.change_id)
+            self.change_id = latest
+
+        task_ids = sorted({task_id for _, task_id in changes})
+        rows = []
+        for chunk in chunked(task_ids, CHUNK_SIZE):
+            rows.extend(TaskDueState.objects.filter(
+                task_id__in=chunk,
+                task__is_deleted=False
+            ).values_list("task_id", "task__code", *LOADED_FIELDS))
+        rows.sort()
+
+        # Tasks logged without an active due state were deleted.
+        self.remove(sorted(set(task_ids).difference(
+            row[0] for row in rows
+        )))
+        if rows:
+            self.upsert(to_columns(rows))
+
+        self.refreshed_at = monotonic()
+        return len(task_ids)
+
+    def ensure_fresh(self) -> None:
+        now = monotonic()
+        if (
+            self.loaded_at is None
+            or now - self.loaded_at >= settings.TASKS_SNAPSHOT_FULL_RELOAD
+        ):
+            self.load()
+        elif now - self.refreshed_at >= settings.TASKS_SNAPSHOT_MAX_AGE:
+            self.refresh()
+
+    def positions(
+            self,
+            task_ids: np.ndarray
+            ) -> tuple[np.ndarray, np.ndarray]:
+        known = self.columns["task_id"]
+        positions = np.searchsorted(known, task_ids)
+        found = positions < len(known)
+        found[found] = known[positions[found]] == task_ids[found]
+        return positions, found
+
+    def upsert(self, columns: dict[str, np.ndarray]) -> None:
+        positions, found = self.positions(columns["task_id"])
+        added = not found.all()
+        self.indexes = {}
+        # Both sides are sorted by task pk, so inserting at the search
+        # positions keeps the snapshot sorted.
+        for name, column in self.columns.items():
+            column[positions[found]] = columns[name][found]
+            if added:
+                self.columns[name] = np.insert(
+                    column,
+                    positions[~found],
+                    columns[name][~found]
+                )
+
+    def remove(self, task_ids: list[int]) -> None:
+        if not task_ids:
+            return
+        keep = ~np.isin(self.columns["task_id"], task_ids)
+        self.indexes = {}
+        for name, column in self.columns.items():
+            self.columns[name] = column[keep]
+
+    def rename(self, codes: dict[int, str]) -> None:
+        if not codes:
+            return
+        task_ids = np.fromiter(codes, dtype=np.int64, count=len(codes))
+        positions, found = self.positions(task_ids)
+        for task_id, position in zip(
+                task_ids[found].tolist(),
+                positions[found].tolist()
+                ):
+            self.columns["code"][position] = codes[task_id]
+
+    # Comparisons with NaT are false, so tasks without a due date are
+    # neither overdue nor in their window.
+    def overdue(self, today: datetime.date) -> np.ndarray:
+        return self.columns["window_end"] < np.datetime64(today, "D")
+
+    def in_window(self, today: datetime.date) -> np.ndarray:
+        today = np.datetime64(today, "D")
+        return (
+            (self.columns["window_start"] <= today)
+            & (today <= self.columns["window_end"])
+        )
+
+    def due_before(self, day: datetime.date) -> np.ndarray:
+        return self.columns["next_due_date"] < np.datetime64(day, "D")
+
+    def rows(self, mask: np.ndarray) -> "SnapshotRows":
+        """Selected tasks ordered by next due date, then pk."""
+        selected = np.flatnonzero(mask)
+        order = np.lexsort((
+            self.columns["task_id"][selected],
+            self.columns["next_due_date"][selected]
+        ))
+        return self.take(selected[order])
+
+    def window_index(self, dimension: str) -> IntervalIndex:
+        # Rebuilt on the first query after the windows changed.
+        if dimension not in self.indexes:
+            self.indexes[dimension] = IntervalIndex.from_columns(
+                self.columns,
+                dimension
+            )
+        return self.indexes[dimension]
+
+    def take(self, positions: np.ndarray) -> "SnapshotRows":
+        # Refreshes replace columns that change length instead of resizing
+        # them, so the positions stay valid for the columns captured here.
+        return SnapshotRows(dict(self.columns), positions)
+
+
+class SnapshotRows(Sequence):
+    """Query result that builds row dicts only for the slice read."""
+
+    def __init__(
+            self,
+            columns: dict[str, np.ndarray],
+            positions: np.ndarray
+            ):
+        self.columns = columns
+        self.positions = positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [
+                self.row(position)
+                for position in self.positions[index].tolist()
+            ]
+        return self.row(int(self.positions[index]))
+
+    def row(self, position: int) -> dict:
+        return {
+            "task_id": int(self.columns["task_id"][position]),
+            "code": self.columns["code"][position],
+            **{
+                field: as_python(self.columns[field][position])
+                for field in STATE_FIELDS
+            },
+        }
+
+
+fleet = FleetSnapshot()
+
+
+def query_fleet(
+        status: str | None = None,
+        before: datetime.date | None = None,
+        snapshot: FleetSnapshot | None = None
+        ) -> SnapshotRows:
+    snapshot = fleet if snapshot is None else snapshot
+    today = timezone.now().date()
+    with snapshot.lock:
+        snapshot.ensure_fresh()
+
+        mask = np.ones(len(snapshot), dtype=bool)
+        if status == TaskDueState.Status.OVERDUE:
+            mask &= snapshot.overdue(today)
+        elif status == TaskDueState.Status.IN_WINDOW:
+            mask &= snapshot.in_window(today)
+        elif status == TaskDueState.Status.OK:
+            mask &= ~snapshot.overdue(today) & ~snapshot.in_window(today)
+        if before is not None:
+            mask &= snapshot.due_before(before)
+        return snapshot.rows(mask)
+
+
+def query_windows(
+        dimension: str,
+        low: datetime.date | float,
+        high: datetime.date | float | None = None,
+        snapshot: FleetSnapshot | None = None
+        ) -> SnapshotRows:
+    """Tasks whose ``dimension`` window intersects [low, high].
+
+    Without ``high`` this is a stabbing query: windows containing ``low``.
+    """
+    snapshot = fleet if snapshot is None else snapshot
+    bounds = np.array(
+        [low, low if high is None else high],
+        dtype="datetime64[D]" if dimension == "mos" else np.float64
+    )
+    low, high = as_number(bounds).tolist()
+    with snapshot.lock:
+        snapshot.ensure_fresh()
+        index = snapshot.window_index(dimension)
+        return snapshot.take(index.overlapping(low, high))
+
+
+class ForecastRows(SnapshotRows):
+    def row(self, position: int) -> dict:
+        return {
+            "task_id": int(self.columns["task_id"][position]),
+            "code": self.columns["code"][position],
+            "projected_due_date": as_python(
+                self.columns["projected_due_date"][position]
+            ),
+            "due_by": FORECAST_LIMITS[self.columns["due_by"][position]],
+            **{
+                field: as_python(self.columns[field][position])
+                for field in NEXT_DUE_FIELDS
+            },
+        }
+
+
+def query_forecast(
+        until: datetime.date,
+        hours_per_day: float,
+        cycles_per_day: float,
+        snapshot: FleetSnapshot | None = None
+        ) -> ForecastRows:
+    """Tasks projected to come due by ``until``, soonest first."""
+    snapshot = fleet if snapshot is None else snapshot
+    with snapshot.lock:
+        snapshot.ensure_fresh()
+        columns = dict(snapshot.columns)
+
+    # Snapshot columns carry both the latest CW counters and the next due
+    # values project_due_dates reads.
+    projected, driver = project_due_dates(
+        columns,
+        columns,
+        hours_per_day,
+        cycles_per_day
+    )
+    selected = np.flatnonzero(
+        ~np.isnat(projected) & (projected <= np.datetime64(until, "D"))
+    )
+    selected = selected[np.argsort(projected[selected], kind="stable")]
+    columns["projected_due_date"] = projected
+    columns["due_by"] = driver
+    return ForecastRows(columns, selected)
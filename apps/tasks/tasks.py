@@ -1,17 +1,133 @@
+import datetime
+import logging
+
+from celery import chord
+from django.conf import settings
+from django.utils import timezone
+
 from config.celery import app
 
+from . import celery_metrics  # noqa: F401  (connects the signal handlers)
 from .interval_maths import cnt_next_due
-from .models import Task
+from .models import RecomputeMark, DueStateChange
+from .recompute import (
+    recompute_next_due,
+    recompute_range,
+    pk_ranges,
+    changed_tasks,
+    latest_change
+)
+from .due_state import refresh_due_states
+from .response_cache import bump_versions
+
+
+logger = logging.getLogger(__name__)
 
 
 @app.task
-def update_next_due_date(task_id: int) -> None:
+def update_next_due_date(task_id: int) -> dict:
     cnt_next_due(task_id)
+    refresh_due_states([task_id])
+    bump_versions([task_id])
+    return {"processed": 1}
+
+
+@app.task
+def update_next_due_dates(task_ids: list[int]) -> dict:
+    processed, updated = recompute_next_due(task_ids)
+    return {"processed": processed, "updated": updated}
+
+
+@app.task
+def update_due_dates_range(first_pk: int, last_pk: int) -> dict:
+    result = {"first_pk": first_pk, "last_pk": last_pk, "error": None}
+    # A failed range is reported to the aggregation step instead of
+    # failing the whole chord.
+    try:
+        processed, updated = recompute_range(first_pk, last_pk)
+    except Exception as err:
+        logger.exception("Recompute of tasks %s-%s failed", first_pk, last_pk)
+        return {**result, "processed": 0, "updated": 0, "error": repr(err)}
+    return {**result, "processed": processed, "updated": updated}
+
+
+@app.task
+def aggregate_due_dates(results: list[dict]) -> dict:
+    failed = [result for result in results if result["error"]]
+    totals = {
+        "processed": sum(result["processed"] for result in results),
+        "updated": sum(result["updated"] for result in results),
+        "chunks": len(results),
+        "failed": len(failed),
+        "failed_ranges": [
+            [result["first_pk"], result["last_pk"]] for result in failed
+        ],
+    }
+    logger.info(
+        "Due dates updated: %s of %s tasks changed in %s chunks, %s failed",
+        totals["updated"],
+        totals["processed"],
+        totals["chunks"],
+        totals["failed"]
+    )
+    return totals
+
+
+def due_dates_chord(ranges: list[tuple[int, int]]) -> chord:
+    return chord(
+        (
+            update_due_dates_range.s(first_pk, last_pk)
+            for first_pk, last_pk in ranges
+        ),
+        aggregate_due_dates.s()
+    )
+
+
+def sweep_due(mark: RecomputeMark, now: datetime.datetime) -> bool:
+    if mark.swept_at is None or mark.changed_until is None:
+        return True
+    interval = datetime.timedelta(seconds=settings.TASKS_RECOMPUTE_FULL_SWEEP)
+    return now - mark.swept_at >= interval
+
+
+def sweep_due_dates(mark: RecomputeMark, now: datetime.datetime) -> dict:
+    # Taken before fan-out: changes made during the sweep are picked up by
+    # the next incremental run.
+    mark.changed_until = latest_change()
+    ranges = pk_ranges(settings.TASKS_RECOMPUTE_RANGE_SIZE)
+    if ranges:
+        due_dates_chord(ranges).delay()
+    mark.swept_at = now
+    mark.save()
+    return {"mode": "full", "chunks": len(ranges)}
+
+
+@app.task
+def update_daily_due_dates() -> dict:
+    mark, _ = RecomputeMark.objects.get_or_create(name="due_dates")
+    now = timezone.now()
+    if sweep_due(mark, now):
+        return sweep_due_dates(mark, now)
+
+    task_ids, until = changed_tasks(mark.changed_until)
+    processed, updated = recompute_next_due(task_ids)
+    if until != mark.changed_until:
+        mark.changed_until = until
+        mark.save(update_fields=["changed_until"])
+    return {"mode": "incremental", "processed": processed, "updated": updated}
 
 
 @app.task
-def update_daily_due_dates():
-    tasks = Task.objects.active().order_by("code", "description")
-    for task in tasks:
-        cnt_next_due(task.pk)
-    print('Due dates updated')
+def prune_due_state_changes() -> dict:
+    # Every snapshot reloads in full at least once per reload interval, so
+    # rows older than two of them are behind every snapshot's mark.
+    cutoff = timezone.now() - datetime.timedelta(
+        seconds=2 * settings.TASKS_SNAPSHOT_FULL_RELOAD
+    )
+    last = DueStateChange.objects.filter(
+        created_at__lt=cutoff
+    ).order_by("-pk").values_list("pk", flat=True).first()
+    if last is None:
+        return {"deleted": 0}
+    deleted, _ = DueStateChange.objects.filter(pk__lte=last).delete()
+    return {"deleted": deleted}
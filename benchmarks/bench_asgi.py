@@ -0,0 +1,124 @@
+"""Concurrent-client throughput of the read endpoints under ASGI vs. WSGI.
+
+Both handlers run in-process against a throwaway test database: WSGI
+clients are threads calling the sync handler, ASGI clients are coroutines
+sharing one event loop.
+
+    python -m benchmarks.bench_asgi --tasks 2000 --clients 32 --requests 2000
+"""
+import argparse
+import asyncio
+import datetime
+import random
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from benchmarks import setup_django
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+from django.test import AsyncClient, Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from apps.tasks.models import Task, CW, Requirements  # noqa: E402
+
+
+def seed(size: int, seed: int = 1) -> list[int]:
+    rnd = random.Random(seed)
+    tasks = Task.objects.bulk_create([
+        Task(code=f"BENCH-{num:06d}", description="benchmark")
+        for num in range(size)
+    ])
+    Requirements.objects.bulk_create([
+        Requirements(task=task, due_months=rnd.randrange(1, 40), is_active=True)
+        for task in tasks
+    ])
+    starts = {
+        task.pk: datetime.date(2020, 1, 1)
+        + datetime.timedelta(days=rnd.randrange(365))
+        for task in tasks
+    }
+    CW.objects.bulk_create([
+        CW(
+            task=task,
+            perform_date=starts[task.pk] + datetime.timedelta(days=400 * num),
+            next_due_date=datetime.date(2025, 1, 1),
+        )
+        for task in tasks
+        for num in range(3)
+    ])
+    return [task.pk for task in tasks]
+
+
+def request_paths(task_ids: list[int], count: int, seed: int = 2) -> list[str]:
+    rnd = random.Random(seed)
+    templates = (
+        "/api/tasks/?limit=50",
+        "/api/tasks/{}/",
+        "/api/tasks/{}/cws/",
+        "/api/tasks/{}/requirements/",
+    )
+    return [
+        rnd.choice(templates).format(rnd.choice(task_ids))
+        for _ in range(count)
+    ]
+
+
+def run_wsgi(paths: list[str], clients: int) -> float:
+    def worker(chunk: list[str]) -> None:
+        client = Client()
+        for path in chunk:
+            assert client.get(path).status_code == 200
+
+    chunks = [paths[num::clients] for num in range(clients)]
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(worker, chunks))
+    return perf_counter() - started
+
+
+def run_asgi(paths: list[str], clients: int) -> float:
+    async def worker(chunk: list[str]) -> None:
+        client = AsyncClient()
+        for path in chunk:
+            assert (await client.get(path)).status_code == 200
+
+    async def run() -> None:
+        await asyncio.gather(*(
+            worker(paths[num::clients]) for num in range(clients)
+        ))
+
+    started = perf_counter()
+    asyncio.run(run())
+    return perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        task_ids = seed(args.tasks)
+        paths = request_paths(task_ids, args.requests)
+
+        wsgi = run_wsgi(paths, args.clients)
+        asgi = run_asgi(paths, args.clients)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(f"tasks:          {args.tasks}")
+    print(f"clients:        {args.clients}")
+    print(f"requests:       {args.requests}")
+    print(f"wsgi:           {wsgi:.3f}s ({args.requests / wsgi:.0f} req/s)")
+    print(f"asgi:           {asgi:.3f}s ({args.requests / asgi:.0f} req/s)")
+    print(f"asgi/wsgi:      {wsgi / asgi:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Scalar interval_maths vs. vectorized interval_arrays on a synthetic fleet.
+
+    python -m benchmarks.bench_interval_arrays --size 200000
+"""
+import argparse
+import datetime
+import random
+from copy import copy
+from time import perf_counter
+
+from benchmarks import setup_django
+
+setup_django()
+
+from apps.tasks.models import CW, Requirements  # noqa: E402
+from apps.tasks.interval_maths import (  # noqa: E402
+    has_due_limits,
+    set_next_due,
+    cnt_spans
+)
+from apps.tasks.interval_arrays import (  # noqa: E402
+    cnt_fleet,
+    columns_from_objects
+)
+
+
+def synthetic_fleet(size: int, seed: int = 1) -> list[tuple]:
+    rnd = random.Random(seed)
+    rows = []
+    for _ in range(size):
+        perform_date = datetime.date(2020, 1, 1) + datetime.timedelta(
+            days=rnd.randrange(1500)
+        )
+        prev_cw = CW(
+            perform_date=perform_date - datetime.timedelta(days=180),
+            perform_hours=rnd.uniform(0, 5000),
+            perform_cycles=rnd.uniform(0, 3000),
+            next_due_date=perform_date,
+        )
+        cw = CW(
+            perform_date=perform_date,
+            perform_hours=rnd.uniform(0, 5000),
+            perform_cycles=rnd.uniform(0, 3000),
+            adjusted_days=rnd.choice([0, 0, 0, -3]),
+            adjusted_hrs=rnd.choice([0, 0, 0, 1.5]),
+            adjusted_cycles=0,
+        )
+        req = Requirements(
+            due_months=rnd.randrange(1, 40),
+            due_hrs=round(rnd.uniform(1, 2000), 2),
+            due_cycles=round(rnd.uniform(1, 2000), 2),
+            mos_unit=rnd.choice(["M", "D", "P"]),
+            pos_tol_mos=rnd.choice([1, 2.5, 15, 10.0]),
+            neg_tol_mos=rnd.choice([-1, -1.5, -15, -10.0]),
+            hrs_unit=rnd.choice(["H", "P"]),
+            pos_tol_hrs=10,
+            neg_tol_hrs=-10,
+            afl_unit="C",
+            pos_tol_afl=12.5,
+            neg_tol_afl=-12.5,
+        )
+        rows.append((req, cw, prev_cw))
+    return rows
+
+
+def run_scalar(rows: list[tuple]) -> None:
+    for req, cw, prev_cw in rows:
+        cw = copy(cw)
+        if has_due_limits(req):
+            set_next_due(req, cw, prev_cw)
+        cnt_spans(req, cw)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = synthetic_fleet(args.size)
+
+    started = perf_counter()
+    run_scalar(rows)
+    scalar = perf_counter() - started
+
+    started = perf_counter()
+    columns = columns_from_objects(rows)
+    to_columns = perf_counter() - started
+
+    started = perf_counter()
+    cnt_fleet(columns)
+    vector = perf_counter() - started
+
+    print(f"rows:           {args.size}")
+    print(f"scalar:         {scalar:.3f}s ({args.size / scalar:.0f} rows/s)")
+    print(f"to columns:     {to_columns:.3f}s")
+    print(f"vectorized:     {vector:.3f}s ({args.size / vector:.0f} rows/s)")
+    print(f"speedup:        {scalar / vector:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Staging and activation time of a maintenance program revision.
+
+Seeds tasks with active requirements and a CW each in a throwaway test
+database, stages a revision covering every task, then times the swap of
+the active set and the single recompute pass that follows it.
+
+    python -m benchmarks.bench_revision --tasks 50000
+"""
+import argparse
+import datetime
+from time import perf_counter
+from unittest import mock
+
+from benchmarks import setup_django
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from apps.tasks.models import Task, CW, Requirements  # noqa: E402
+from apps.tasks.recompute import recompute_next_due  # noqa: E402
+from apps.tasks.revisions import stage_revision, activate_revision  # noqa
+from apps.tasks.tasks import update_daily_due_dates  # noqa: E402
+from config.celery import app as celery_app  # noqa: E402
+
+
+BATCH_SIZE = 5000
+
+
+def seed(size: int) -> None:
+    for start in range(0, size, BATCH_SIZE):
+        tasks = Task.objects.bulk_create([
+            Task(code=f"BENCH-{num:06d}", description="benchmark")
+            for num in range(start, min(start + BATCH_SIZE, size))
+        ])
+        Requirements.objects.bulk_create([
+            Requirements(task=task, due_months=6, is_active=True)
+            for task in tasks
+        ])
+        CW.objects.bulk_create([
+            CW(task=task, perform_date=datetime.date(2023, 1, 1))
+            for task in tasks
+        ])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=50_000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    celery_app.conf.task_always_eager = True
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        started = perf_counter()
+        seed(args.tasks)
+        update_daily_due_dates()
+        print(f"seeded {args.tasks} tasks in {perf_counter() - started:.1f}s")
+
+        rows = (
+            {"code": f"BENCH-{num:06d}", "due_months": 12, "mos_unit": "D"}
+            for num in range(args.tasks)
+        )
+        stats = stage_revision(rows, "bench")
+        print(f"stage:     {stats['elapsed']:.2f}s")
+
+        with mock.patch("apps.tasks.revisions.enqueue_recompute") as enqueue:
+            stats = activate_revision(stats["pk"])
+        print(f"activate:  {stats['elapsed']:.2f}s")
+
+        started = perf_counter()
+        processed, updated = recompute_next_due(
+            sorted(enqueue.call_args.args[0])
+        )
+        print(
+            f"recompute: {perf_counter() - started:.2f}s "
+            f"({updated} of {processed} tasks changed)"
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
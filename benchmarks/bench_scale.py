@@ -0,0 +1,401 @@
+"""Latency and throughput of the API and the recompute engine on a big fleet.
+
+Seeds a throwaway test database, then measures p50/p95 latency of every
+router endpoint, create_cw latency and update_daily_due_dates throughput,
+and writes the results as JSON for benchmarks.compare.
+
+    python -m benchmarks.bench_scale --tasks 10000 --cws 100000
+    python -m benchmarks.bench_scale --tasks 100000 --cws 1000000 --samples 20
+"""
+import argparse
+import datetime
+import json
+import platform
+import random
+import subprocess
+from collections.abc import Callable
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+from benchmarks import setup_django
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.core.files.uploadedfile import SimpleUploadedFile  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.http import StreamingHttpResponse  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.tasks import services  # noqa: E402
+from apps.tasks.dispatch import dispatcher  # noqa: E402
+from apps.tasks.models import Task, CW, Requirements  # noqa: E402
+from apps.tasks.schemas import ComplianceIn  # noqa: E402
+from apps.tasks.tasks import update_daily_due_dates  # noqa: E402
+from config.celery import app as celery_app  # noqa: E402
+
+
+RESULTS_DIR = Path(__file__).parent / "results"
+BATCH_SIZE = 5000
+# Counters well past every seeded window, so no adjustment applies.
+PERFORMED = {"perform_hours": 5000.0, "perform_cycles": 3000.0}
+
+
+def requirements(task: Task, rnd: random.Random) -> Requirements:
+    # Tolerances only on the limits that are set, like real programs.
+    req = Requirements(
+        task=task,
+        is_active=True,
+        due_months=rnd.choice([6, 12, 24])
+    )
+    req.mos_unit, req.pos_tol_mos, req.neg_tol_mos = "M", 1, -1
+    if rnd.random() < 0.5:
+        req.due_hrs = rnd.choice([500.0, 1000.0])
+        req.hrs_unit, req.pos_tol_hrs, req.neg_tol_hrs = "H", 10, -10
+    if rnd.random() < 0.5:
+        req.due_cycles = rnd.choice([300.0, 600.0])
+        req.afl_unit, req.pos_tol_afl, req.neg_tol_afl = "C", 10, -10
+    return req
+
+
+def seed(tasks: int, cws: int, seed: int = 1) -> None:
+    rnd = random.Random(seed)
+    per_task = max(cws // tasks, 1)
+
+    for start in range(0, tasks, BATCH_SIZE):
+        created = Task.objects.bulk_create([
+            Task(code=f"BENCH-{num:07d}", description="benchmark")
+            for num in range(start, min(start + BATCH_SIZE, tasks))
+        ])
+        Requirements.objects.bulk_create([
+            requirements(task, rnd) for task in created
+        ])
+        CW.objects.bulk_create(
+            [
+                CW(
+                    task=task,
+                    perform_date=datetime.date(2015, 1, 1)
+                    + datetime.timedelta(days=offset + 120 * num),
+                    perform_hours=100.0 * num,
+                    perform_cycles=50.0 * num,
+                )
+                for task in created
+                for offset in [rnd.randrange(365)]
+                for num in range(per_task)
+            ],
+            batch_size=BATCH_SIZE
+        )
+
+
+def percentiles(samples: list[float]) -> dict:
+    values = np.array(samples) * 1000
+    return {
+        "samples": len(samples),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+    }
+
+
+class Fleet:
+    """Hands out tasks no other measurement has touched yet."""
+
+    def __init__(self, seed: int = 2):
+        self.pool = list(Task.objects.active().values_list("pk", flat=True))
+        random.Random(seed).shuffle(self.pool)
+
+    def task(self) -> int:
+        return self.pool.pop()
+
+    def cw(self, task_pk: int) -> int:
+        return CW.objects.filter(task_id=task_pk).values_list(
+            "pk", flat=True
+        ).first()
+
+    def requirements(self, task_pk: int) -> int:
+        return Requirements.objects.filter(task_id=task_pk).values_list(
+            "pk", flat=True
+        ).first()
+
+
+def import_file(size: int = 100) -> SimpleUploadedFile:
+    rows = "".join(
+        f"IMPORT-{random.randrange(10 ** 9)},imported,12\n"
+        for _ in range(size)
+    )
+    return SimpleUploadedFile(
+        "program.csv",
+        f"code,description,due_months\n{rows}".encode()
+    )
+
+
+def revision_file(fleet: "Fleet", size: int = 20) -> SimpleUploadedFile:
+    codes = Task.objects.filter(
+        pk__in=[fleet.task() for _ in range(size)]
+    ).values_list("code", flat=True)
+    rows = "".join(f"{code},12\n" for code in codes)
+    return SimpleUploadedFile(
+        "program.csv",
+        f"code,due_months\n{rows}".encode()
+    )
+
+
+def consume(response: StreamingHttpResponse) -> StreamingHttpResponse:
+    for _ in response.streaming_content:
+        pass
+    return response
+
+
+def endpoint_requests(fleet: Fleet) -> dict[str, tuple[int, Callable]]:
+    today = timezone.now().date().isoformat()
+
+    def put_cw(client: Client):
+        task = fleet.task()
+        return client.put(
+            f"/api/tasks/{task}/cws/{fleet.cw(task)}/",
+            {"perform_date": today},
+            content_type="application/json"
+        )
+
+    def put_requirements(client: Client):
+        task = fleet.task()
+        return client.put(
+            f"/api/tasks/{task}/requirements/{fleet.requirements(task)}/",
+            {"due_months": 18},
+            content_type="application/json"
+        )
+
+    def delete_cw(client: Client):
+        task = fleet.task()
+        return client.delete(f"/api/tasks/{task}/cws/{fleet.cw(task)}/")
+
+    def delete_requirements(client: Client):
+        task = fleet.task()
+        return client.delete(
+            f"/api/tasks/{task}/requirements/{fleet.requirements(task)}/"
+        )
+
+    staged = []
+
+    def post_revision(client: Client):
+        response = client.post(
+            "/api/tasks/revisions/?name=bench",
+            {"file": revision_file(fleet)}
+        )
+        if response.status_code == 200:
+            staged.append(response.json()["pk"])
+        return response
+
+    def activate_revision(client: Client):
+        # Activates the revisions the POST above staged, one per sample.
+        return client.post(f"/api/tasks/revisions/{staged.pop()}/activate/")
+
+    # name -> (samples divisor, request); heavy whole-fleet reads get
+    # fewer samples.
+    return {
+        "GET /api/tasks/": (1, lambda client: client.get(
+            "/api/tasks/", {"limit": 100, "offset": 5000}
+        )),
+        "GET /api/tasks/?cursor": (1, lambda client: client.get(
+            "/api/tasks/", {"limit": 100, "cursor": ""}
+        )),
+        "GET /api/tasks/due-states/": (1, lambda client: client.get(
+            "/api/tasks/due-states/", {"status": "overdue", "limit": 100}
+        )),
+        "GET /api/tasks/due/": (1, lambda client: client.get(
+            "/api/tasks/due/", {"status": "overdue", "limit": 100}
+        )),
+        "GET /api/tasks/windows/{dimension}/": (1, lambda client: client.get(
+            "/api/tasks/windows/mos/", {"at": today, "limit": 100}
+        )),
+        "GET /api/tasks/forecast/": (10, lambda client: client.get(
+            "/api/tasks/forecast/", {"horizon": 30}
+        )),
+        "GET /api/tasks/dispatch-stats/": (1, lambda client: client.get(
+            "/api/tasks/dispatch-stats/"
+        )),
+        "GET /api/tasks/cache-stats/": (1, lambda client: client.get(
+            "/api/tasks/cache-stats/"
+        )),
+        "POST /api/tasks/import/": (5, lambda client: client.post(
+            "/api/tasks/import/",
+            {"file": import_file()}
+        )),
+        "POST /api/tasks/revisions/": (5, post_revision),
+        "POST /api/tasks/revisions/{id}/activate/": (5, activate_revision),
+        "GET /api/tasks/{id}/": (1, lambda client: client.get(
+            f"/api/tasks/{fleet.task()}/"
+        )),
+        "POST /api/tasks/": (1, lambda client: client.post(
+            "/api/tasks/",
+            [{"code": "NEW-TASK", "description": "new"}] * 10,
+            content_type="application/json"
+        )),
+        "PUT /api/tasks/{id}/": (1, lambda client: client.put(
+            f"/api/tasks/{fleet.task()}/",
+            {"code": "RENAMED", "description": "renamed"},
+            content_type="application/json"
+        )),
+        "DELETE /api/tasks/{id}/": (1, lambda client: client.delete(
+            f"/api/tasks/{fleet.task()}/"
+        )),
+        "POST /api/tasks/{id}/cws/": (1, lambda client: client.post(
+            f"/api/tasks/{fleet.task()}/cws/",
+            {"perform_date": today, **PERFORMED},
+            content_type="application/json"
+        )),
+        "GET /api/tasks/{id}/cws/": (1, lambda client: client.get(
+            f"/api/tasks/{fleet.task()}/cws/"
+        )),
+        "DELETE /api/tasks/{id}/cws/{cw_id}/": (1, delete_cw),
+        "PUT /api/tasks/{id}/cws/{cw_id}/": (1, put_cw),
+        "GET /api/tasks/{id}/requirements/": (1, lambda client: client.get(
+            f"/api/tasks/{fleet.task()}/requirements/"
+        )),
+        "POST /api/tasks/{id}/requirements/": (1, lambda client: client.post(
+            f"/api/tasks/{fleet.task()}/requirements/",
+            {"due_months": 12, "is_active": True},
+            content_type="application/json"
+        )),
+        "PUT /api/tasks/{id}/requirements/{req_id}/": (1, put_requirements),
+        "DELETE /api/tasks/{id}/requirements/{req_id}/": (
+            1,
+            delete_requirements
+        ),
+        "POST /api/cws/bulk/": (1, lambda client: client.post(
+            "/api/cws/bulk/",
+            [
+                {"task_id": fleet.task(), "perform_date": today, **PERFORMED}
+                for _ in range(50)
+            ],
+            content_type="application/json"
+        )),
+        "GET /api/export/{kind}/": (10, lambda client: consume(
+            client.get("/api/export/tasks/", {"format": "csv"})
+        )),
+        "GET /api/metrics/queries/": (1, lambda client: client.get(
+            "/api/metrics/queries/"
+        )),
+        "GET /api/metrics/celery/": (1, lambda client: client.get(
+            "/api/metrics/celery/"
+        )),
+    }
+
+
+def measure_endpoints(samples: int) -> dict:
+    client = Client(raise_request_exception=False)
+    fleet = Fleet()
+    results = {}
+    for name, (divisor, request) in endpoint_requests(fleet).items():
+        timings = []
+        errors = 0
+        for _ in range(max(samples // divisor, 3)):
+            started = perf_counter()
+            response = request(client)
+            timings.append(perf_counter() - started)
+            errors += response.status_code >= 400
+        results[name] = {**percentiles(timings), "errors": errors}
+    return results
+
+
+def measure_create_cw(samples: int) -> dict:
+    fleet = Fleet(seed=3)
+    today = timezone.now().date()
+    timings = []
+    for _ in range(samples):
+        task = fleet.task()
+        started = perf_counter()
+        services.create_cw(
+            task,
+            ComplianceIn(perform_date=today, **PERFORMED).dict()
+        )
+        timings.append(perf_counter() - started)
+    return percentiles(timings)
+
+
+def measure_due_dates() -> dict:
+    tasks = Task.objects.active().count()
+    started = perf_counter()
+    # Eager mode runs the whole fan-out chord in this process.
+    update_daily_due_dates.delay()
+    elapsed = perf_counter() - started
+    return {
+        "tasks": tasks,
+        "seconds": round(elapsed, 3),
+        "tasks_per_sec": round(tasks / elapsed),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--cws", type=int, default=100_000)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    settings.DEBUG = False
+    # Measure the work behind each request, not cache hits or a broker.
+    settings.TASKS_RESPONSE_CACHE = None
+    dispatcher.send = lambda task_ids: None
+    celery_app.conf.task_always_eager = True
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        started = perf_counter()
+        seed(args.tasks, args.cws)
+        seeded = perf_counter() - started
+
+        results = {
+            "meta": {
+                "commit": git_commit(),
+                "created_at": timezone.now().isoformat(),
+                "python": platform.python_version(),
+                "database": connection.vendor,
+                "tasks": args.tasks,
+                "cws": CW.objects.count(),
+                "samples": args.samples,
+                "seed_seconds": round(seeded, 3),
+            },
+            "update_daily_due_dates": measure_due_dates(),
+            "create_cw": measure_create_cw(args.samples),
+            "endpoints": measure_endpoints(args.samples),
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    out = args.out or RESULTS_DIR / (
+        f"{results['meta']['commit'] or 'local'}-{args.tasks}.json"
+    )
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2))
+
+    due = results["update_daily_due_dates"]
+    print(f"update_daily_due_dates: {due['tasks_per_sec']} tasks/s")
+    print(f"create_cw:              {results['create_cw']['p50_ms']} ms p50")
+    for name, row in results["endpoints"].items():
+        print(
+            f"{name:48} p50 {row['p50_ms']:9.3f} ms"
+            f"  p95 {row['p95_ms']:9.3f} ms  errors {row['errors']}"
+        )
+    print(f"results:                {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Memory footprint and query latency of the in-process fleet snapshot.
+
+Seeds tasks with due states in a throwaway test database, loads the
+snapshot, then times the vectorized status queries and an incremental
+refresh against the equivalent ORM query, the window index queries and a
+forecast page.
+
+    python -m benchmarks.bench_snapshot --tasks 500000
+"""
+import argparse
+import datetime
+import random
+import tracemalloc
+from time import perf_counter
+
+import numpy as np
+
+from benchmarks import setup_django
+
+setup_django()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.tasks.due_state import cnt_status  # noqa: E402
+from apps.tasks.models import Task, TaskDueState, DueStateChange  # noqa
+from apps.tasks.services import get_due_states  # noqa: E402
+from apps.tasks.snapshot import (  # noqa: E402
+    FleetSnapshot,
+    query_fleet,
+    query_windows,
+    query_forecast
+)
+
+
+BATCH_SIZE = 5000
+
+
+def seed(size: int, seed: int = 1) -> None:
+    rnd = random.Random(seed)
+    today = timezone.now().date()
+    now = timezone.now()
+    for start in range(0, size, BATCH_SIZE):
+        tasks = Task.objects.bulk_create([
+            Task(code=f"BENCH-{num:06d}", description="benchmark")
+            for num in range(start, min(start + BATCH_SIZE, size))
+        ])
+        states = []
+        for task in tasks:
+            due = today + datetime.timedelta(days=rnd.randrange(-60, 720))
+            tolerance = datetime.timedelta(days=rnd.choice([0, 15, 30]))
+            state = TaskDueState(
+                task=task,
+                next_due_date=due,
+                next_due_hrs=rnd.choice([None, rnd.uniform(0, 20000)]),
+                mos_neg=due - tolerance if tolerance else None,
+                mos_pos=due + tolerance if tolerance else None,
+                status_date=today,
+                updated_at=now,
+            )
+            state.status = cnt_status(state, today)
+            states.append(state)
+        TaskDueState.objects.bulk_create(states)
+
+
+def timed(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        func()
+        timings.append(perf_counter() - started)
+    return float(np.median(timings)) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        started = perf_counter()
+        seed(args.tasks)
+        print(f"seeded {args.tasks} tasks in {perf_counter() - started:.1f}s")
+
+        snapshot = FleetSnapshot()
+        started = perf_counter()
+        snapshot.load()
+        load_seconds = perf_counter() - started
+
+        tracemalloc.start()
+        FleetSnapshot().load()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        today = timezone.now().date()
+        before = today + datetime.timedelta(days=30)
+        mib = 1024 * 1024
+        print(f"rows:                  {len(snapshot)}")
+        print(f"load:                  {load_seconds:.2f}s")
+        arrays = sum(column.nbytes for column in snapshot.columns.values())
+        print(f"arrays:                {arrays / mib:.1f} MiB")
+        print(f"arrays + code strings: {snapshot.nbytes / mib:.1f} MiB")
+        print(f"peak while loading:    {peak / mib:.1f} MiB")
+
+        timings = {
+            "overdue mask": (lambda: snapshot.overdue(today), args.repeat),
+            "in_window mask": (lambda: snapshot.in_window(today), args.repeat),
+            "due_before mask": (
+                lambda: snapshot.due_before(before),
+                args.repeat
+            ),
+            "snapshot page": (
+                lambda: query_fleet("overdue", snapshot=snapshot)[:100],
+                args.repeat
+            ),
+            "ORM page": (
+                lambda: list(get_due_states("overdue")[:100]),
+                args.repeat
+            ),
+            "snapshot count": (
+                lambda: len(query_fleet("overdue", snapshot=snapshot)),
+                args.repeat
+            ),
+            "ORM count": (
+                lambda: get_due_states("overdue").count(),
+                args.repeat
+            ),
+            "forecast page": (
+                lambda: query_forecast(
+                    before,
+                    8.0,
+                    4.0,
+                    snapshot=snapshot
+                )[:100],
+                args.repeat
+            ),
+            "idle refresh": (snapshot.refresh, args.repeat),
+            "mos index build": (
+                lambda: snapshot.indexes.clear() or snapshot.window_index(
+                    "mos"
+                ),
+                3
+            ),
+            "mos stab": (
+                lambda: len(query_windows("mos", today, snapshot=snapshot)),
+                args.repeat
+            ),
+            "mos 30-day range": (
+                lambda: len(query_windows(
+                    "mos",
+                    today,
+                    before,
+                    snapshot=snapshot
+                )),
+                args.repeat
+            ),
+            "hrs stab": (
+                lambda: len(query_windows("hrs", 10000.0, snapshot=snapshot)),
+                args.repeat
+            ),
+        }
+        for name, (func, repeat) in timings.items():
+            print(f"{name + ':':<22} {timed(func, repeat):.2f} ms")
+
+        DueStateChange.log(
+            Task.objects.order_by("?").values_list("pk", flat=True)[:1000]
+        )
+        started = perf_counter()
+        changed = snapshot.refresh()
+        print(
+            f"refresh of {changed} rows: "
+            f"{(perf_counter() - started) * 1000:.2f} ms"
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compare two bench_scale result files and fail on regressions.
+
+Latencies regress when the head p95 exceeds the base p95 by more than the
+threshold; update_daily_due_dates throughput regresses when it drops by
+more than the threshold.
+
+    python -m benchmarks.compare base.json head.json --threshold 0.2
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def latencies(results: dict) -> dict[str, float]:
+    rows = {"create_cw": results["create_cw"]["p95_ms"]}
+    rows.update(
+        (name, row["p95_ms"]) for name, row in results["endpoints"].items()
+    )
+    return rows
+
+
+def compare(base: dict, head: dict, threshold: float) -> list[dict]:
+    rows = []
+    head_latencies = latencies(head)
+    for name, before in latencies(base).items():
+        after = head_latencies.get(name)
+        if after is None:
+            continue
+        change = (after - before) / before if before else 0.0
+        rows.append({
+            "name": f"{name} p95 ms",
+            "base": before,
+            "head": after,
+            "change": change,
+            "regressed": change > threshold,
+        })
+
+    before = base["update_daily_due_dates"]["tasks_per_sec"]
+    after = head["update_daily_due_dates"]["tasks_per_sec"]
+    change = (after - before) / before if before else 0.0
+    rows.append({
+        "name": "update_daily_due_dates tasks/s",
+        "base": before,
+        "head": after,
+        "change": change,
+        "regressed": change < -threshold,
+    })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    rows = compare(
+        json.loads(args.base.read_text()),
+        json.loads(args.head.read_text()),
+        args.threshold
+    )
+    for row in rows:
+        flag = "REGRESSED" if row["regressed"] else ""
+        print(
+            f"{row['name']:58} {row['base']:10.3f} -> {row['head']:10.3f}"
+            f" {row['change']:+7.1%} {flag}"
+        )
+
+    if any(row["regressed"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
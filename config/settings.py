@@ -24,6 +24,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.tasks.middleware.QueryStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,6 +88,61 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Average daily utilization used to turn hours/cycles limits into dates
+TASKS_DAILY_HOURS = 8.0
+TASKS_DAILY_CYCLES = 4.0
+# Seconds writes are coalesced before one recompute message is sent
+TASKS_RECOMPUTE_DEBOUNCE = 2.0
+# Tasks per pk-range subtask of the nightly recompute fan-out
+TASKS_RECOMPUTE_RANGE_SIZE = 5000
+# Seconds between full recompute sweeps; runs in between only recompute
+# tasks whose CWs or requirements changed since the last run
+TASKS_RECOMPUTE_FULL_SWEEP = 24 * 60 * 60
+# Seconds the incremental recompute mark trails now, so CW and requirement
+# writes whose transaction commits late are still read by the next run
+TASKS_RECOMPUTE_OVERLAP = 60
+# Tasks one write may mark dirty; larger requirement changes are picked up
+# by a single incremental recompute pass instead
+TASKS_RECOMPUTE_BULK_THRESHOLD = 1000
+# Seconds the in-process fleet snapshot serves before pulling changes
+TASKS_SNAPSHOT_MAX_AGE = 1.0
+# Seconds between full reloads of the fleet snapshot, which also pick up
+# rows changed without a change log entry (queryset updates, raw SQL);
+# log entries older than two intervals are pruned
+TASKS_SNAPSHOT_FULL_RELOAD = 15 * 60
+# Per-request SQL count/time headers and per-endpoint query stats
+TASKS_QUERY_STATS = False
+# Clients allowed to read /api/metrics/
+TASKS_METRICS_IPS = ['127.0.0.1', '::1']
+# Cache alias holding Celery task metrics; workers record them and the web
+# process serves them, so a per-process backend is refused at startup
+TASKS_METRICS_CACHE = 'metrics'
+# Cache alias for versioned GET responses, None disables the cache. Celery
+# workers bump the versions too, so the alias must be shared by every process
+# (redis, memcached); a per-process backend is refused at startup
+TASKS_RESPONSE_CACHE = 'responses'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/1',
+        # Responses expire after TIMEOUT, versions never do. Run this redis
+        # with a maxmemory and "maxmemory-policy volatile-lru": once full it
+        # then evicts the least recently used responses, never the versions
+        # or the Celery broker keys on the same instance. The redis default,
+        # noeviction, fails every cache write once memory is full.
+        'TIMEOUT': 300,
+    },
+    'metrics': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/2',
+        'TIMEOUT': None,
+    },
+}
+
 CELERY_BROKER_URL = 'redis://localhost:6379'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379'
 CELERY_ACCEPT_CONTENT = ['application/json']
@@ -98,4 +154,8 @@ CELERY_BEAT_SCHEDULE = {
             'task': 'apps.tasks.tasks.update_daily_due_dates',
             'schedule': 10.0  # crontab()
         },
+        'prune_due_state_changes': {
+            'task': 'apps.tasks.tasks.prune_due_state_changes',
+            'schedule': 60 * 60
+        },
     }
@@ -19,11 +19,19 @@ from django.urls import path
 
 from ninja import NinjaAPI
 
-from apps.tasks.api import router as tasks_router
+from apps.tasks.api import (
+    router as tasks_router,
+    cws_router,
+    export_router,
+    metrics_router
+)
 
 api = NinjaAPI()
 
 api.add_router("tasks/", tasks_router)
+api.add_router("cws/", cws_router)
+api.add_router("export/", export_router)
+api.add_router("metrics/", metrics_router)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
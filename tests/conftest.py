@@ -0,0 +1,47 @@
+import pytest
+from django.core.cache import caches
+
+from apps.tasks.snapshot import fleet
+from config.celery import app as celery_app
+
+
+@pytest.fixture(autouse=True)
+def celery_eager():
+    celery_app.conf.task_always_eager = True
+    yield
+    celery_app.conf.task_always_eager = False
+
+
+@pytest.fixture(autouse=True)
+def recompute_immediately(settings):
+    settings.TASKS_RECOMPUTE_DEBOUNCE = 0
+    settings.TASKS_RECOMPUTE_OVERLAP = 0
+
+
+@pytest.fixture(autouse=True)
+def shared_caches(settings):
+    # One test process, so per-process caches see every write; tests that
+    # need the configured redis aliases swap them back in.
+    settings.CACHES = {
+        **settings.CACHES,
+        "responses": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "tasks-responses",
+        },
+        "metrics": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "celery-metrics",
+            "TIMEOUT": None,
+        },
+    }
+    settings.TASKS_RESPONSE_CACHE = "responses"
+    settings.TASKS_METRICS_CACHE = "metrics"
+    yield
+    caches["responses"].clear()
+    caches["metrics"].clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_fleet_snapshot():
+    yield
+    fleet.reset()
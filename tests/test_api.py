@@ -415,3 +415,49 @@ def test_get_tasks_with_next_due_date():
     cw.save()
 
     assert not cw.next_due_date
+
+
+@pytest.mark.parametrize('tasks_count', [1, 5, 20])
+@pytest.mark.django_db
+def test_get_tasks_query_count(client, django_assert_num_queries, tasks_count):
+    for num in range(tasks_count):
+        task = Task.objects.create(code=f'TASK-{num}', description='long_str')
+        CW.objects.create(
+            task=task,
+            perform_date=datetime.date(2023, 12, 1),
+            next_due_date=datetime.date(2024, 6, 1),
+            next_due_hrs=100.5
+        )
+        CW.objects.create(
+            task=task,
+            perform_date=datetime.date(2023, 6, 1),
+            next_due_date=datetime.date(2023, 12, 1)
+        )
+
+    with django_assert_num_queries(2):
+        response = client.get('/api/tasks/')
+
+    assert response.status_code == 200
+    items = json.loads(response.content)['items']
+    assert len(items) == tasks_count
+    for item in items:
+        assert item['next_due_date'] == '2024-06-01'
+        assert item['next_due_hrs'] == 100.5
+        assert item['next_due_cycles'] is None
+
+
+@pytest.mark.django_db
+def test_get_cws_query_count(client, django_assert_num_queries):
+    task = Task.objects.create(code='00-IJM-001', description='long_str')
+    for num in range(1, 6):
+        CW.objects.create(
+            task=task,
+            perform_date=datetime.date(2023, num, 1),
+            next_due_date=datetime.date(2024, num, 1)
+        )
+
+    with django_assert_num_queries(4):
+        response = client.get(f'/api/tasks/{task.pk}/cws/')
+
+    items = json.loads(response.content)['items']
+    assert {item['task']['next_due_date'] for item in items} == {'2024-05-01'}
@@ -0,0 +1,72 @@
+import pytest
+import json
+import datetime
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+
+from apps.tasks.models import Task, CW, Requirements
+
+
+def asgi_get(path, params=None):
+    # Runs the request through the ASGI handler, not the WSGI test client.
+    response = async_to_sync(AsyncClient().get)(path, params or {})
+    return response.status_code, json.loads(response.content or "null")
+
+
+@pytest.fixture
+def task():
+    task = Task.objects.create(code="00-IJM-001", description="long_str")
+    Requirements.objects.create(task=task, due_months=6, is_active=True)
+    for month in (1, 6):
+        CW.objects.create(
+            task=task,
+            perform_date=datetime.date(2023, month, 1),
+            next_due_date=datetime.date(2024, month, 1)
+        )
+    return task
+
+
+@pytest.mark.django_db
+def test_async_task_list(task):
+    Task.objects.create(code="00-IJM-000", description="long_str")
+
+    status, page = asgi_get("/api/tasks/")
+    assert status == 200
+    assert page["count"] == 2
+    assert [item["code"] for item in page["items"]] == [
+        "00-IJM-000", "00-IJM-001"
+    ]
+    assert page["items"][1]["next_due_date"] == "2024-06-01"
+
+    status, page = asgi_get("/api/tasks/", {"cursor": "", "limit": 1})
+    assert [item["code"] for item in page["items"]] == ["00-IJM-000"]
+    status, page = asgi_get("/api/tasks/", {"cursor": page["next"]})
+    assert [item["code"] for item in page["items"]] == ["00-IJM-001"]
+
+
+@pytest.mark.django_db
+def test_async_task_detail(task):
+    status, item = asgi_get(f"/api/tasks/{task.pk}/")
+    assert status == 200
+    assert item["next_due_date"] == "2024-06-01"
+
+    status, _ = asgi_get(f"/api/tasks/{task.pk + 1}/")
+    assert status == 404
+
+
+@pytest.mark.django_db
+def test_async_cws_and_requirements(task):
+    status, page = asgi_get(f"/api/tasks/{task.pk}/cws/")
+    assert status == 200
+    assert [item["perform_date"] for item in page["items"]] == [
+        "2023-01-01", "2023-06-01"
+    ]
+    assert {item["task"]["next_due_date"] for item in page["items"]} == {
+        "2024-06-01"
+    }
+
+    status, reqs = asgi_get(f"/api/tasks/{task.pk}/requirements/")
+    assert status == 200
+    assert [req["due_months"] for req in reqs] == [6]
+    assert reqs[0]["task"]["next_due_date"] == "2024-06-01"
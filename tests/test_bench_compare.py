@@ -0,0 +1,35 @@
+from benchmarks.compare import compare
+
+
+def results(p95, create_cw, tasks_per_sec):
+    return {
+        "create_cw": {"p95_ms": create_cw},
+        "endpoints": {"GET /api/tasks/": {"p95_ms": p95}},
+        "update_daily_due_dates": {"tasks_per_sec": tasks_per_sec},
+    }
+
+
+def test_compare_flags_regressions_past_threshold():
+    rows = compare(
+        results(10.0, 5.0, 1000),
+        results(12.5, 5.5, 700),
+        threshold=0.2
+    )
+
+    assert {row["name"]: row["regressed"] for row in rows} == {
+        "create_cw p95 ms": False,
+        "GET /api/tasks/ p95 ms": True,
+        "update_daily_due_dates tasks/s": True,
+    }
+
+
+def test_compare_skips_endpoints_missing_in_head():
+    head = results(10.0, 5.0, 1000)
+    head["endpoints"] = {}
+
+    rows = compare(results(10.0, 5.0, 1000), head, threshold=0.2)
+
+    assert [row["name"] for row in rows] == [
+        "create_cw p95 ms",
+        "update_daily_due_dates tasks/s",
+    ]
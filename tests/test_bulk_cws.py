@@ -0,0 +1,113 @@
+import pytest
+import json
+import datetime
+
+from apps.tasks import services
+from apps.tasks.models import Task, CW, Requirements, TaskDueState
+
+
+@pytest.fixture
+def tasks():
+    tasks = []
+    for num in range(3):
+        task = Task.objects.create(code=f"TASK-{num}", description="long_str")
+        Requirements.objects.create(
+            task=task,
+            due_months=6,
+            mos_unit="D",
+            pos_tol_mos=30,
+            neg_tol_mos=-30,
+            hrs_unit="E",
+            afl_unit="E",
+            is_active=True
+        )
+        CW.objects.create(
+            task=task,
+            perform_date=datetime.date(2023, 1, 1),
+            next_due_date=datetime.date(2023, 7, 1)
+        )
+        tasks.append(task)
+    return tasks
+
+
+@pytest.mark.django_db
+def test_bulk_create_cws(client, tasks, monkeypatch, django_assert_num_queries):
+    scheduled = []
+    monkeypatch.setattr(
+        services.dispatcher,
+        "send",
+        scheduled.append
+    )
+    payload = [
+        {"task_id": tasks[0].pk, "perform_date": "2024-01-10"},
+        {"task_id": tasks[0].pk, "perform_date": "2023-06-25"},
+        {"task_id": tasks[1].pk, "perform_date": "2022-12-01"},
+        {"task_id": tasks[2].pk, "perform_date": "2023-07-01"},
+        {"task_id": tasks[2].pk, "perform_date": "2023-07-01"},
+        {"task_id": 0, "perform_date": "2023-07-01"},
+    ]
+
+    # Includes the due state change log insert.
+    with django_assert_num_queries(12):
+        response = client.post(
+            '/api/cws/bulk/',
+            json.dumps(payload),
+            content_type='application/json'
+        )
+
+    assert response.status_code == 200
+    results = json.loads(response.content)
+    assert [bool(result["pk"]) for result in results] == [
+        True, True, False, True, False, False
+    ]
+    assert results[2]["error"] == "2022-12-01 is before latest compliance"
+    assert results[5]["error"] == "No such Task"
+    assert scheduled == [[tasks[0].pk, tasks[2].pk]]
+
+    adjusted = CW.objects.get(pk=results[1]["pk"])
+    assert adjusted.adjusted_days == -6
+    assert adjusted.next_due_date == datetime.date(2024, 1, 1)
+    assert CW.objects.get(pk=results[0]["pk"]).adjusted_days == 9
+    assert TaskDueState.objects.get(task=tasks[0]).compliance_id == (
+        results[0]["pk"]
+    )
+
+
+@pytest.mark.django_db
+def test_bulk_item_without_hours(client):
+    task = Task.objects.create(code="TASK-HRS", description="long_str")
+    Requirements.objects.create(
+        task=task,
+        due_months=6,
+        due_hrs=100,
+        mos_unit="D",
+        pos_tol_mos=30,
+        neg_tol_mos=-30,
+        hrs_unit="H",
+        pos_tol_hrs=10,
+        neg_tol_hrs=-10,
+        afl_unit="E",
+        is_active=True
+    )
+    CW.objects.create(
+        task=task,
+        perform_date=datetime.date(2023, 1, 1),
+        perform_hours=100,
+        next_due_date=datetime.date(2023, 7, 1),
+        next_due_hrs=200
+    )
+    payload = [
+        {"task_id": task.pk, "perform_date": "2023-06-25"},
+    ]
+
+    response = client.post(
+        '/api/cws/bulk/',
+        json.dumps(payload),
+        content_type='application/json'
+    )
+
+    assert response.status_code == 200
+    [result] = json.loads(response.content)
+    assert result["error"] is None
+    cw = CW.objects.get(pk=result["pk"])
+    assert (cw.adjusted_days, cw.adjusted_hrs) == (-6, 0)
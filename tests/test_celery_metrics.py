@@ -0,0 +1,146 @@
+import pytest
+import time
+import datetime
+import threading
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+from config.celery import app as celery_app
+from apps.tasks.celery_metrics import (
+    add_series,
+    registered_series,
+    render_metrics,
+    reset_metrics
+)
+from apps.tasks.models import Task, CW, Requirements
+from apps.tasks.response_cache import check_shared_cache
+from apps.tasks.tasks import update_next_due_dates, update_daily_due_dates
+
+
+@pytest.fixture(autouse=True)
+def metrics():
+    reset_metrics()
+    yield
+    reset_metrics()
+
+
+@celery_app.task
+def failing_task():
+    raise ValueError("boom")
+
+
+def samples(text):
+    return dict(
+        line.rsplit(" ", 1) for line in text.splitlines()
+        if line and not line.startswith("#")
+    )
+
+
+@pytest.mark.django_db
+def test_recompute_run_metrics(settings):
+    settings.TASKS_RECOMPUTE_FULL_SWEEP = 0
+    task = Task.objects.create(code="00-IJM-001", description="long_str")
+    Requirements.objects.create(task=task, due_months=6, is_active=True)
+    CW.objects.create(task=task, perform_date=datetime.date(2023, 1, 1))
+    Task.objects.create(code="00-IJM-002", description="no cws")
+
+    update_daily_due_dates.delay()
+    update_daily_due_dates.delay()
+
+    text = render_metrics()
+    values = samples(text)
+    name = 'task="apps.tasks.tasks.update_daily_due_dates"'
+    assert "# TYPE celery_task_duration_seconds histogram" in text
+    assert values[f"celery_task_duration_seconds_count{{{name}}}"] == "2"
+    assert values[
+        f'celery_task_duration_seconds_bucket{{{name},le="+Inf"}}'
+    ] == "2"
+    assert float(values[f"celery_task_duration_seconds_sum{{{name}}}"]) > 0
+    assert values[
+        f'celery_tasks_total{{{name},state="SUCCESS"}}'
+    ] == "2"
+
+    # The nightly totals are reported by the fan-out's aggregation step.
+    name = 'task="apps.tasks.tasks.aggregate_due_dates"'
+    assert values[f"recompute_tasks_processed_total{{{name}}}"] == "4"
+    assert values[f"recompute_tasks_updated_total{{{name}}}"] == "1"
+    assert values[f"recompute_last_run_processed{{{name}}}"] == "2"
+
+
+@pytest.mark.django_db
+def test_queue_latency_from_publish_header():
+    update_next_due_dates.apply(
+        args=[[]],
+        headers={"enqueued_at": time.time() - 2}
+    )
+
+    values = samples(render_metrics())
+    name = 'task="apps.tasks.tasks.update_next_due_dates"'
+    assert values[f"celery_task_queue_latency_seconds_count{{{name}}}"] == "1"
+    assert values[
+        f'celery_task_queue_latency_seconds_bucket{{{name},le="1"}}'
+    ] == "0"
+    assert values[
+        f'celery_task_queue_latency_seconds_bucket{{{name},le="5"}}'
+    ] == "1"
+
+
+def test_failures_are_counted():
+    failing_task.apply()
+
+    values = samples(render_metrics())
+    name = f'task="{failing_task.name}"'
+    assert values[f"celery_task_failures_total{{{name}}}"] == "1"
+    assert values[f'celery_tasks_total{{{name},state="FAILURE"}}'] == "1"
+
+
+def test_metrics_endpoint(client):
+    failing_task.apply()
+
+    response = client.get("/api/metrics/celery/")
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    assert b"celery_task_failures_total" in response.content
+
+
+def test_concurrent_workers_keep_every_series():
+    cache = caches["metrics"]
+    barrier = threading.Barrier(2)
+
+    class RacingCache:
+        # Both workers read the registry before either one writes to it.
+        def get_many(self, keys):
+            found = cache.get_many(keys)
+            barrier.wait(timeout=5)
+            return found
+
+        def __getattr__(self, name):
+            return getattr(cache, name)
+
+    workers = [
+        threading.Thread(target=add_series, args=(RacingCache(), series))
+        for series in (["a", "shared"], ["b", "shared"])
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(registered_series(cache)) == ["a", "b", "shared"]
+
+
+def test_metrics_cache_must_be_shared(settings):
+    with pytest.raises(ImproperlyConfigured):
+        check_shared_cache("TASKS_METRICS_CACHE")
+
+    settings.CACHES = {
+        **settings.CACHES,
+        "shared": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": "redis://localhost:6379/2",
+        },
+    }
+    settings.TASKS_METRICS_CACHE = "shared"
+    check_shared_cache("TASKS_METRICS_CACHE")
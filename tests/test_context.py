@@ -0,0 +1,73 @@
+import pytest
+import datetime
+
+from apps.tasks import services
+from apps.tasks.context import TaskContext
+from apps.tasks.interval_maths import get_mos_span, check_adjustment
+from apps.tasks.models import Task, CW, Requirements
+
+
+@pytest.fixture
+def task():
+    task = Task.objects.create(code="00-IJM-001", description="long_str")
+    Requirements.objects.create(
+        task=task,
+        due_months=6,
+        mos_unit="D",
+        pos_tol_mos=30,
+        neg_tol_mos=-30,
+        hrs_unit="E",
+        afl_unit="E",
+        is_active=True
+    )
+    for perform_date, next_due_date in [
+        (datetime.date(2023, 1, 1), datetime.date(2023, 7, 1)),
+        (datetime.date(2023, 7, 1), datetime.date(2024, 1, 1)),
+    ]:
+        CW.objects.create(
+            task=task,
+            perform_date=perform_date,
+            next_due_date=next_due_date
+        )
+    return task
+
+
+@pytest.mark.django_db
+def test_context_matches_task(task, django_assert_num_queries):
+    with django_assert_num_queries(3):
+        ctx = TaskContext.load(task.pk)
+
+    with django_assert_num_queries(0):
+        spans = get_mos_span(ctx)
+        adjusted = check_adjustment(
+            ctx,
+            {"perform_date": datetime.date(2023, 12, 20)}
+        )
+
+    assert ctx.compliance == task.compliance
+    assert ctx.prev_compliance.perform_date == datetime.date(2023, 1, 1)
+    assert ctx.curr_requirements == task.curr_requirements
+    assert spans == get_mos_span(task)
+    assert adjusted
+
+
+@pytest.mark.django_db
+def test_create_cw_query_count(task, monkeypatch, django_assert_num_queries):
+    scheduled = []
+    monkeypatch.setattr(
+        services.dispatcher,
+        "send",
+        scheduled.append
+    )
+
+    # Includes the due state change log insert.
+    with django_assert_num_queries(6):
+        cw = services.create_cw(
+            task.pk,
+            {"perform_date": datetime.date(2023, 12, 20)}
+        )
+
+    assert cw.adjusted_days == -12
+    assert scheduled == [[task.pk]]
+    assert task.due_state.compliance_id == cw.pk
+    assert task.due_state.next_due_date == datetime.date(2024, 7, 1)
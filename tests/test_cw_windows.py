@@ -0,0 +1,128 @@
+import datetime
+
+import pytest
+
+from apps.tasks import services
+from apps.tasks.context import TaskContext
+from apps.tasks.interval_maths import get_spans
+from apps.tasks.models import Task, CW, Requirements
+from apps.tasks.recompute import recompute_next_due
+from apps.tasks.schemas import ReqIn
+
+
+def create_task(code, perform_date=datetime.date(2023, 1, 1)):
+    task = Task.objects.create(code=code, description="")
+    Requirements.objects.create(
+        task=task,
+        due_months=6,
+        due_hrs=100,
+        mos_unit="D",
+        pos_tol_mos=30,
+        neg_tol_mos=-30,
+        hrs_unit="H",
+        pos_tol_hrs=10,
+        neg_tol_hrs=-10,
+        afl_unit="E",
+        is_active=True
+    )
+    CW.objects.create(
+        task=task,
+        perform_date=perform_date,
+        perform_hours=200
+    )
+    return task
+
+
+@pytest.fixture
+def task():
+    task = create_task("00-IJM-001")
+    recompute_next_due([task.pk])
+    return task
+
+
+@pytest.mark.django_db
+def test_recompute_stores_windows(task):
+    cw = task.compliance
+
+    assert cw.next_due_date == datetime.date(2023, 7, 1)
+    assert cw.mos_window_start == datetime.date(2023, 6, 1)
+    assert cw.mos_window_end == datetime.date(2023, 7, 31)
+    assert (cw.hrs_window_start, cw.hrs_window_end) == (290, 310)
+    assert cw.afl_window_start is cw.afl_window_end is None
+
+
+@pytest.mark.django_db
+def test_adjustment_check_reads_stored_windows(
+        task,
+        django_assert_num_queries
+        ):
+    ctx = TaskContext.load(task.pk)
+    ctx.compliance.mos_window_start = datetime.date(2023, 6, 20)
+
+    with django_assert_num_queries(0):
+        spans = get_spans(ctx)
+
+    assert spans["mos_neg"] == datetime.date(2023, 6, 20)
+    assert spans["hrs_pos"] == 310
+
+
+@pytest.mark.django_db
+def test_spans_fall_back_without_stored_windows(task):
+    CW.objects.filter(task=task).update(
+        mos_window_start=None,
+        mos_window_end=None,
+        hrs_window_start=None,
+        hrs_window_end=None
+    )
+
+    spans = get_spans(TaskContext.load(task.pk))
+
+    assert spans["mos_neg"] == datetime.date(2023, 6, 1)
+    assert spans["hrs_pos"] == 310
+
+
+@pytest.mark.django_db
+def test_requirement_changes_refresh_windows(task):
+    services.create_requirements(task.pk, ReqIn(
+        due_months=6,
+        mos_unit="D",
+        pos_tol_mos=10,
+        neg_tol_mos=-10,
+        hrs_unit="E",
+        afl_unit="E",
+        is_active=True
+    ))
+
+    cw = task.compliance
+    assert cw.mos_window_start == datetime.date(2023, 6, 21)
+    assert cw.mos_window_end == datetime.date(2023, 7, 11)
+    assert cw.hrs_window_start is cw.hrs_window_end is None
+
+    services.update_requirements(
+        task.pk,
+        task.curr_requirements.pk,
+        ReqIn(pos_tol_mos=20)
+    )
+
+    cw.refresh_from_db()
+    assert cw.mos_window_end == datetime.date(2023, 7, 21)
+
+
+@pytest.mark.django_db
+def test_cws_in_window_uses_latest_cw(task):
+    other = create_task("00-IJM-002", datetime.date(2023, 3, 1))
+    recompute_next_due([other.pk])
+    # An older CW whose window would match is ignored.
+    CW.objects.create(
+        task=other,
+        perform_date=datetime.date(2022, 12, 1),
+        mos_window_start=datetime.date(2023, 6, 1),
+        mos_window_end=datetime.date(2023, 7, 31)
+    )
+
+    cws = services.get_cws_in_window("mos", datetime.date(2023, 6, 15))
+
+    assert [cw.task_id for cw in cws] == [task.pk]
+    assert [
+        cw.task_id for cw in services.get_cws_in_window("hrs", 305)
+    ] == [task.pk, other.pk]
@@ -0,0 +1,85 @@
+import pytest
+import datetime
+from collections import Counter
+
+from apps.tasks import services
+from apps.tasks.dispatch import RecomputeDispatcher
+from apps.tasks.models import Task, CW, Requirements
+
+
+class Recorder:
+    def __init__(self):
+        self.messages = []
+
+    def __call__(self, task_ids):
+        self.messages.append(task_ids)
+
+
+def test_dispatcher_coalesces_writes():
+    send = Recorder()
+    dispatcher = RecomputeDispatcher(interval=60, send=send)
+
+    dispatcher.mark_dirty([3])
+    dispatcher.mark_dirty([1, 3])
+    dispatcher.mark_dirty([3])
+    assert send.messages == []
+    assert dispatcher.stats()["pending"] == 2
+
+    assert dispatcher.flush() == [1, 3]
+    assert send.messages == [[1, 3]]
+    assert dispatcher.timer is None
+    assert dispatcher.stats() == {
+        "requested": 3,
+        "sent": 1,
+        "saved": 2,
+        "duplicates": 2,
+        "tasks_sent": 2,
+        "pending": 0,
+    }
+
+    assert dispatcher.flush() == []
+    assert send.messages == [[1, 3]]
+
+
+def test_dispatcher_without_interval_sends_right_away():
+    send = Recorder()
+    dispatcher = RecomputeDispatcher(interval=0, send=send)
+
+    dispatcher.mark_dirty([2])
+    dispatcher.mark_dirty([2])
+    dispatcher.mark_dirty([])
+
+    assert send.messages == [[2], [2]]
+    assert dispatcher.stats()["saved"] == 0
+
+
+def test_dispatcher_timer_flushes():
+    send = Recorder()
+    dispatcher = RecomputeDispatcher(interval=0.01, send=send)
+
+    dispatcher.mark_dirty([5])
+    dispatcher.timer.join(1)
+
+    assert send.messages == [[5]]
+
+
+@pytest.mark.django_db
+def test_cw_writes_share_one_recompute(monkeypatch):
+    send = Recorder()
+    monkeypatch.setattr(services.dispatcher, "send", send)
+    monkeypatch.setattr(services.dispatcher, "counters", Counter())
+    monkeypatch.setattr(services.dispatcher, "_interval", 60)
+
+    task = Task.objects.create(code="00-IJM-001", description="long_str")
+    Requirements.objects.create(task=task, due_months=6, is_active=True)
+    for month in (1, 2, 3):
+        services.create_cw(
+            task.pk,
+            {"perform_date": datetime.date(2023, month, 1)}
+        )
+    services.update_tasks(task.pk, {"code": "00-IJM-002", "description": ""})
+
+    services.dispatcher.flush()
+    assert send.messages == [[task.pk]]
+    assert services.get_dispatch_stats()["saved"] == 3
+    assert CW.objects.filter(task=task).count() == 3
@@ -0,0 +1,111 @@
+import pytest
+import json
+import datetime
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.tasks.models import Task, CW, Requirements, TaskDueState
+from apps.tasks.schemas import ReqIn
+from apps.tasks.services import (
+    create_cw,
+    delete_cw,
+    create_requirements,
+    delete_task
+)
+
+
+@pytest.fixture
+def task():
+    task = Task.objects.create(code="00-IJM-001", description="long_str")
+    create_requirements(
+        task.pk,
+        ReqIn(
+            due_months=6,
+            mos_unit="D",
+            pos_tol_mos=30,
+            neg_tol_mos=-30,
+            is_active=True
+        )
+    )
+    return task
+
+
+@pytest.mark.parametrize(
+    'months_ago,status',
+    [
+        (1, TaskDueState.Status.OK),
+        (6, TaskDueState.Status.IN_WINDOW),
+        (9, TaskDueState.Status.OVERDUE),
+    ]
+)
+@pytest.mark.django_db
+def test_due_state_follows_cw_writes(task, months_ago, status):
+    perform_date = timezone.now().date() - datetime.timedelta(
+        days=months_ago * 30
+    )
+    cw = create_cw(task.pk, {"perform_date": perform_date})
+
+    state = TaskDueState.objects.get(task=task)
+    assert state.compliance_id == cw.pk
+    assert state.next_due_date == CW.objects.get(pk=cw.pk).next_due_date
+    assert state.mos_neg == state.next_due_date - datetime.timedelta(days=30)
+    assert state.mos_pos == state.next_due_date + datetime.timedelta(days=30)
+    assert state.status == status
+
+
+@pytest.mark.django_db
+def test_due_state_follows_requirements_and_deletes(task):
+    cw = create_cw(task.pk, {"perform_date": datetime.date(2023, 12, 1)})
+    assert TaskDueState.objects.get(task=task).next_due_date == (
+        datetime.date(2024, 6, 1)
+    )
+
+    create_requirements(task.pk, ReqIn(due_months=3, is_active=True))
+    state = TaskDueState.objects.get(task=task)
+    assert state.next_due_date == datetime.date(2024, 3, 1)
+    assert state.mos_neg is None
+    assert Requirements.objects.filter(task=task, is_active=True).count() == 1
+
+    delete_cw(cw.pk)
+    assert TaskDueState.objects.filter(task=task).exists()
+
+    delete_task(task.pk)
+    assert not TaskDueState.objects.filter(task=task).exists()
+
+
+@pytest.mark.django_db
+def test_get_due_states_by_status(client, task):
+    create_cw(task.pk, {"perform_date": datetime.date(2023, 12, 1)})
+
+    response = client.get('/api/tasks/due-states/?status=overdue')
+    assert response.status_code == 200
+    items = json.loads(response.content)["items"]
+    assert [item["task"]["pk"] for item in items] == [task.pk]
+
+    response = client.get('/api/tasks/due-states/?status=ok')
+    assert json.loads(response.content)["count"] == 0
+
+
+@pytest.mark.django_db
+def test_get_due_states_query_count_is_flat(client):
+    def count_queries(size):
+        for num in range(size):
+            task = Task.objects.create(code=f"00-IJM-{num:03}", description="")
+            Requirements.objects.create(
+                task=task,
+                due_months=6,
+                is_active=True
+            )
+            create_cw(task.pk, {"perform_date": datetime.date(2023, 12, 1)})
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/tasks/due-states/')
+        items = json.loads(response.content)["items"]
+        assert len(items) == size
+        assert items[0]["task"]["next_due_date"] == "2024-06-01"
+        TaskDueState.objects.all().delete()
+        Task.objects.all().delete()
+        return len(queries)
+
+    assert count_queries(2) == count_queries(10)
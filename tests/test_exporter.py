@@ -0,0 +1,82 @@
+import pytest
+import csv
+import io
+import json
+import datetime
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+
+from apps.tasks.models import Task, CW
+
+
+@pytest.fixture
+def cws():
+    cws = []
+    for num in range(3):
+        task = Task.objects.create(code=f"TASK-{num}", description="long_str")
+        for month in range(1, 4):
+            cws.append(CW.objects.create(
+                task=task,
+                perform_date=datetime.date(2023, month, 1),
+                perform_hours=month * 10.5
+            ))
+    cws[0].delete()
+    return cws
+
+
+def streamed(response):
+    return b"".join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_export_cws_ndjson(client, cws, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        response = client.get('/api/export/cws/')
+        rows = [json.loads(line) for line in streamed(response).splitlines()]
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    assert [row["pk"] for row in rows] == [cw.pk for cw in cws[1:]]
+    assert rows[0]["task_code"] == "TASK-0"
+    assert rows[0]["perform_date"] == "2023-02-01"
+    assert rows[0]["perform_hours"] == 21.0
+
+
+@pytest.mark.django_db
+def test_export_streams_async_under_asgi(cws):
+    async def export(path):
+        response = await AsyncClient().get(path)
+        chunks = [chunk async for chunk in response.streaming_content]
+        return response, b"".join(chunks).decode()
+
+    response, content = async_to_sync(export)('/api/export/cws/')
+
+    assert response.is_async
+    rows = [json.loads(line) for line in content.splitlines()]
+    assert [row["pk"] for row in rows] == [cw.pk for cw in cws[1:]]
+
+    response, content = async_to_sync(export)('/api/export/tasks/?format=csv')
+    assert response.is_async
+    assert content.splitlines()[0] == (
+        "pk,code,description,created_at,updated_at"
+    )
+
+
+@pytest.mark.django_db
+def test_export_tasks_csv(client, cws):
+    response = client.get('/api/export/tasks/?format=csv')
+    rows = list(csv.DictReader(io.StringIO(streamed(response))))
+
+    assert response["Content-Type"] == "text/csv"
+    assert [row["code"] for row in rows] == ["TASK-0", "TASK-1", "TASK-2"]
+
+
+@pytest.mark.parametrize(
+    'url',
+    ['/api/export/nope/', '/api/export/cws/?format=xml']
+)
+@pytest.mark.django_db
+def test_export_rejects_unknown(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
@@ -0,0 +1,97 @@
+import datetime
+import logging
+from unittest import mock
+
+import pytest
+
+from apps.tasks.models import Task, CW, Requirements, TaskDueState
+from apps.tasks.recompute import pk_ranges, recompute_next_due
+from apps.tasks.tasks import due_dates_chord, update_daily_due_dates
+
+
+def create_fleet(size):
+    tasks = []
+    for index in range(size):
+        task = Task.objects.create(code=f"00-IJM-{index:03}", description="")
+        Requirements.objects.create(task=task, due_months=6, is_active=True)
+        CW.objects.create(task=task, perform_date=datetime.date(2023, 1, 1))
+        tasks.append(task)
+    # One task without CWs, one deleted task
+    tasks.append(Task.objects.create(code="00-IJM-900", description=""))
+    Task.objects.create(code="00-IJM-901", description="").delete()
+    CW.objects.update(next_due_date=None)
+    return tasks
+
+
+@pytest.mark.django_db
+def test_pk_ranges_cover_active_tasks():
+    tasks = create_fleet(4)
+    pks = [task.pk for task in tasks]
+
+    assert pk_ranges(2) == [
+        (pks[0], pks[1]),
+        (pks[2], pks[3]),
+        (pks[4], pks[4]),
+    ]
+    assert pk_ranges(10) == [(pks[0], pks[4])]
+
+
+@pytest.mark.django_db
+def test_fanout_totals_match_serial_recompute():
+    tasks = create_fleet(5)
+
+    totals = due_dates_chord(pk_ranges(2)).apply().get()
+
+    assert totals == {
+        "processed": 6,
+        "updated": 5,
+        "chunks": 3,
+        "failed": 0,
+        "failed_ranges": [],
+    }
+    assert not CW.objects.filter(next_due_date__isnull=True).exists()
+    assert TaskDueState.objects.count() == 6
+
+    CW.objects.update(next_due_date=None)
+    assert recompute_next_due([task.pk for task in tasks]) == (6, 5)
+
+
+@pytest.mark.django_db
+def test_fanout_reports_failed_ranges(caplog):
+    tasks = create_fleet(4)
+    ranges = pk_ranges(2)
+
+    with mock.patch(
+            "apps.tasks.tasks.recompute_range",
+            side_effect=[(2, 2), RuntimeError("db gone"), (1, 0)]
+            ), caplog.at_level(logging.INFO, logger="apps.tasks.tasks"):
+        totals = due_dates_chord(ranges).apply().get()
+
+    assert totals["processed"] == 3
+    assert totals["updated"] == 2
+    assert totals["chunks"] == 3
+    assert totals["failed"] == 1
+    assert totals["failed_ranges"] == [[tasks[2].pk, tasks[3].pk]]
+    assert caplog.messages[-1] == (
+        "Due dates updated: 2 of 3 tasks changed in 3 chunks, 1 failed"
+    )
+
+
+@pytest.mark.django_db
+def test_update_daily_due_dates_fans_out(settings):
+    settings.TASKS_RECOMPUTE_RANGE_SIZE = 2
+    create_fleet(3)
+
+    assert update_daily_due_dates.delay().get() == {
+        "mode": "full",
+        "chunks": 2,
+    }
+    assert not CW.objects.filter(next_due_date__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_update_daily_due_dates_without_tasks():
+    assert update_daily_due_dates.delay().get() == {
+        "mode": "full",
+        "chunks": 0,
+    }
@@ -0,0 +1,48 @@
+import pytest
+import json
+import datetime
+
+from django.utils import timezone
+
+from apps.tasks.due_state import refresh_due_states
+from apps.tasks.models import Task, CW, Requirements
+
+
+def seed_task(code, days_ago, perform_hours=None, **req_payload):
+    task = Task.objects.create(code=code, description="long_str")
+    Requirements.objects.create(task=task, is_active=True, **req_payload)
+    CW.objects.create(
+        task=task,
+        perform_date=timezone.now().date() - datetime.timedelta(days=days_ago),
+        perform_hours=perform_hours
+    )
+    refresh_due_states([task.pk])
+    return task
+
+
+@pytest.mark.django_db
+def test_forecast_whichever_comes_first(client):
+    today = timezone.now().date()
+    by_date = seed_task("BY-DATE", 170, due_months=6)
+    by_hours = seed_task(
+        "BY-HOURS", 10, perform_hours=1000, due_months=24, due_hrs=200
+    )
+    seed_task("LATER", 10, due_months=12)
+
+    response = client.get('/api/tasks/forecast/?horizon=30')
+    assert response.status_code == 200
+    items = json.loads(response.content)["items"]
+
+    assert [item["task_id"] for item in items] == [by_date.pk, by_hours.pk]
+    assert items[0]["due_by"] == "date"
+    assert items[1]["due_by"] == "hours"
+    assert items[1]["next_due_hrs"] == 1200
+    assert items[1]["projected_due_date"] == (
+        today + datetime.timedelta(days=15)
+    ).isoformat()
+
+    response = client.get(
+        '/api/tasks/forecast/?horizon=30&hours_per_day=1'
+    )
+    items = json.loads(response.content)["items"]
+    assert [item["code"] for item in items] == ["BY-DATE"]
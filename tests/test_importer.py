@@ -0,0 +1,106 @@
+import pytest
+import io
+import json
+import datetime
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+
+from apps.tasks.models import Task, CW, Requirements
+from apps.tasks.importer import iter_rows, import_program
+
+
+PROGRAM_CSV = (
+    "code,description,due_months,due_hrs,mos_unit,pos_tol_mos,is_active\n"
+    "00-IJM-001,Inspect,6,,D,30,true\n"
+    "00-IJM-002,Lubricate,,500.125,,,true\n"
+    "00-IJM-003,Replace,,,,,\n"
+)
+
+
+@pytest.mark.django_db
+def test_import_program_csv():
+    stats = import_program(
+        iter_rows(io.BytesIO(PROGRAM_CSV.encode()), "csv"),
+        chunk_size=2
+    )
+
+    assert stats["rows"] == 3
+    assert stats["tasks_created"] == 3
+    assert stats["requirements_created"] == 2
+
+    req = Requirements.objects.get(task__code="00-IJM-001")
+    assert (req.due_months, req.mos_unit, req.pos_tol_mos) == (6, "D", 30)
+    assert req.hrs_unit == "E"
+    assert req.is_active
+    assert Requirements.objects.get(task__code="00-IJM-002").due_hrs == 500.12
+
+
+@pytest.mark.django_db
+def test_import_program_upserts_by_code(client):
+    task = Task.objects.create(code="00-IJM-001", description="old")
+    old_req = Requirements.objects.create(task=task, due_months=3, is_active=True)
+    CW.objects.create(task=task, perform_date=datetime.date(2023, 12, 1))
+    ndjson = "\n".join(json.dumps(row) for row in [
+        {"code": "00-IJM-001", "description": "new", "due_months": 12},
+        {"code": "00-IJM-004", "description": "Check"},
+    ])
+
+    response = client.post(
+        '/api/tasks/import/',
+        {"file": SimpleUploadedFile("program.ndjson", ndjson.encode())}
+    )
+
+    assert response.status_code == 200
+    stats = json.loads(response.content)
+    assert (stats["tasks_created"], stats["tasks_updated"]) == (1, 1)
+
+    task.refresh_from_db()
+    old_req.refresh_from_db()
+    assert task.description == "new"
+    assert not old_req.is_active
+    assert task.curr_requirements.due_months == 12
+    assert task.due_state.next_due_date == datetime.date(2024, 12, 1)
+    assert not Task.objects.get(code="00-IJM-004").requirements.exists()
+
+
+@pytest.mark.django_db
+def test_import_program_rejects_bad_rows(client, tmp_path):
+    response = client.post(
+        '/api/tasks/import/',
+        {"file": SimpleUploadedFile("program.csv", b"code,due_months\n,6\n")}
+    )
+    assert response.status_code == 400
+    assert json.loads(response.content)["message"] == (
+        "Row 1: code is required; 0 rows imported before it"
+    )
+
+    path = tmp_path / "program.csv"
+    path.write_text(PROGRAM_CSV)
+    out = io.StringIO()
+    call_command("import_program", str(path), stdout=out)
+    assert "rows/sec" in out.getvalue()
+    assert Task.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_import_program_recomputes_committed_chunks_on_error():
+    task = Task.objects.create(code="00-IJM-001", description="")
+    CW.objects.create(task=task, perform_date=datetime.date(2023, 12, 1))
+    rows = [
+        {"code": "00-IJM-001", "due_months": 12},
+        {"code": "00-IJM-002", "due_months": 6},
+        {"code": "", "due_months": 6},
+    ]
+
+    with mock.patch("apps.tasks.importer.enqueue_recompute") as enqueue:
+        with pytest.raises(ValidationError) as err:
+            import_program(rows, chunk_size=2)
+
+    assert err.value.message == (
+        "Row 3: code is required; 2 rows imported before it"
+    )
+    enqueue.assert_called_once_with({task.pk})
+    assert Requirements.objects.count() == 2
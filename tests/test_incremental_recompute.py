@@ -0,0 +1,108 @@
+import datetime
+from unittest import mock
+
+import pytest
+from django.utils import timezone
+
+from apps.tasks.models import Task, CW, Requirements, RecomputeMark
+from apps.tasks.recompute import changed_tasks
+from apps.tasks.tasks import update_daily_due_dates
+
+
+def create_task(code):
+    task = Task.objects.create(code=code, description="")
+    Requirements.objects.create(task=task, due_months=6, is_active=True)
+    CW.objects.create(task=task, perform_date=datetime.date(2023, 1, 1))
+    return task
+
+
+@pytest.fixture
+def swept():
+    tasks = [create_task(f"00-IJM-{index:03}") for index in range(3)]
+    assert update_daily_due_dates()["mode"] == "full"
+    return tasks
+
+
+@pytest.mark.django_db
+def test_idle_run_does_no_recompute(swept, django_assert_max_num_queries):
+    with django_assert_max_num_queries(3):
+        result = update_daily_due_dates()
+
+    assert result == {"mode": "incremental", "processed": 0, "updated": 0}
+
+
+@pytest.mark.django_db
+def test_only_changed_tasks_are_recomputed(swept):
+    task = swept[1]
+    cw = task.compliance
+    cw.next_due_date = None
+    cw.save()
+
+    result = update_daily_due_dates()
+
+    assert result == {"mode": "incremental", "processed": 1, "updated": 1}
+    cw.refresh_from_db()
+    assert cw.next_due_date == datetime.date(2023, 7, 1)
+    assert update_daily_due_dates()["processed"] == 0
+
+
+@pytest.mark.django_db
+def test_requirement_changes_are_picked_up(swept):
+    req = swept[0].curr_requirements
+    req.due_months = 12
+    req.save()
+
+    assert update_daily_due_dates()["processed"] == 1
+    assert swept[0].compliance.next_due_date == datetime.date(2024, 1, 1)
+
+
+@pytest.mark.django_db
+def test_changes_of_deleted_tasks_are_skipped(swept):
+    swept[2].compliance.save()
+    swept[2].delete()
+
+    assert changed_tasks(RecomputeMark.objects.get().changed_until) == (
+        [], swept[2].compliance.updated_at
+    )
+
+
+@pytest.mark.django_db
+def test_late_commits_behind_the_mark_are_picked_up(settings):
+    settings.TASKS_RECOMPUTE_OVERLAP = 60
+    tasks = [create_task(f"00-IJM-{index:03}") for index in range(3)]
+    assert update_daily_due_dates()["mode"] == "full"
+    # Stamped before the sweep read the rows, committed after it.
+    CW.objects.filter(task=tasks[1]).update(
+        next_due_date=None,
+        updated_at=timezone.now() - datetime.timedelta(seconds=30)
+    )
+
+    assert update_daily_due_dates()["processed"] == 3
+    assert tasks[1].compliance.next_due_date == datetime.date(2023, 7, 1)
+
+
+@pytest.mark.django_db
+def test_full_sweep_after_interval(swept, settings):
+    settings.TASKS_RECOMPUTE_FULL_SWEEP = 60
+    RecomputeMark.objects.update(
+        swept_at=timezone.now() - datetime.timedelta(seconds=61)
+    )
+
+    assert update_daily_due_dates() == {"mode": "full", "chunks": 1}
+    assert update_daily_due_dates()["mode"] == "incremental"
+
+
+@pytest.mark.django_db
+def test_failed_run_keeps_high_water_mark(swept):
+    before = RecomputeMark.objects.get().changed_until
+    swept[0].compliance.save()
+
+    with mock.patch(
+            "apps.tasks.tasks.recompute_next_due",
+            side_effect=RuntimeError("db gone")
+            ):
+        with pytest.raises(RuntimeError):
+            update_daily_due_dates()
+
+    assert RecomputeMark.objects.get().changed_until == before
+    assert update_daily_due_dates()["processed"] == 1
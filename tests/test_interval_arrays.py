@@ -0,0 +1,153 @@
+import pytest
+import random
+import datetime
+from copy import copy
+
+import numpy as np
+
+from apps.tasks.models import Task, CW, Requirements
+from apps.tasks.interval_maths import has_due_limits, set_next_due, cnt_spans
+from apps.tasks.interval_arrays import (
+    add_months,
+    round2,
+    cnt_fleet,
+    columns_from_objects,
+    load_fleet_columns
+)
+
+
+RESULT_FIELDS = (
+    "next_due_date",
+    "next_due_hrs",
+    "next_due_cycles",
+    "mos_neg",
+    "mos_pos",
+    "hrs_neg",
+    "hrs_pos",
+    "afl_neg",
+    "afl_pos",
+)
+
+
+def random_fleet(size, seed=7):
+    rnd = random.Random(seed)
+
+    def maybe(value):
+        return rnd.choice([None, 0, value])
+
+    rows = []
+    for _ in range(size):
+        perform_date = datetime.date(2020, 1, 1) + datetime.timedelta(
+            days=rnd.randrange(1500)
+        )
+        prev_cw = rnd.choice([None, CW(
+            perform_date=perform_date - datetime.timedelta(days=180),
+            perform_hours=maybe(round(rnd.uniform(0, 5000), 3)),
+            perform_cycles=maybe(round(rnd.uniform(0, 3000), 3)),
+            next_due_date=rnd.choice([None, perform_date]),
+        )])
+        cw = CW(
+            perform_date=perform_date,
+            perform_hours=maybe(round(rnd.uniform(0, 5000), 3)),
+            perform_cycles=maybe(round(rnd.uniform(0, 3000), 3)),
+            next_due_date=rnd.choice([None, perform_date]),
+            next_due_hrs=maybe(1000.0),
+            next_due_cycles=maybe(500.0),
+            adjusted_days=rnd.choice([0, 0, -3]),
+            adjusted_hrs=rnd.choice([0, 0, 1.5]),
+            adjusted_cycles=rnd.choice([0, 0, -2.0]),
+        )
+        req = rnd.choice([None, Requirements(
+            due_months=maybe(rnd.randrange(1, 40)),
+            due_hrs=maybe(round(rnd.uniform(1, 2000), 2)),
+            due_cycles=maybe(round(rnd.uniform(1, 2000), 2)),
+            mos_unit=rnd.choice(["M", "D", "P", "E", None]),
+            pos_tol_mos=maybe(rnd.choice([1, 2.5, 0.5, 15, 10.0, 30.25])),
+            neg_tol_mos=maybe(rnd.choice([-1, -1.5, -0.5, -15, -10.0])),
+            hrs_unit=rnd.choice(["H", "P", "E", None]),
+            pos_tol_hrs=maybe(rnd.choice([10, 12.5, 5])),
+            neg_tol_hrs=maybe(rnd.choice([-10, -12.5, -5])),
+            afl_unit=rnd.choice(["C", "P", "E", None]),
+            pos_tol_afl=maybe(rnd.choice([10, 12.5])),
+            neg_tol_afl=maybe(rnd.choice([-10, -12.5])),
+        )])
+        rows.append((req, cw, prev_cw))
+    return rows
+
+
+def scalar_result(req, cw, prev_cw):
+    cw = copy(cw)
+    if has_due_limits(req):
+        set_next_due(req, cw, prev_cw)
+    result = {
+        "next_due_date": cw.next_due_date,
+        "next_due_hrs": cw.next_due_hrs,
+        "next_due_cycles": cw.next_due_cycles,
+    }
+    if req:
+        result.update(cnt_spans(req, cw))
+    return result
+
+
+def as_python(value):
+    if isinstance(value, np.datetime64):
+        return None if np.isnat(value) else value.astype(datetime.date)
+    if np.isnan(value):
+        return None
+    return float(value)
+
+
+def test_cnt_fleet_matches_scalar():
+    rows = random_fleet(3000)
+    result = cnt_fleet(columns_from_objects(rows))
+
+    for index, row in enumerate(rows):
+        expected = scalar_result(*row)
+        for field in RESULT_FIELDS:
+            assert as_python(result[field][index]) == expected.get(field), (
+                field, row
+            )
+
+
+@pytest.mark.parametrize(
+    'start,months,res',
+    [
+        ('2024-01-31', 1, '2024-02-29'),
+        ('2023-01-31', 1, '2023-02-28'),
+        ('2023-08-31', -6, '2023-02-28'),
+        ('2023-12-15', 14, '2025-02-15'),
+    ]
+)
+def test_add_months_clamps_like_relativedelta(start, months, res):
+    shifted = add_months(
+        np.array([start], dtype="datetime64[D]"),
+        np.array([months], dtype=np.float64)
+    )
+    assert shifted[0] == np.datetime64(res)
+
+
+def test_round2_matches_builtin_round():
+    values = np.array([2.675, 0.125, 1.005, 1490.1 + 500.5, -10.655, 0.0])
+    assert round2(values).tolist() == [
+        round(value, 2) for value in values.tolist()
+    ]
+
+
+@pytest.mark.django_db
+def test_load_fleet_columns():
+    task = Task.objects.create(code="00-IJM-001", description="long_str")
+    Task.objects.create(code="00-IJM-002", description="no cws")
+    Requirements.objects.create(task=task, due_months=6, is_active=True)
+    CW.objects.create(task=task, perform_date=datetime.date(2023, 1, 31))
+    CW.objects.create(
+        task=task,
+        perform_date=datetime.date(2023, 8, 31),
+        perform_hours=100
+    )
+
+    ids, columns = load_fleet_columns()
+    result = cnt_fleet(columns)
+
+    assert ids.tolist() == [task.pk]
+    assert columns["perform_hours"].tolist() == [100]
+    assert result["next_due_date"][0] == np.datetime64("2024-02-29")
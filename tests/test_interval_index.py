@@ -0,0 +1,175 @@
+import datetime
+import random
+
+import numpy as np
+import pytest
+from django.test import Client
+
+from apps.tasks.models import Task, CW, Requirements
+from apps.tasks.due_state import refresh_due_states
+from apps.tasks.interval_index import IntervalIndex
+from apps.tasks.snapshot import FleetSnapshot, query_windows
+
+
+def random_index(size, seed=3):
+    rnd = random.Random(seed)
+    starts = np.array([rnd.uniform(0, 1000) for _ in range(size)])
+    ends = starts + np.array([rnd.choice([0, 5, 30]) for _ in range(size)])
+    return IntervalIndex(starts, ends, np.arange(size)), starts, ends
+
+
+@pytest.mark.parametrize("low,high", [
+    (500, 500),
+    (0, 0),
+    (999.5, 1100),
+    (250, 260),
+    (-10, -1),
+])
+def test_overlapping_matches_brute_force(low, high):
+    index, starts, ends = random_index(2000)
+
+    found = index.overlapping(low, high)
+
+    expected = np.flatnonzero((starts <= high) & (ends >= low))
+    assert sorted(found.tolist()) == expected.tolist()
+    assert np.all(np.diff(starts[found]) >= 0)
+
+
+def test_long_windows_do_not_widen_short_ones():
+    index, starts, ends = random_index(2000)
+    starts = np.append(starts, [-5000.0, 400.0])
+    ends = np.append(ends, [5000.0, 2000.0])
+    index = IntervalIndex(starts, ends, np.arange(len(starts)))
+
+    for low, high in [(500, 500), (-10, -1), (999.5, 1100)]:
+        found = index.overlapping(low, high)
+        expected = np.flatnonzero((starts <= high) & (ends >= low))
+        assert sorted(found.tolist()) == expected.tolist()
+        assert np.all(np.diff(starts[found]) >= 0)
+
+    # Each long window only widens the search of its own length group.
+    assert [group.max_length for group in index.groups] == pytest.approx(
+        [0.0, 5.0, 30.0, 1600.0, 10000.0]
+    )
+
+
+def test_stab_is_a_point_overlap():
+    index = IntervalIndex(
+        np.array([10.0, 0.0, 20.0]),
+        np.array([15.0, 30.0, 20.0]),
+        np.array([0, 1, 2])
+    )
+    assert index.stab(12).tolist() == [1, 0]
+    assert index.stab(20).tolist() == [1, 2]
+    assert index.stab(31).tolist() == []
+    assert len(IntervalIndex(np.array([]), np.array([]), np.array([]))) == 0
+
+
+def create_task(code, perform_date, perform_hours=None, **requirements):
+    task = Task.objects.create(code=code, description="")
+    Requirements.objects.create(task=task, is_active=True, **requirements)
+    CW.objects.create(
+        task=task,
+        perform_date=perform_date,
+        perform_hours=perform_hours
+    )
+    refresh_due_states([task.pk])
+    return task
+
+
+@pytest.fixture
+def windows():
+    return [
+        # Due 2024-01-01, window 2023-12-17 .. 2024-01-16
+        create_task(
+            "00-IJM-001",
+            datetime.date(2023, 1, 1),
+            due_months=12,
+            mos_unit="D",
+            pos_tol_mos=15,
+            neg_tol_mos=-15
+        ),
+        # Due 2024-02-01 without tolerance, due at 1500 +- 50 hours
+        create_task(
+            "00-IJM-002",
+            datetime.date(2023, 8, 1),
+            perform_hours=1000,
+            due_months=6,
+            due_hrs=500,
+            hrs_unit="H",
+            pos_tol_hrs=50,
+            neg_tol_hrs=-50
+        ),
+    ]
+
+
+def codes(rows):
+    return [row["code"] for row in rows]
+
+
+@pytest.mark.django_db
+def test_stabbing_and_range_queries(windows):
+    snapshot = FleetSnapshot()
+
+    def query(*args):
+        return codes(query_windows(*args, snapshot=snapshot))
+
+    assert query("mos", datetime.date(2023, 12, 20)) == ["00-IJM-001"]
+    assert query("mos", datetime.date(2024, 1, 17)) == []
+    assert query("mos", datetime.date(2024, 2, 1)) == ["00-IJM-002"]
+    assert query(
+        "mos",
+        datetime.date(2024, 1, 10),
+        datetime.date(2024, 3, 1)
+    ) == ["00-IJM-001", "00-IJM-002"]
+    assert query("hrs", 1460.0) == ["00-IJM-002"]
+    assert query("hrs", 1551.0) == []
+    assert query("afl", 0.0, 1e9) == []
+
+
+@pytest.mark.django_db
+def test_index_follows_cw_writes(windows, settings):
+    settings.TASKS_SNAPSHOT_MAX_AGE = 0
+    snapshot = FleetSnapshot()
+    day = datetime.date(2023, 12, 20)
+    assert codes(query_windows("mos", day, snapshot=snapshot)) == [
+        "00-IJM-001"
+    ]
+
+    task = windows[0]
+    CW.objects.create(task=task, perform_date=datetime.date(2023, 6, 1))
+    refresh_due_states([task.pk])
+
+    assert codes(query_windows("mos", day, snapshot=snapshot)) == []
+    assert codes(query_windows(
+        "mos",
+        datetime.date(2024, 5, 20),
+        snapshot=snapshot
+    )) == ["00-IJM-001"]
+
+
+@pytest.mark.django_db
+def test_windows_endpoint(windows):
+    client = Client()
+
+    response = client.get("/api/tasks/windows/mos/", {"at": "2023-12-20"})
+    assert response.status_code == 200
+    assert response.json()["count"] == 1
+    assert response.json()["items"][0]["mos_pos"] == "2024-01-16"
+
+    response = client.get(
+        "/api/tasks/windows/hrs/",
+        {"start": "1400", "end": "1460"}
+    )
+    assert codes(response.json()["items"]) == ["00-IJM-002"]
+
+    assert client.get(
+        "/api/tasks/windows/mos/", {"at": "soon"}
+    ).status_code == 400
+    assert client.get(
+        "/api/tasks/windows/hrs/", {"start": "10"}
+    ).status_code == 400
+    assert client.get(
+        "/api/tasks/windows/hrs/", {"start": "10", "end": "5"}
+    ).status_code == 400
+    assert client.get("/api/tasks/windows/days/").status_code == 422
@@ -0,0 +1,81 @@
+import pytest
+import json
+import datetime
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.tasks.models import Task, CW
+
+
+def walk(client, url, cursor="", key="next"):
+    pages = []
+    while cursor is not None:
+        response = client.get(url, {"cursor": cursor, "limit": 3})
+        assert response.status_code == 200
+        page = json.loads(response.content)
+        pages.append(page)
+        cursor = page[key]
+    return pages
+
+
+@pytest.mark.django_db
+def test_tasks_keyset_walk(client):
+    # Duplicate codes make pk the tie-breaker.
+    codes = ["B", "A", "C", "A", "D", "B", "E"]
+    tasks = [
+        Task.objects.create(code=code, description="long_str")
+        for code in codes
+    ]
+    expected = [
+        task.pk for task in sorted(tasks, key=lambda task: (task.code, task.pk))
+    ]
+
+    pages = walk(client, "/api/tasks/")
+
+    assert [item["pk"] for page in pages for item in page["items"]] == expected
+    assert [len(page["items"]) for page in pages] == [3, 3, 1]
+    assert all(page["count"] is None for page in pages)
+    assert pages[0]["prev"] is None
+
+    back = walk(client, "/api/tasks/", pages[-1]["prev"], key="prev")
+    assert [
+        item["pk"] for page in reversed(back) for item in page["items"]
+    ] == expected[:6]
+
+
+@pytest.mark.django_db
+def test_tasks_keyset_skips_count(client):
+    for num in range(5):
+        Task.objects.create(code=f"TASK-{num}", description="long_str")
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/api/tasks/", {"cursor": "", "limit": 2})
+
+    assert response.status_code == 200
+    assert not any("COUNT(" in query["sql"] for query in queries)
+
+    response = client.get("/api/tasks/", {"limit": 2})
+    assert json.loads(response.content)["count"] == 5
+
+
+@pytest.mark.django_db
+def test_cws_keyset_walk(client):
+    task = Task.objects.create(code="00-IJM-001", description="long_str")
+    for month in (5, 1, 3, 2, 4):
+        CW.objects.create(
+            task=task,
+            perform_date=datetime.date(2023, month, 1)
+        )
+
+    pages = walk(client, f"/api/tasks/{task.pk}/cws/")
+
+    assert [
+        item["perform_date"] for page in pages for item in page["items"]
+    ] == [f"2023-0{month}-01" for month in range(1, 6)]
+
+
+@pytest.mark.django_db
+def test_invalid_cursor(client):
+    response = client.get("/api/tasks/", {"cursor": "not-a-cursor"})
+    assert response.status_code == 400
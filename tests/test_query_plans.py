@@ -0,0 +1,75 @@
+import pytest
+import datetime
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.tasks import services
+from apps.tasks.models import Task, CW, Requirements
+from apps.tasks.context import TaskContext
+from apps.tasks.loaders import load_requirements, load_latest_cws, load_prev_cws
+
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != "sqlite",
+    reason="Plans are checked against SQLite EXPLAIN QUERY PLAN output"
+)
+
+
+def query_plan(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def bad_steps(plan):
+    # Scanning a materialized window subquery is fine, scanning a table
+    # without an index or sorting in a temp B-tree is not.
+    return [
+        step for step in plan
+        if "TEMP B-TREE" in step
+        or step.startswith("SCAN tasks_") and " INDEX " not in step
+    ]
+
+
+@pytest.fixture
+def task():
+    task = Task.objects.create(code="00-IJM-001", description="long_str")
+    Requirements.objects.create(task=task, due_months=6, is_active=True)
+    for month in (1, 6):
+        CW.objects.create(task=task, perform_date=datetime.date(2023, month, 1))
+    return task
+
+
+SERVICE_CALLS = {
+    "get_tasks": lambda task: list(services.get_tasks()),
+    "get_task": lambda task: services.get_task(task.pk),
+    "get_cws": lambda task: list(services.get_cws(task.pk)),
+    "get_task_reqs": lambda task: list(services.get_task_reqs(task.pk)),
+    "compliance": lambda task: task.compliance,
+    "curr_requirements": lambda task: task.curr_requirements,
+    "task_context": lambda task: TaskContext.load(task.pk),
+    "task_contexts": lambda task: TaskContext.load_many([task.pk]),
+    "load_requirements": lambda task: load_requirements([task.pk, 0]),
+    "load_latest_cws": lambda task: load_latest_cws([task.pk, 0]),
+    "load_prev_cws": lambda task: load_prev_cws([task.pk, 0]),
+    "due_states": lambda task: list(services.get_due_states()),
+    "due_states_status": lambda task: list(
+        services.get_due_states("overdue")
+    ),
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", SERVICE_CALLS)
+def test_service_query_plans(task, name):
+    with CaptureQueriesContext(connection) as queries:
+        SERVICE_CALLS[name](task)
+
+    selects = [
+        query["sql"] for query in queries
+        if query["sql"].lstrip().upper().startswith("SELECT")
+    ]
+    assert selects
+    for sql in selects:
+        assert not bad_steps(query_plan(sql)), (sql, query_plan(sql))
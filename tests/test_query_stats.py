@@ -0,0 +1,75 @@
+import pytest
+import json
+import datetime
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, Client
+
+from apps.tasks.middleware import reset_query_stats
+from apps.tasks.models import Task, CW
+
+
+@pytest.fixture
+def query_stats(settings):
+    settings.TASKS_QUERY_STATS = True
+    settings.TASKS_RESPONSE_CACHE = None
+    reset_query_stats()
+    yield
+    reset_query_stats()
+
+
+@pytest.fixture
+def task():
+    task = Task.objects.create(code="00-IJM-001", description="long_str")
+    for month in (1, 6):
+        CW.objects.create(task=task, perform_date=datetime.date(2023, month, 1))
+    return task
+
+
+@pytest.mark.django_db
+def test_headers_report_queries(query_stats, task, django_assert_num_queries):
+    client = Client()
+    with django_assert_num_queries(2):
+        response = client.get("/api/tasks/")
+
+    assert response["X-Query-Count"] == "2"
+    assert response["Server-Timing"].startswith("db;dur=")
+    assert 'desc="2 queries"' in response["Server-Timing"]
+
+
+@pytest.mark.django_db
+def test_headers_under_asgi(query_stats, task):
+    response = async_to_sync(AsyncClient().get)(f"/api/tasks/{task.pk}/cws/")
+
+    assert response.status_code == 200
+    assert int(response["X-Query-Count"]) > 0
+
+
+@pytest.mark.django_db
+def test_per_endpoint_stats(query_stats, task):
+    client = Client()
+    for _ in range(3):
+        client.get(f"/api/tasks/{task.pk}/")
+    client.get("/api/tasks/")
+
+    stats = json.loads(client.get("/api/metrics/queries/").content)
+    by_endpoint = {row["endpoint"]: row for row in stats}
+
+    detail = by_endpoint["GET /api/tasks/<task_id>/"]
+    assert detail["requests"] == 3
+    assert detail["queries"] == 3
+    assert detail["avg_queries"] == 1
+    assert "tasks_task" in detail["slowest_sql"]
+    assert by_endpoint["GET /api/tasks/"]["queries"] == 2
+
+
+@pytest.mark.django_db
+def test_disabled_by_default(client, task):
+    response = client.get("/api/tasks/")
+    assert "X-Query-Count" not in response
+
+
+@pytest.mark.django_db
+def test_metrics_are_local_only(client):
+    response = client.get("/api/metrics/queries/", REMOTE_ADDR="10.0.0.8")
+    assert response.status_code == 403
@@ -0,0 +1,177 @@
+import pytest
+import datetime
+import sqlite3
+import subprocess
+import sys
+
+from django.core.management import call_command
+from django.db import connection
+
+from apps.tasks.models import Task, CW, Requirements
+from apps.tasks.interval_maths import cnt_next_due
+from apps.tasks.recompute import (
+    CW_FIELDS,
+    NEXT_DUE_FIELDS,
+    compute_chunk,
+    save_cws,
+    recompute_next_due
+)
+
+
+REQUIREMENTS_PAYLOAD = [
+    {"due_months": 6, "is_active": True},
+    {"due_hrs": 500.5, "due_cycles": 250, "is_active": True},
+    {"due_months": 12, "due_hrs": 1000, "due_cycles": 300, "is_active": True},
+    {"due_months": 3, "is_active": False},
+    {},
+]
+
+WORKER_POOL_SCRIPT = """
+import sys
+
+import django
+from django.conf import settings
+
+settings.DATABASES["default"]["NAME"] = sys.argv[1]
+settings.TASKS_RESPONSE_CACHE = None
+django.setup()
+
+from django.core.management import call_command
+
+call_command("recompute_due", workers=3, chunk_size=1)
+"""
+
+
+def seed_fleet():
+    tasks = []
+    for num, req_payload in enumerate(REQUIREMENTS_PAYLOAD):
+        task = Task.objects.create(code=f"TASK-{num}", description="long_str")
+        if req_payload:
+            Requirements.objects.create(task=task, **req_payload)
+
+        CW.objects.create(
+            task=task,
+            perform_date=datetime.date(2023, 1, 31),
+            perform_hours=1000.25,
+            perform_cycles=400,
+            next_due_date=datetime.date(2023, 8, 31),
+            next_due_hrs=1500.75,
+            next_due_cycles=650,
+        )
+        CW.objects.create(
+            task=task,
+            perform_date=datetime.date(2023, 8, 30),
+            perform_hours=1490.1,
+            perform_cycles=640,
+            adjusted_days=-1 if num % 2 else 0,
+            adjusted_hrs=-10.65 if num % 2 else 0,
+        )
+        tasks.append(task)
+    return tasks
+
+
+def next_due_snapshot(tasks):
+    return {
+        task.pk: [
+            getattr(task.compliance, field) for field in NEXT_DUE_FIELDS
+        ]
+        for task in tasks
+    }
+
+
+def reset_latest(tasks):
+    for task in tasks:
+        CW.objects.filter(pk=task.compliance.pk).update(
+            next_due_date=None,
+            next_due_hrs=None,
+            next_due_cycles=None
+        )
+
+
+@pytest.mark.django_db
+def test_batch_recompute_matches_scalar():
+    tasks = seed_fleet()
+
+    for task in tasks:
+        cnt_next_due(task.pk)
+    scalar = next_due_snapshot(tasks)
+
+    reset_latest(tasks)
+    processed, updated = recompute_next_due(chunk_size=2)
+
+    assert processed == len(tasks)
+    assert updated == 4
+    assert next_due_snapshot(tasks) == scalar
+    assert scalar[tasks[0].pk][0] == datetime.date(2024, 2, 29)
+    assert scalar[tasks[1].pk][1:] == [1500.75, 890]
+
+
+@pytest.mark.django_db
+def test_batch_recompute_skips_deleted_tasks():
+    tasks = seed_fleet()
+    reset_latest(tasks)
+    tasks[0].delete()
+
+    processed, _ = recompute_next_due()
+
+    assert processed == len(tasks) - 1
+    assert tasks[0].compliance.next_due_date is None
+
+
+@pytest.mark.django_db
+def test_batch_recompute_keeps_cws_deleted_meanwhile():
+    tasks = seed_fleet()
+    reset_latest(tasks)
+    changed, _ = compute_chunk([task.pk for task in tasks])
+    deleted = tasks[0].compliance
+    CW.objects.filter(pk=deleted.pk).delete()
+
+    save_cws(changed, CW_FIELDS)
+
+    assert not CW.objects.filter(pk=deleted.pk).exists()
+    assert tasks[2].compliance.next_due_date == datetime.date(2024, 8, 30)
+
+
+@pytest.mark.django_db
+def test_recompute_due_command_reports_rate(capsys):
+    tasks = seed_fleet()
+    for task in tasks:
+        cnt_next_due(task.pk)
+    scalar = next_due_snapshot(tasks)
+    reset_latest(tasks)
+
+    # In process: forked workers would not see the in-memory test database.
+    call_command("recompute_due", workers=1)
+
+    assert "tasks/sec" in capsys.readouterr().out
+    assert next_due_snapshot(tasks) == scalar
+    assert scalar[tasks[0].pk][0] == datetime.date(2024, 2, 29)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_recompute_due_command_in_worker_pool(tmp_path):
+    tasks = seed_fleet()
+    for task in tasks:
+        cnt_next_due(task.pk)
+    scalar = next_due_snapshot(tasks)
+    reset_latest(tasks)
+
+    # Forked workers cannot see the in-memory test database, so the command
+    # runs in a child process against a file copy of it.
+    path = tmp_path / "db.sqlite3"
+    connection.ensure_connection()
+    with sqlite3.connect(path) as db:
+        connection.connection.backup(db)
+    result = subprocess.run(
+        [sys.executable, "-c", WORKER_POOL_SCRIPT, str(path)],
+        capture_output=True,
+        text=True,
+        timeout=60
+    )
+    with sqlite3.connect(path) as db:
+        db.backup(connection.connection)
+
+    assert result.returncode == 0, result.stderr
+    assert "5/5 tasks" in result.stdout
+    assert "Recomputed 5 tasks (4 changed)" in result.stdout
+    assert next_due_snapshot(tasks) == scalar
@@ -0,0 +1,79 @@
+import datetime
+from unittest import mock
+
+import pytest
+
+from apps.tasks import services
+from apps.tasks.dispatch import dispatcher
+from apps.tasks.importer import import_program
+from apps.tasks.models import Task, CW, Requirements
+from apps.tasks.schemas import ReqIn
+from apps.tasks.tasks import update_daily_due_dates
+
+
+def create_task(code):
+    task = Task.objects.create(code=code, description="")
+    Requirements.objects.create(task=task, due_months=6, is_active=True)
+    CW.objects.create(task=task, perform_date=datetime.date(2023, 1, 1))
+    return task
+
+
+@pytest.fixture
+def swept():
+    tasks = [create_task(f"00-IJM-{index:03}") for index in range(3)]
+    assert update_daily_due_dates()["mode"] == "full"
+    return tasks
+
+
+@pytest.mark.django_db
+def test_create_requirements_recomputes_task(swept):
+    task = swept[0]
+
+    services.create_requirements(
+        task.pk,
+        ReqIn(due_months=12, is_active=True)
+    )
+
+    assert task.compliance.next_due_date == datetime.date(2024, 1, 1)
+    assert swept[1].compliance.next_due_date == datetime.date(2023, 7, 1)
+
+
+@pytest.mark.django_db
+def test_update_requirements_recomputes_task(swept):
+    task = swept[1]
+
+    services.update_requirements(
+        task.pk,
+        task.curr_requirements.pk,
+        ReqIn(due_months=3)
+    )
+
+    assert task.compliance.next_due_date == datetime.date(2023, 4, 1)
+
+
+@pytest.mark.django_db
+def test_small_import_marks_tasks_dirty(swept):
+    with mock.patch.object(dispatcher, "send") as send:
+        stats = import_program([
+            {"code": task.code, "due_months": 12} for task in swept[:2]
+        ])
+
+    send.assert_called_once_with(sorted(task.pk for task in swept[:2]))
+    assert stats["tasks_recomputed"] == 2
+
+
+@pytest.mark.django_db
+def test_large_import_is_one_incremental_pass(swept, settings):
+    settings.TASKS_RECOMPUTE_BULK_THRESHOLD = 1
+
+    with mock.patch.object(dispatcher, "send") as send:
+        stats = import_program(
+            [{"code": task.code, "due_months": 12} for task in swept],
+            chunk_size=1
+        )
+
+    send.assert_not_called()
+    assert stats["tasks_recomputed"] == 3
+    for task in swept:
+        assert task.compliance.next_due_date == datetime.date(2024, 1, 1)
+        assert task.due_state.next_due_date == datetime.date(2024, 1, 1)
@@ -0,0 +1,156 @@
+import pytest
+import json
+import datetime
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from config import settings as project_settings
+
+from apps.tasks import services
+from apps.tasks.models import Task, CW, Requirements
+from apps.tasks.recompute import recompute_next_due
+from apps.tasks.response_cache import (
+    GLOBAL_VERSION_KEY,
+    get_cache_stats,
+    bump_versions,
+    check_shared_cache,
+    response_key
+)
+
+
+@pytest.fixture
+def task():
+    task = Task.objects.create(code="00-IJM-001", description="long_str")
+    Requirements.objects.create(task=task, due_months=6, is_active=True)
+    return task
+
+
+def get_json(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    return json.loads(response.content)
+
+
+@pytest.mark.django_db
+def test_cached_until_writer_bumps(client, task, django_assert_num_queries):
+    stats = get_cache_stats()
+    path = f"/api/tasks/{task.pk}/cws/"
+    assert get_json(client, path)["items"] == []
+
+    with django_assert_num_queries(0):
+        assert get_json(client, path)["items"] == []
+
+    services.create_cw(task.pk, {"perform_date": datetime.date(2023, 1, 1)})
+
+    items = get_json(client, path)["items"]
+    assert [item["perform_date"] for item in items] == ["2023-01-01"]
+    assert items[0]["task"]["next_due_date"] == "2023-07-01"
+
+    after = get_cache_stats()
+    assert after["hits"] - stats["hits"] == 1
+    assert after["misses"] - stats["misses"] == 2
+
+
+@pytest.mark.django_db
+def test_task_bump_moves_list_but_not_other_tasks(client, task):
+    other = Task.objects.create(code="00-IJM-002", description="long_str")
+    get_json(client, "/api/tasks/")
+    get_json(client, f"/api/tasks/{other.pk}/")
+
+    Task.objects.filter(pk__in=[task.pk, other.pk]).update(description="new")
+    bump_versions([task.pk])
+
+    listed = get_json(client, "/api/tasks/")["items"]
+    assert {item["description"] for item in listed} == {"new"}
+    assert get_json(client, f"/api/tasks/{other.pk}/")["description"] == (
+        "long_str"
+    )
+
+
+@pytest.mark.django_db
+def test_query_params_are_part_of_the_key(client, task):
+    Task.objects.create(code="00-IJM-002", description="long_str")
+
+    assert len(get_json(client, "/api/tasks/?limit=1")["items"]) == 1
+    assert len(get_json(client, "/api/tasks/?limit=2")["items"]) == 2
+
+
+@pytest.mark.django_db
+def test_recompute_bumps_changed_tasks(client, task):
+    cw = CW.objects.create(task=task, perform_date=datetime.date(2023, 1, 1))
+    path = f"/api/tasks/{task.pk}/"
+    assert get_json(client, path)["next_due_date"] is None
+
+    recompute_next_due([task.pk])
+
+    assert get_json(client, path)["next_due_date"] == "2023-07-01"
+    cw.refresh_from_db()
+    assert cw.next_due_date == datetime.date(2023, 7, 1)
+
+
+
+def test_per_process_cache_is_refused(settings):
+    with pytest.raises(ImproperlyConfigured):
+        check_shared_cache()
+
+    settings.CACHES = {
+        **settings.CACHES,
+        "shared": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": "redis://localhost:6379/1",
+        },
+    }
+    settings.TASKS_RESPONSE_CACHE = "shared"
+    check_shared_cache()
+    settings.TASKS_RESPONSE_CACHE = None
+    check_shared_cache()
+
+
+@pytest.fixture
+def redis_responses(settings):
+    # The alias as deployed, instead of the locmem stand-in of conftest.
+    locmem = settings.CACHES
+    settings.CACHES = {
+        **locmem,
+        "responses": project_settings.CACHES["responses"],
+    }
+    try:
+        caches["responses"].get(GLOBAL_VERSION_KEY)
+    except RedisConnectionError:
+        settings.CACHES = locmem
+        pytest.skip("No redis for the responses cache alias")
+    yield caches["responses"]
+    # conftest clears the alias afterwards; keep that off the shared redis.
+    settings.CACHES = locmem
+
+
+@pytest.mark.django_db
+def test_redis_alias_counts_hits_and_expires_responses(
+        rf,
+        client,
+        task,
+        redis_responses
+        ):
+    bump_versions([task.pk])
+    stats = get_cache_stats()
+    path = f"/api/tasks/{task.pk}/"
+
+    get_json(client, path)
+    get_json(client, path)
+    bump_versions([task.pk])
+    get_json(client, path)
+
+    after = get_cache_stats()
+    assert after["hits"] - stats["hits"] == 1
+    assert after["misses"] - stats["misses"] == 2
+
+    # Only responses carry a TTL, so volatile-lru evicts nothing else.
+    redis = redis_responses._cache.get_client()
+    version = redis_responses.get(f"tasks:version:{task.pk}")
+    key = response_key(rf.get(path), version)
+    assert redis.ttl(redis_responses.make_and_validate_key(key)) > 0
+    assert redis.ttl(redis_responses.make_and_validate_key(
+        f"tasks:version:{task.pk}"
+    )) == -1
@@ -0,0 +1,115 @@
+import datetime
+import json
+from unittest import mock
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from apps.tasks.models import Task, CW, Requirements, RequirementsRevision
+from apps.tasks.revisions import stage_revision, activate_revision
+from apps.tasks.tasks import update_daily_due_dates
+
+
+def create_task(code, with_requirements=True):
+    task = Task.objects.create(code=code, description="")
+    if with_requirements:
+        Requirements.objects.create(task=task, due_months=6, is_active=True)
+    CW.objects.create(task=task, perform_date=datetime.date(2023, 1, 1))
+    return task
+
+
+@pytest.fixture
+def tasks():
+    tasks = [create_task(f"00-IJM-{index:03}") for index in range(3)]
+    tasks.append(create_task("00-IJM-100", with_requirements=False))
+    assert update_daily_due_dates()["mode"] == "full"
+    return tasks
+
+
+@pytest.mark.django_db
+def test_staged_revision_is_invisible(tasks):
+    stats = stage_revision(
+        [{"code": task.code, "due_months": 12} for task in tasks],
+        "rev B"
+    )
+
+    assert stats["status"] == "staged"
+    assert stats["requirements"] == 4
+    assert tasks[0].curr_requirements.due_months == 6
+    assert tasks[3].curr_requirements is None
+    assert tasks[0].compliance.next_due_date == datetime.date(2023, 7, 1)
+
+
+@pytest.mark.django_db
+def test_activation_swaps_active_set_and_recomputes(tasks):
+    revision = stage_revision(
+        [{"code": task.code, "due_months": 12} for task in tasks[1:]],
+        "rev B"
+    )
+
+    stats = activate_revision(revision["pk"])
+
+    assert stats["status"] == "active"
+    assert stats["activated_at"] is not None
+    assert tasks[0].curr_requirements.due_months == 6
+    for task in tasks[1:]:
+        assert Requirements.objects.filter(
+            task=task,
+            is_active=True
+        ).get().revision_id == revision["pk"]
+        assert task.compliance.next_due_date == datetime.date(2024, 1, 1)
+        assert task.due_state.next_due_date == datetime.date(2024, 1, 1)
+
+
+@pytest.mark.django_db
+def test_activation_queries_do_not_grow_with_tasks(
+        tasks,
+        django_assert_max_num_queries
+        ):
+    revision = stage_revision(
+        [{"code": task.code, "due_months": 12} for task in tasks],
+        "rev B"
+    )
+    CW.objects.create(task=tasks[0], perform_date=datetime.date(2023, 6, 1))
+
+    with mock.patch("apps.tasks.revisions.enqueue_recompute") as enqueue:
+        with django_assert_max_num_queries(8):
+            activate_revision(revision["pk"])
+
+    assert sorted(enqueue.call_args.args[0]) == [task.pk for task in tasks]
+
+
+@pytest.mark.django_db
+def test_revision_rejects_unknown_tasks_and_reactivation(tasks):
+    with pytest.raises(ValidationError):
+        stage_revision([{"code": "00-IJM-999", "due_months": 12}], "rev B")
+    assert not RequirementsRevision.objects.exists()
+
+    revision = stage_revision([{"code": tasks[0].code}], "rev B")
+    activate_revision(revision["pk"])
+    with pytest.raises(ValidationError):
+        activate_revision(revision["pk"])
+
+
+@pytest.mark.django_db
+def test_revision_api(client, tasks):
+    ndjson = "\n".join(
+        json.dumps({"code": task.code, "due_months": 3}) for task in tasks
+    )
+
+    response = client.post(
+        '/api/tasks/revisions/?name=rev%20B',
+        {"file": SimpleUploadedFile("program.ndjson", ndjson.encode())}
+    )
+    assert response.status_code == 200
+    revision = json.loads(response.content)
+    assert revision["requirements"] == 4
+
+    response = client.post(f'/api/tasks/revisions/{revision["pk"]}/activate/')
+    assert response.status_code == 200
+    assert json.loads(response.content)["status"] == "active"
+    assert tasks[3].curr_requirements.due_months == 3
+
+    response = client.post(f'/api/tasks/revisions/{revision["pk"]}/activate/')
+    assert response.status_code == 400
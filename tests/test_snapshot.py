@@ -0,0 +1,233 @@
+import datetime
+
+import pytest
+from django.test import Client
+from django.utils import timezone
+
+from apps.tasks.models import (
+    Task,
+    CW,
+    Requirements,
+    TaskDueState,
+    DueStateChange
+)
+from apps.tasks.due_state import (
+    cnt_status,
+    build_due_state,
+    save_due_states,
+    refresh_due_states
+)
+from apps.tasks.services import update_tasks, delete_task
+from apps.tasks.snapshot import FleetSnapshot, query_fleet
+from apps.tasks.tasks import prune_due_state_changes
+
+
+def create_task(code, perform_date, **requirements):
+    task = Task.objects.create(code=code, description="")
+    if requirements:
+        Requirements.objects.create(task=task, is_active=True, **requirements)
+    CW.objects.create(task=task, perform_date=perform_date)
+    refresh_due_states([task.pk])
+    return task
+
+
+@pytest.fixture
+def fleet_tasks():
+    today = timezone.now().date()
+    return {
+        # Due 30 days ago, window closed 15 days ago
+        "overdue": create_task(
+            "00-IJM-001",
+            today - datetime.timedelta(days=395),
+            due_months=12,
+            mos_unit="D",
+            pos_tol_mos=15,
+            neg_tol_mos=-15
+        ),
+        # Due in 5 days, window open since 10 days ago
+        "in_window": create_task(
+            "00-IJM-002",
+            today - datetime.timedelta(days=360),
+            due_months=12,
+            mos_unit="D",
+            pos_tol_mos=15,
+            neg_tol_mos=-15
+        ),
+        "ok": create_task(
+            "00-IJM-003",
+            today - datetime.timedelta(days=30),
+            due_months=6
+        ),
+        "no_limits": create_task("00-IJM-004", today),
+    }
+
+
+def task_ids(rows):
+    return [row["task_id"] for row in rows]
+
+
+@pytest.mark.django_db
+def test_status_filters_match_due_states(fleet_tasks):
+    snapshot = FleetSnapshot()
+    today = timezone.now().date()
+
+    for status in TaskDueState.Status:
+        expected = sorted(
+            state.task_id for state in TaskDueState.objects.all()
+            if cnt_status(state, today) == status
+        )
+        assert sorted(task_ids(query_fleet(status, snapshot=snapshot))) == (
+            expected
+        )
+
+    assert task_ids(query_fleet("overdue", snapshot=snapshot)) == [
+        fleet_tasks["overdue"].pk
+    ]
+    assert task_ids(query_fleet("in_window", snapshot=snapshot)) == [
+        fleet_tasks["in_window"].pk
+    ]
+
+
+@pytest.mark.django_db
+def test_due_before_is_ordered_by_due_date(fleet_tasks):
+    snapshot = FleetSnapshot()
+    before = timezone.now().date() + datetime.timedelta(days=365)
+
+    rows = query_fleet(before=before, snapshot=snapshot)
+
+    assert task_ids(rows) == [
+        fleet_tasks["overdue"].pk,
+        fleet_tasks["in_window"].pk,
+        fleet_tasks["ok"].pk,
+    ]
+    assert rows[0]["code"] == "00-IJM-001"
+    assert rows[0]["next_due_hrs"] is None
+    assert rows[0]["mos_pos"] == rows[0]["next_due_date"] + (
+        datetime.timedelta(days=15)
+    )
+
+
+@pytest.mark.django_db
+def test_refresh_applies_only_changes(fleet_tasks, django_assert_num_queries):
+    snapshot = FleetSnapshot()
+    snapshot.load()
+    assert len(snapshot) == 4
+
+    with django_assert_num_queries(1):
+        assert snapshot.refresh() == 0
+
+    new_task = create_task(
+        "00-IJM-000",
+        timezone.now().date() - datetime.timedelta(days=400),
+        due_months=12
+    )
+    delete_task(fleet_tasks["ok"].pk)
+    update_tasks(fleet_tasks["no_limits"].pk, {"code": "00-IJM-404"})
+
+    snapshot.refresh()
+
+    assert snapshot.columns["task_id"].tolist() == sorted([
+        fleet_tasks["overdue"].pk,
+        fleet_tasks["in_window"].pk,
+        fleet_tasks["no_limits"].pk,
+        new_task.pk,
+    ])
+    assert "00-IJM-404" in snapshot.columns["code"].tolist()
+    assert new_task.pk in task_ids(query_fleet("overdue", snapshot=snapshot))
+
+
+@pytest.mark.django_db
+def test_refresh_sees_state_committed_out_of_order(fleet_tasks):
+    snapshot = FleetSnapshot()
+    snapshot.load()
+    today = timezone.now().date()
+    task = fleet_tasks["ok"]
+    cw = task.compliance
+    cw.perform_date = today - datetime.timedelta(days=400)
+
+    # Built before the write below, committed after it was pulled.
+    late = build_due_state(task.pk, task.curr_requirements, cw, None, today)
+    refresh_due_states([fleet_tasks["in_window"].pk])
+    snapshot.refresh()
+    save_due_states([late])
+    assert late.updated_at < TaskDueState.objects.get(
+        task=fleet_tasks["in_window"]
+    ).updated_at
+
+    snapshot.refresh()
+
+    assert task.pk in task_ids(query_fleet("overdue", snapshot=snapshot))
+
+
+@pytest.mark.django_db
+def test_refresh_rechecks_change_ids_committed_late(fleet_tasks):
+    snapshot = FleetSnapshot()
+    snapshot.load()
+    task = fleet_tasks["ok"]
+    TaskDueState.objects.filter(task=task).update(
+        next_due_date=timezone.now().date() - datetime.timedelta(days=10)
+    )
+    latest = DueStateChange.objects.latest("pk").pk
+
+    # Id taken first, but committed after a higher one was pulled.
+    DueStateChange.objects.create(pk=latest + 2, task=fleet_tasks["overdue"])
+    snapshot.refresh()
+    assert task.pk not in task_ids(query_fleet("overdue", snapshot=snapshot))
+    DueStateChange.objects.create(pk=latest + 1, task=task)
+
+    assert snapshot.refresh() == 1
+    assert task.pk in task_ids(query_fleet("overdue", snapshot=snapshot))
+
+
+@pytest.mark.django_db
+def test_prune_keeps_recent_changes(fleet_tasks, settings):
+    DueStateChange.objects.update(
+        created_at=timezone.now() - datetime.timedelta(
+            seconds=2 * settings.TASKS_SNAPSHOT_FULL_RELOAD + 1
+        )
+    )
+    refresh_due_states([fleet_tasks["ok"].pk])
+
+    assert prune_due_state_changes() == {"deleted": 4}
+    assert list(DueStateChange.objects.values_list("task_id", flat=True)) == [
+        fleet_tasks["ok"].pk
+    ]
+
+
+@pytest.mark.django_db
+def test_full_reload_picks_up_unlogged_writes(fleet_tasks, settings):
+    settings.TASKS_SNAPSHOT_MAX_AGE = 0
+    snapshot = FleetSnapshot()
+    task = fleet_tasks["ok"]
+    assert task.pk not in task_ids(query_fleet("overdue", snapshot=snapshot))
+
+    TaskDueState.objects.filter(task=task).update(
+        next_due_date=timezone.now().date() - datetime.timedelta(days=10)
+    )
+    assert task.pk not in task_ids(query_fleet("overdue", snapshot=snapshot))
+
+    settings.TASKS_SNAPSHOT_FULL_RELOAD = 0
+    assert task.pk in task_ids(query_fleet("overdue", snapshot=snapshot))
+
+
+@pytest.mark.django_db
+def test_fleet_due_endpoint(fleet_tasks, settings):
+    settings.TASKS_SNAPSHOT_MAX_AGE = 0
+    client = Client()
+
+    response = client.get("/api/tasks/due/", {"status": "overdue"})
+    assert response.status_code == 200
+    assert response.json()["count"] == 1
+    assert response.json()["items"][0]["task_id"] == fleet_tasks["overdue"].pk
+
+    task = fleet_tasks["in_window"]
+    cw = task.compliance
+    cw.perform_date = timezone.now().date()
+    cw.save()
+    refresh_due_states([task.pk])
+
+    response = client.get("/api/tasks/due/", {"status": "in_window"})
+    assert response.json()["count"] == 0
+
+    response = client.get("/api/tasks/due/", {"status": "unknown"})
+    assert response.status_code == 422